@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shape-keyed transform plan cache.
+
+Also compares ``GELFMessage.to_json`` with the template-based
+``GELFEncoder``.
+
+Compares, per event, the field-building stage (``flatten_dict`` plus
+``enhance_address_fields``) and the full ``GELFMessage.from_netbird_event``
+in three modes:
+
+* ``uncached``: the reference implementation
+* ``cold``: a fresh plan cache for every event (plan built every time)
+* ``warm``: one cache, so every event after the first reuses its plan
+
+Usage:
+    python scripts/bench_transform.py --events 20000 --meta-keys 40
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.gelf import (  # noqa: E402
+    GELFMessage,
+    enhance_address_fields,
+    flatten_dict,
+    parse_json_fields,
+)
+from src.models.gelf_encoder import GELFEncoder  # noqa: E402
+from src.services.plan_cache import TransformPlanCache  # noqa: E402
+
+
+def make_event(i: int, meta_keys: int) -> dict:
+    meta = {f"attr_{k}": f"value-{i}-{k}" for k in range(meta_keys)}
+    meta["source_addr"] = f"10.0.{i % 250}.1:51820"
+    meta["peer"] = {"name": f"peer-{i}", "os": "linux", "remote_addr": "1.2.3.4:80"}
+    return {
+        "ID": f"evt-{i}",
+        "Timestamp": "2025-08-28T23:04:20.987Z",
+        "Message": "Peer login",
+        "InitiatorID": "user@example.com",
+        "TargetID": f"peer-{i}",
+        "meta": meta,
+    }
+
+
+def timed(label: str, func, events) -> float:
+    started = time.perf_counter()
+    for event in events:
+        func(event)
+    elapsed = time.perf_counter() - started
+    per_event = elapsed / len(events) * 1e6
+    print(f"{label:<28} {per_event:9.2f} us/event")
+    return per_event
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--meta-keys", type=int, default=40)
+    args = parser.parse_args()
+
+    events = [
+        parse_json_fields(make_event(i, args.meta_keys)) for i in range(args.events)
+    ]
+    warm = TransformPlanCache(max_plans=16)
+
+    print("fields stage")
+    base = timed(
+        "  uncached", lambda e: enhance_address_fields(flatten_dict(e)), events
+    )
+    cold = timed("  cold", lambda e: TransformPlanCache(1).fields(e), events)
+    hot = timed("  warm", lambda e: warm.fields(e), events)
+    print(f"  warm speedup {base / hot:.2f}x, cold overhead {cold / base:.2f}x")
+
+    print("from_netbird_event")
+    base_full = timed(
+        "  uncached",
+        lambda e: GELFMessage.from_netbird_event(e, host="h", tenant_id="t"),
+        events,
+    )
+    hot_full = timed(
+        "  warm",
+        lambda e: GELFMessage.from_netbird_event(
+            e, host="h", tenant_id="t", plan_cache=warm
+        ),
+        events,
+    )
+    print(f"  warm speedup {base_full / hot_full:.2f}x")
+    print(json.dumps(warm.summary()))
+
+    print("serialization")
+    messages = [
+        GELFMessage.from_netbird_event(e, host=f"nb_streamer_t{i % 10}", tenant_id="t")
+        for i, e in enumerate(events)
+    ]
+    encoder = GELFEncoder()
+    base_json = timed("  to_json", lambda m: m.to_json().encode("utf-8"), messages)
+    fast_json = timed("  GELFEncoder", encoder.encode, messages)
+    print(f"  encoder speedup {base_json / fast_json:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Benchmark NB_Streamer throughput against the number of worker processes.
+
+For every worker count the script starts ``python -m src.main`` with
+NB_WORKERS set, drives ``POST /events`` from several client processes for a
+fixed duration and reports the achieved events per second. GELF output goes
+to the fake Graylog sink (``src.tools.fake_graylog``), which also reports how
+many messages actually arrived, so no Graylog is needed.
+
+Usage:
+    python scripts/bench_workers.py --workers 1 2 4 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+EVENT = {
+    "NB_Tenant": "bench",
+    "ID": "bench-event",
+    "Timestamp": "2025-08-28T23:04:20.987Z",
+    "Message": "Peer login",
+    "InitiatorID": "user@example.com",
+    "TargetID": "peer-001",
+    "meta": "map[source_addr:10.0.0.1:51820 peer_name:laptop-01 os:linux]",
+}
+
+
+def free_port(kind: int = socket.SOCK_STREAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_sink(udp_port: int, http_port: int) -> subprocess.Popen:
+    sink = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.tools.fake_graylog",
+            "--host",
+            "127.0.0.1",
+            "--udp",
+            str(udp_port),
+            "--http",
+            str(http_port),
+            "--keep",
+            "0",
+            "--quiet",
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    wait_ready(f"http://127.0.0.1:{http_port}", path="/stats")
+    return sink
+
+
+async def _client(url: str, duration: float, concurrency: int) -> int:
+    body = json.dumps(EVENT).encode()
+    deadline = time.monotonic() + duration
+    done = 0
+
+    async with httpx.AsyncClient(timeout=10) as client:
+
+        async def loop() -> None:
+            nonlocal done
+            while time.monotonic() < deadline:
+                response = await client.post(url, content=body)
+                if response.status_code == 200:
+                    done += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return done
+
+
+def client_process(url: str, duration: float, concurrency: int, results) -> None:
+    results.put(asyncio.run(_client(url, duration, concurrency)))
+
+
+def wait_ready(base_url: str, timeout: float = 20.0, path: str = "/health") -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}{path}", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not become healthy")
+
+
+def run_one(workers: int, args: argparse.Namespace, graylog_port: int) -> float:
+    port = free_port()
+    env = dict(
+        os.environ,
+        NB_WORKERS=str(workers),
+        NB_WORKER_MODE=args.mode,
+        NB_PORT=str(port),
+        NB_HOST="127.0.0.1",
+        NB_GRAYLOG_HOST="127.0.0.1",
+        NB_GRAYLOG_PORT=str(graylog_port),
+        NB_GRAYLOG_PROTOCOL="udp",
+        NB_AUTH_TYPE="none",
+        NB_LOG_LEVEL="WARNING",
+        NB_MAX_IN_FLIGHT="0",
+        NB_LOOP_LAG_THRESHOLD_MS="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.main"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_ready(base_url)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=client_process,
+                args=(f"{base_url}/events", args.duration, args.concurrency, results),
+            )
+            for _ in range(args.clients)
+        ]
+        started = time.monotonic()
+        for client in clients:
+            client.start()
+        total = sum(results.get() for _ in clients)
+        for client in clients:
+            client.join()
+        return total / (time.monotonic() - started)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", choices=["prefork", "reuseport"], default="prefork")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    gelf_port = free_port(socket.SOCK_DGRAM)
+    sink_url = f"http://127.0.0.1:{free_port()}"
+    sink = start_sink(gelf_port, int(sink_url.rsplit(":", 1)[1]))
+
+    results = []
+    try:
+        for workers in args.workers:
+            httpx.post(f"{sink_url}/reset")
+            rate = run_one(workers, args, gelf_port)
+            delivered = httpx.get(f"{sink_url}/stats").json()
+            results.append(
+                {
+                    "workers": workers,
+                    "events_per_second": round(rate, 1),
+                    "gelf_received": delivered["received"],
+                    "gelf_decode_errors": delivered["decode_errors"],
+                }
+            )
+            print(
+                f"workers={workers:<3} {rate:10.1f} events/s "
+                f"({delivered['received']} GELF received, "
+                f"{delivered['decode_errors']} invalid)",
+                flush=True,
+            )
+    finally:
+        sink.terminate()
+        sink.wait(timeout=10)
+
+    base = results[0]["events_per_second"] or 1.0
+    print("\nworkers  events/s    speedup")
+    for row in results:
+        speedup = row["events_per_second"] / base
+        row["speedup"] = round(speedup, 2)
+        print(
+            f"{row['workers']:>7}  {row['events_per_second']:>8.1f}  {speedup:>8.2f}x"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Load generator for NB_Streamer with HDR-style latency percentiles.
+
+Sends NetBird webhook payloads to ``POST /events`` from one or more client
+processes, each running an asyncio loop, in one of two modes:
+
+* closed loop (default): ``--concurrency`` senders per process, each sending
+  its next request as soon as the previous one completes;
+* open loop (``--rate``): requests are scheduled at a fixed aggregate rate
+  with at most ``--concurrency`` in flight per process. Latency is measured
+  from the scheduled send time, so queueing behind a slow server is counted
+  instead of hidden (no coordinated omission).
+
+Payloads come from the benchmark corpus (``tests/benchmarks/corpus.py``)
+with a weighted tenant mix and size distribution; every request gets a
+unique event ID. With ``--archive``, the bodies of event archives or
+capture files (``src/utils/archive.py``) are sent instead, byte for byte
+and in order, cycling when exhausted. The report has throughput, error
+rate by cause and p50/p95/p99/p99.9/max latency from log-linear histograms
+merged across processes.
+
+Usage:
+    python scripts/loadgen.py --url http://127.0.0.1:8080 --duration 30 \\
+        --concurrency 32 --tenants acme:5,globex:1 --sizes small:90,medium:9,huge:1
+    python scripts/loadgen.py --rate 2000 --processes 4 --output run.json
+    python scripts/loadgen.py --rate 500 --archive captures/capture-*.ndjson.gz
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.utils.archive import ArchiveError, raw_body, read_archives  # noqa: E402
+from tests.benchmarks.corpus import load_seed_event, make_event  # noqa: E402
+
+PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+
+    Values (microseconds) below ``2**bits`` are counted exactly; larger
+    values go into ``2**(bits - 1)`` linear sub-buckets per power of two,
+    so any reported percentile is within ``2**(1 - bits)`` (0.8% for the
+    default 8 bits) of the true value, whatever the range.
+    """
+
+    def __init__(self, bits: int = 8):
+        self.bits = bits
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        self.sum = 0
+
+    def _bucket(self, value: int) -> Tuple[int, int]:
+        shift = max(value.bit_length() - self.bits, 0)
+        return shift, value >> shift
+
+    def record(self, seconds: float) -> None:
+        value = max(int(seconds * 1e6), 0)
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percentile: float) -> int:
+        """Highest value equivalent to the ``percentile``-th recorded latency."""
+        if not self.total:
+            return 0
+        target = max(1, round(percentile / 100 * self.total))
+        seen = 0
+        for shift, mantissa in sorted(self.counts):
+            seen += self.counts[(shift, mantissa)]
+            if seen >= target:
+                return min(((mantissa + 1) << shift) - 1, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        result = {
+            f"p{p:g}_ms": round(self.percentile(p) / 1000, 3) for p in PERCENTILES
+        }
+        result["min_ms"] = round((self.min or 0) / 1000, 3)
+        result["mean_ms"] = round(self.sum / self.total / 1000, 3) if self.total else 0
+        result["max_ms"] = round(self.max / 1000, 3)
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "bits": self.bits,
+            "counts": [[s, m, c] for (s, m), c in self.counts.items()],
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "sum": self.sum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls(data["bits"])
+        histogram.counts = Counter({(s, m): c for s, m, c in data["counts"]})
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        histogram.sum = data["sum"]
+        return histogram
+
+
+def parse_weights(spec: str) -> List[Tuple[str, float]]:
+    """``"a:3,b:1"`` -> ``[("a", 3.0), ("b", 1.0)]``; a bare name weighs 1."""
+    weights = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        weights.append((name, float(weight) if weight else 1.0))
+    return weights
+
+
+class PayloadFactory:
+    """Pre-serialized payload bodies with per-request tenant and event ID."""
+
+    def __init__(self, tenants, sizes, pool: int, seed: int):
+        self.rng = random.Random(seed)
+        self.tenants = [name for name, _ in tenants]
+        self.tenant_weights = [weight for _, weight in tenants]
+        self.sizes = [name for name, _ in sizes]
+        self.size_weights = [weight for _, weight in sizes]
+        base = load_seed_event()
+        self.bodies: Dict[str, List[bytes]] = {}
+        for size in self.sizes:
+            events = [make_event(base, size, i, self.rng) for i in range(pool)]
+            # Everything after the two per-request keys is serialized once
+            self.bodies[size] = [
+                json.dumps({k: v for k, v in e.items() if k != "ID"})[1:].encode()
+                for e in events
+            ]
+        self.sequence = 0
+        self.prefix = f"{seed:x}"
+
+    def next(self) -> bytes:
+        tenant = self.rng.choices(self.tenants, self.tenant_weights)[0]
+        size = self.rng.choices(self.sizes, self.size_weights)[0]
+        self.sequence += 1
+        head = json.dumps(
+            {"NB_Tenant": tenant, "ID": f"loadgen-{self.prefix}-{self.sequence}"}
+        )[:-1]
+        return head.encode() + b"," + self.rng.choice(self.bodies[size])
+
+
+class ArchivePayloads:
+    """Request bodies from archives, in order, each process at its own offset."""
+
+    def __init__(self, paths: Sequence[str], offset: int = 0):
+        self.bodies = []
+        for _, _, line in read_archives(paths):
+            try:
+                self.bodies.append(raw_body(line))
+            except ArchiveError:
+                continue
+        if not self.bodies:
+            raise SystemExit(f"No usable bodies in {', '.join(paths)}")
+        self.position = offset % len(self.bodies)
+
+    def next(self) -> bytes:
+        body = self.bodies[self.position]
+        self.position = (self.position + 1) % len(self.bodies)
+        return body
+
+
+class Recorder:
+    """Latency histogram and outcome counters for one process."""
+
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.histogram = LatencyHistogram()
+        self.outcomes: Counter = Counter()
+        self.bytes_sent = 0
+
+    def record(self, started: float, outcome: str, size: int) -> None:
+        if started < self.warmup_until:
+            return
+        self.histogram.record(time.perf_counter() - started)
+        self.outcomes[outcome] += 1
+        self.bytes_sent += size
+
+
+async def send(client, url, body, headers, recorder, started) -> None:
+    try:
+        response = await client.post(url, content=body, headers=headers)
+        outcome = str(response.status_code)
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    recorder.record(started, outcome, len(body))
+
+
+async def run_client(args: argparse.Namespace, index: int) -> Dict:
+    if args.archive:
+        factory = ArchivePayloads(args.archive, offset=index * 7919)
+    else:
+        factory = PayloadFactory(
+            parse_weights(args.tenants),
+            parse_weights(args.sizes),
+            pool=args.pool,
+            seed=args.seed + index,
+        )
+    url = f"{args.url.rstrip('/')}/events"
+    headers = {"Content-Type": "application/json"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    for header in args.header:
+        name, _, value = header.partition(":")
+        headers[name.strip()] = value.strip()
+
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    start = time.perf_counter()
+    deadline = start + args.warmup + args.duration
+    recorder = Recorder(warmup_until=start + args.warmup)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if args.rate:
+            # Open loop: this process's share of the rate, at fixed intervals
+            interval = args.processes / args.rate
+            in_flight = asyncio.Semaphore(args.concurrency)
+            tasks = set()
+
+            async def scheduled(body: bytes, intended: float) -> None:
+                async with in_flight:
+                    await send(client, url, body, headers, recorder, intended)
+
+            intended = start
+            while intended < deadline:
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = asyncio.create_task(scheduled(factory.next(), intended))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                intended += interval
+            if tasks:
+                await asyncio.gather(*tasks)
+        else:
+
+            async def sender() -> None:
+                while time.perf_counter() < deadline:
+                    body = factory.next()
+                    await send(
+                        client, url, body, headers, recorder, time.perf_counter()
+                    )
+
+            await asyncio.gather(*(sender() for _ in range(args.concurrency)))
+
+    return {
+        "histogram": recorder.histogram.to_dict(),
+        "outcomes": dict(recorder.outcomes),
+        "bytes_sent": recorder.bytes_sent,
+        "elapsed": time.perf_counter() - recorder.warmup_until,
+    }
+
+
+def client_process(args: argparse.Namespace, index: int, results) -> None:
+    results.put(asyncio.run(run_client(args, index)))
+
+
+def build_report(args: argparse.Namespace, parts: Sequence[Dict]) -> Dict:
+    histogram = LatencyHistogram()
+    outcomes: Counter = Counter()
+    for part in parts:
+        histogram.merge(LatencyHistogram.from_dict(part["histogram"]))
+        outcomes.update(part["outcomes"])
+    elapsed = max(part["elapsed"] for part in parts)
+    total = sum(outcomes.values())
+    ok = sum(count for outcome, count in outcomes.items() if outcome.startswith("2"))
+    return {
+        "mode": "open" if args.rate else "closed",
+        "target_rate": args.rate,
+        "processes": args.processes,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0,
+        "success_rps": round(ok / elapsed, 1) if elapsed else 0,
+        "throughput_mbps": round(
+            sum(part["bytes_sent"] for part in parts) / elapsed / 1e6, 3
+        ),
+        "error_rate": round(1 - ok / total, 5) if total else 0,
+        "outcomes": dict(sorted(outcomes.items())),
+        "latency": histogram.summary(),
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"mode={report['mode']} processes={report['processes']} "
+        f"concurrency={report['concurrency']} duration={report['duration_s']}s"
+    )
+    print(
+        f"requests    {report['requests']:>10}  "
+        f"({report['throughput_rps']} req/s, {report['success_rps']} ok/s, "
+        f"{report['throughput_mbps']} MB/s)"
+    )
+    print(f"error rate  {report['error_rate']:>10.3%}  {report['outcomes']}")
+    for name, value in report["latency"].items():
+        print(f"{name:<10} {value:>11.3f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds ignored")
+    parser.add_argument(
+        "--rate", type=float, help="open-loop target requests/s (all processes)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="in-flight requests per process"
+    )
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--tenants", default="loadgen", help="weighted, e.g. a:3,b:1")
+    parser.add_argument(
+        "--sizes", default="small:90,medium:9,huge:1", help="payload size mix"
+    )
+    parser.add_argument("--pool", type=int, default=20, help="payloads per size")
+    parser.add_argument(
+        "--archive",
+        nargs="+",
+        help="send bodies from these archives/captures instead of the corpus",
+    )
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--token", help="bearer token")
+    parser.add_argument(
+        "--header", action="append", default=[], help="extra 'Name: value'"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        parts = [asyncio.run(run_client(args, 0))]
+    else:
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(args, i, results))
+            for i in range(args.processes)
+        ]
+        for client in clients:
+            client.start()
+        parts = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+
+    report = build_report(args, parts)
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0 if report["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
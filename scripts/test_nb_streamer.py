@@ -9,17 +9,22 @@ import signal
 import os
 from multiprocessing import Process
 
+
 def start_server():
     """Start the NB_Streamer server."""
     print("Starting NB_Streamer server...")
-    os.system("cd /Users/legend/Documents/GitHub/NB_Streamer && source venv/bin/activate && python -m src.main &")
+    os.system(
+        "cd /Users/legend/Documents/GitHub/NB_Streamer && source venv/bin/activate && python -m src.main &"
+    )
     time.sleep(3)  # Give server time to start
 
+
 def stop_server():
     """Stop the NB_Streamer server."""
     print("Stopping NB_Streamer server...")
     os.system("pkill -f 'python -m src.main'")
 
+
 def test_health_endpoint():
     """Test the health check endpoint."""
     print("\\n=== Testing Health Endpoint ===")
@@ -37,10 +42,11 @@ def test_health_endpoint():
         print(f"❌ Health endpoint test failed: {e}")
         return False
 
+
 def test_events_endpoint():
     """Test the events endpoint with sample Netbird data."""
     print("\\n=== Testing Events Endpoint ===")
-    
+
     # Sample Netbird event data
     sample_events = [
         {
@@ -49,18 +55,15 @@ def test_events_endpoint():
                 "type": "peer_login",
                 "timestamp": "2024-01-31T14:30:00Z",
                 "user": "john.doe@example.com",
-                "peer": "peer-123-abc", 
+                "peer": "peer-123-abc",
                 "network": "my-netbird-network",
                 "action": "login",
                 "level": "info",
                 "message": "Peer connected successfully",
                 "id": "event-456-def",
                 "source": "netbird-management",
-                "metadata": {
-                    "ip_address": "10.0.0.5",
-                    "location": "New York, US"
-                }
-            }
+                "metadata": {"ip_address": "10.0.0.5", "location": "New York, US"},
+            },
         },
         {
             "name": "Network Activity Event",
@@ -69,13 +72,13 @@ def test_events_endpoint():
                 "timestamp": "2024-01-31T14:35:00Z",
                 "user": "jane.smith@example.com",
                 "peer": "peer-789-xyz",
-                "network": "my-netbird-network", 
+                "network": "my-netbird-network",
                 "action": "data_transfer",
                 "level": "debug",
                 "message": "Data transfer completed",
                 "bytes_transferred": 1024000,
-                "duration_ms": 250
-            }
+                "duration_ms": 250,
+            },
         },
         {
             "name": "Unknown Structure Event",
@@ -86,14 +89,11 @@ def test_events_endpoint():
                 "cpu_percent": 85.5,
                 "memory_percent": 78.2,
                 "unknown_field": "this should be captured",
-                "nested_data": {
-                    "component": "management-server",
-                    "version": "0.15.2"
-                }
-            }
-        }
+                "nested_data": {"component": "management-server", "version": "0.15.2"},
+            },
+        },
     ]
-    
+
     success_count = 0
     for i, event in enumerate(sample_events):
         try:
@@ -101,24 +101,25 @@ def test_events_endpoint():
             response = requests.post(
                 "http://localhost:8000/events",
                 json=event["data"],
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
             )
             print(f"Status: {response.status_code}")
             print(f"Response: {json.dumps(response.json(), indent=2)}")
-            
+
             assert response.status_code == 200
             data = response.json()
             assert data["status"] == "success"
             assert data["tenant_id"] == "development_tenant"
             print(f"✅ {event['name']} test passed")
             success_count += 1
-            
+
         except Exception as e:
             print(f"❌ {event['name']} test failed: {e}")
-    
+
     print(f"\\nEvents endpoint tests: {success_count}/{len(sample_events)} passed")
     return success_count == len(sample_events)
 
+
 def test_404_handler():
     """Test the 404 error handler."""
     print("\\n=== Testing 404 Handler ===")
@@ -136,6 +137,7 @@ def test_404_handler():
         print(f"❌ 404 handler test failed: {e}")
         return False
 
+
 def test_authentication_disabled():
     """Test that authentication is disabled in development mode."""
     print("\\n=== Testing Authentication (Disabled) ===")
@@ -144,7 +146,7 @@ def test_authentication_disabled():
         response = requests.post(
             "http://localhost:8000/events",
             json={"test": "event"},
-            headers={"Content-Type": "application/json"}
+            headers={"Content-Type": "application/json"},
         )
         print(f"Status: {response.status_code}")
         assert response.status_code == 200
@@ -154,43 +156,47 @@ def test_authentication_disabled():
         print(f"❌ Authentication disabled test failed: {e}")
         return False
 
+
 def main():
     """Run all tests."""
     print("🚀 Starting NB_Streamer Phase 1 Tests")
-    
+
     start_server()
-    
+
     try:
         # Run all tests
         tests = [
             test_health_endpoint,
             test_events_endpoint,
             test_404_handler,
-            test_authentication_disabled
+            test_authentication_disabled,
         ]
-        
+
         passed = 0
         for test in tests:
             if test():
                 passed += 1
             time.sleep(1)  # Brief pause between tests
-        
+
         print(f"\\n🎯 Test Results: {passed}/{len(tests)} tests passed")
-        
+
         if passed == len(tests):
-            print("\\n🎉 All tests passed! Phase 1 implementation is working correctly.")
+            print(
+                "\\n🎉 All tests passed! Phase 1 implementation is working correctly."
+            )
             print("\\nKey features validated:")
             print("- ✅ Health check endpoint")
             print("- ✅ Events endpoint with flexible JSON parsing")
-            print("- ✅ GELF transformation with tenant support") 
+            print("- ✅ GELF transformation with tenant support")
             print("- ✅ Proper error handling")
             print("- ✅ Authentication disabled for development")
             print("- ✅ Field discovery and logging for unknown structures")
         else:
             print("\\n⚠️ Some tests failed. Review the output above.")
-            
+
     finally:
         stop_server()
 
+
 if __name__ == "__main__":
     main()
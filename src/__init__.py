@@ -1 +1,6 @@
+import time
+
 __version__ = "0.5.1"
+
+# Reference point for the import time reported under "startup" in /stats
+IMPORT_STARTED = time.perf_counter()
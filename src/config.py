@@ -17,6 +17,9 @@ class Config(BaseSettings):
     nb_host: str = Field(default="0.0.0.0")
     nb_port: int = Field(default=8080)
     nb_debug: bool = Field(default=False)
+    nb_workers: int = Field(default=1, ge=1)
+    nb_worker_mode: Literal["prefork", "reuseport"] = Field(default="prefork")
+    nb_shared_tenant_slots: int = Field(default=4096, ge=1)
 
     # Graylog Configuration
     nb_graylog_host: str = Field(default="localhost")
@@ -30,16 +33,99 @@ class Config(BaseSettings):
     nb_auth_password: Optional[str] = Field(default=None)
     nb_auth_header_name: Optional[str] = Field(default=None)
     nb_auth_header_value: Optional[str] = Field(default=None)
+    nb_admin_token: Optional[str] = Field(default=None)
 
     # Message Configuration
     nb_compression_enabled: bool = Field(default=True)
+    nb_compression_threads: int = Field(default=2, ge=0)
+    nb_compression_offload_min_bytes: int = Field(default=16384, ge=0)
     nb_max_message_size: int = Field(default=8192)
 
     # Logging Configuration
     nb_log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = Field(default="INFO")
 
+    # Statistics Configuration
+    nb_stats_max_tenants: int = Field(default=1000, ge=1)
+    nb_stats_sketch_capacity: int = Field(default=200, ge=1)
+    nb_stats_top_k: int = Field(default=20, ge=1)
+
+    # Profiler Configuration
+    nb_profiler_max_seconds: float = Field(default=60.0, gt=0)
+    nb_profiler_interval_ms: float = Field(default=10.0, gt=0)
+    nb_profiler_background_enabled: bool = Field(default=False)
+    nb_profiler_background_interval_ms: float = Field(default=1000.0, gt=0)
+    nb_profiler_background_window_seconds: float = Field(default=60.0, gt=0)
+    nb_profiler_background_windows: int = Field(default=10, ge=1)
+
+    # Slow Event Capture Configuration
+    nb_slow_event_threshold_ms: float = Field(default=250.0, ge=0)
+    nb_slow_event_ring_size: int = Field(default=100, ge=1)
+    nb_slow_event_payload_bytes: int = Field(default=2048, ge=0)
+
+    # Rate Limiting Configuration (0 disables a limit)
+    nb_rate_limit_enabled: bool = Field(default=False)
+    nb_rate_limit_burst_seconds: float = Field(default=1.0, gt=0)
+    nb_rate_limit_global_events_per_second: float = Field(default=0.0, ge=0)
+    nb_rate_limit_global_bytes_per_second: float = Field(default=0.0, ge=0)
+    nb_rate_limit_tenant_events_per_second: float = Field(default=0.0, ge=0)
+    nb_rate_limit_tenant_bytes_per_second: float = Field(default=0.0, ge=0)
+    nb_rate_limit_overrides: Optional[str] = Field(default=None)
+
+    # Admission Control Configuration (0 disables a limit)
+    nb_max_in_flight: int = Field(default=512, ge=0)
+    nb_loop_lag_probe_interval_ms: float = Field(default=100.0, gt=0)
+    nb_loop_lag_threshold_ms: float = Field(default=250.0, ge=0)
+    nb_shed_keep_level: Optional[int] = Field(default=None, ge=0, le=7)
+    nb_shed_retry_after_seconds: int = Field(default=1, ge=1)
+
+    # Filtering Rules Configuration
+    nb_rules_file: Optional[str] = Field(default=None)
+    nb_projection_file: Optional[str] = Field(default=None)
+    nb_plan_cache_size: int = Field(default=256, ge=0)
+
+    # Deduplication Configuration
+    nb_dedup_enabled: bool = Field(default=False)
+    nb_dedup_backend: Literal["ttl", "bloom"] = Field(default="ttl")
+    nb_dedup_ttl_seconds: float = Field(default=300.0, gt=0)
+    nb_dedup_max_entries: int = Field(default=100000, ge=1)
+    nb_dedup_error_rate: float = Field(default=0.001, gt=0, lt=1)
+
+    # Aggregation Configuration
+    nb_aggregate_enabled: bool = Field(default=False)
+    nb_aggregate_window_seconds: float = Field(default=10.0, gt=0)
+    nb_aggregate_fields: Optional[str] = Field(default=None)
+    nb_aggregate_match: Optional[str] = Field(default=None)
+    nb_aggregate_max_groups: int = Field(default=10000, ge=1)
+    nb_aggregate_sample_ids: int = Field(default=5, ge=0)
+
+    # Transform Offload Configuration
+    nb_offload_enabled: bool = Field(default=False)
+    nb_offload_workers: int = Field(default=2, ge=1)
+    nb_offload_min_bytes: int = Field(default=65536, ge=0)
+    nb_offload_min_fields: int = Field(default=500, ge=0)
+
+    # Request Capture Configuration
+    nb_capture_enabled: bool = Field(default=False)
+    nb_capture_dir: str = Field(default="captures")
+    nb_capture_tenants: Optional[str] = Field(default=None)
+    nb_capture_sample_rate: float = Field(default=1.0, gt=0, le=1)
+    nb_capture_queue_size: int = Field(default=10000, ge=1)
+    nb_capture_rotate_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+    nb_capture_rotate_seconds: float = Field(default=3600.0, ge=0)
+    nb_capture_flush_seconds: float = Field(default=1.0, gt=0)
+
+    # Output Sink Configuration
+    nb_sinks_file: Optional[str] = Field(default=None)
+    nb_sinks_drain_seconds: float = Field(default=5.0, ge=0)
+
+    # Readiness Configuration
+    nb_ready_probe_transport: bool = Field(default=True)
+    nb_ready_probe_timeout: float = Field(default=2.0, gt=0)
+    nb_ready_retry_seconds: float = Field(default=5.0, gt=0)
+
     class Config:
         """Pydantic configuration."""
+
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
@@ -57,6 +143,18 @@ class Config(BaseSettings):
     def debug(self) -> bool:
         return self.nb_debug
 
+    @property
+    def workers(self) -> int:
+        return self.nb_workers
+
+    @property
+    def worker_mode(self) -> str:
+        return self.nb_worker_mode
+
+    @property
+    def shared_tenant_slots(self) -> int:
+        return self.nb_shared_tenant_slots
+
     @property
     def graylog_host(self) -> str:
         return self.nb_graylog_host
@@ -93,10 +191,22 @@ class Config(BaseSettings):
     def auth_header_value(self) -> Optional[str]:
         return self.nb_auth_header_value
 
+    @property
+    def admin_token(self) -> Optional[str]:
+        return self.nb_admin_token
+
     @property
     def compression_enabled(self) -> bool:
         return self.nb_compression_enabled
 
+    @property
+    def compression_threads(self) -> int:
+        return self.nb_compression_threads
+
+    @property
+    def compression_offload_min_bytes(self) -> int:
+        return self.nb_compression_offload_min_bytes
+
     @property
     def max_message_size(self) -> int:
         return self.nb_max_message_size
@@ -105,6 +215,226 @@ class Config(BaseSettings):
     def log_level(self) -> str:
         return self.nb_log_level
 
+    @property
+    def stats_max_tenants(self) -> int:
+        return self.nb_stats_max_tenants
+
+    @property
+    def stats_sketch_capacity(self) -> int:
+        return self.nb_stats_sketch_capacity
+
+    @property
+    def stats_top_k(self) -> int:
+        return self.nb_stats_top_k
+
+    @property
+    def profiler_max_seconds(self) -> float:
+        return self.nb_profiler_max_seconds
+
+    @property
+    def profiler_interval_ms(self) -> float:
+        return self.nb_profiler_interval_ms
+
+    @property
+    def profiler_background_enabled(self) -> bool:
+        return self.nb_profiler_background_enabled
+
+    @property
+    def profiler_background_interval_ms(self) -> float:
+        return self.nb_profiler_background_interval_ms
+
+    @property
+    def profiler_background_window_seconds(self) -> float:
+        return self.nb_profiler_background_window_seconds
+
+    @property
+    def profiler_background_windows(self) -> int:
+        return self.nb_profiler_background_windows
+
+    @property
+    def slow_event_threshold_ms(self) -> float:
+        return self.nb_slow_event_threshold_ms
+
+    @property
+    def slow_event_ring_size(self) -> int:
+        return self.nb_slow_event_ring_size
+
+    @property
+    def slow_event_payload_bytes(self) -> int:
+        return self.nb_slow_event_payload_bytes
+
+    @property
+    def rate_limit_enabled(self) -> bool:
+        return self.nb_rate_limit_enabled
+
+    @property
+    def rate_limit_burst_seconds(self) -> float:
+        return self.nb_rate_limit_burst_seconds
+
+    @property
+    def rate_limit_global_events_per_second(self) -> float:
+        return self.nb_rate_limit_global_events_per_second
+
+    @property
+    def rate_limit_global_bytes_per_second(self) -> float:
+        return self.nb_rate_limit_global_bytes_per_second
+
+    @property
+    def rate_limit_tenant_events_per_second(self) -> float:
+        return self.nb_rate_limit_tenant_events_per_second
+
+    @property
+    def rate_limit_tenant_bytes_per_second(self) -> float:
+        return self.nb_rate_limit_tenant_bytes_per_second
+
+    @property
+    def rate_limit_overrides(self) -> Optional[str]:
+        return self.nb_rate_limit_overrides
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.nb_max_in_flight
+
+    @property
+    def loop_lag_probe_interval_ms(self) -> float:
+        return self.nb_loop_lag_probe_interval_ms
+
+    @property
+    def loop_lag_threshold_ms(self) -> float:
+        return self.nb_loop_lag_threshold_ms
+
+    @property
+    def shed_keep_level(self) -> Optional[int]:
+        return self.nb_shed_keep_level
+
+    @property
+    def shed_retry_after_seconds(self) -> int:
+        return self.nb_shed_retry_after_seconds
+
+    @property
+    def rules_file(self) -> Optional[str]:
+        return self.nb_rules_file
+
+    @property
+    def projection_file(self) -> Optional[str]:
+        return self.nb_projection_file
+
+    @property
+    def plan_cache_size(self) -> int:
+        return self.nb_plan_cache_size
+
+    @property
+    def dedup_enabled(self) -> bool:
+        return self.nb_dedup_enabled
+
+    @property
+    def dedup_backend(self) -> str:
+        return self.nb_dedup_backend
+
+    @property
+    def dedup_ttl_seconds(self) -> float:
+        return self.nb_dedup_ttl_seconds
+
+    @property
+    def dedup_max_entries(self) -> int:
+        return self.nb_dedup_max_entries
+
+    @property
+    def dedup_error_rate(self) -> float:
+        return self.nb_dedup_error_rate
+
+    @property
+    def aggregate_enabled(self) -> bool:
+        return self.nb_aggregate_enabled
+
+    @property
+    def aggregate_window_seconds(self) -> float:
+        return self.nb_aggregate_window_seconds
+
+    @property
+    def aggregate_fields(self) -> Optional[str]:
+        return self.nb_aggregate_fields
+
+    @property
+    def aggregate_match(self) -> Optional[str]:
+        return self.nb_aggregate_match
+
+    @property
+    def aggregate_max_groups(self) -> int:
+        return self.nb_aggregate_max_groups
+
+    @property
+    def aggregate_sample_ids(self) -> int:
+        return self.nb_aggregate_sample_ids
+
+    @property
+    def offload_enabled(self) -> bool:
+        return self.nb_offload_enabled
+
+    @property
+    def offload_workers(self) -> int:
+        return self.nb_offload_workers
+
+    @property
+    def offload_min_bytes(self) -> int:
+        return self.nb_offload_min_bytes
+
+    @property
+    def offload_min_fields(self) -> int:
+        return self.nb_offload_min_fields
+
+    @property
+    def capture_enabled(self) -> bool:
+        return self.nb_capture_enabled
+
+    @property
+    def capture_dir(self) -> str:
+        return self.nb_capture_dir
+
+    @property
+    def capture_tenants(self) -> Optional[str]:
+        return self.nb_capture_tenants
+
+    @property
+    def capture_sample_rate(self) -> float:
+        return self.nb_capture_sample_rate
+
+    @property
+    def capture_queue_size(self) -> int:
+        return self.nb_capture_queue_size
+
+    @property
+    def capture_rotate_bytes(self) -> int:
+        return self.nb_capture_rotate_bytes
+
+    @property
+    def capture_rotate_seconds(self) -> float:
+        return self.nb_capture_rotate_seconds
+
+    @property
+    def capture_flush_seconds(self) -> float:
+        return self.nb_capture_flush_seconds
+
+    @property
+    def sinks_file(self) -> Optional[str]:
+        return self.nb_sinks_file
+
+    @property
+    def sinks_drain_seconds(self) -> float:
+        return self.nb_sinks_drain_seconds
+
+    @property
+    def ready_probe_transport(self) -> bool:
+        return self.nb_ready_probe_transport
+
+    @property
+    def ready_probe_timeout(self) -> float:
+        return self.nb_ready_probe_timeout
+
+    @property
+    def ready_retry_seconds(self) -> float:
+        return self.nb_ready_retry_seconds
+
     def validate_tenant_format(self, tenant: str) -> bool:
         """Validate tenant name format (alphanumeric, hyphens, underscores only)."""
         if not tenant:
@@ -117,10 +447,18 @@ class Config(BaseSettings):
         # Validate authentication configuration
         if self.auth_type == "bearer" and not self.auth_token:
             raise ValueError("Bearer token is required when auth_type is bearer")
-        if self.auth_type == "basic" and (not self.auth_username or not self.auth_password):
-            raise ValueError("Username and password are required when auth_type is basic")
-        if self.auth_type == "header" and (not self.auth_header_name or not self.auth_header_value):
-            raise ValueError("Header name and value are required when auth_type is header")
+        if self.auth_type == "basic" and (
+            not self.auth_username or not self.auth_password
+        ):
+            raise ValueError(
+                "Username and password are required when auth_type is basic"
+            )
+        if self.auth_type == "header" and (
+            not self.auth_header_name or not self.auth_header_value
+        ):
+            raise ValueError(
+                "Header name and value are required when auth_type is header"
+            )
 
         logger.info("NB_Streamer configured in simplified single-endpoint mode")
         logger.info("Tenant identification via NB_Tenant field in event payload")
@@ -128,25 +466,39 @@ class Config(BaseSettings):
     # Field validators
     @field_validator("nb_auth_token")
     @classmethod
-    def validate_auth_token(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
-        if hasattr(info, 'data') and info.data.get("nb_auth_type") == "bearer" and not v:
+    def validate_auth_token(
+        cls, v: Optional[str], info: ValidationInfo
+    ) -> Optional[str]:
+        if (
+            hasattr(info, "data")
+            and info.data.get("nb_auth_type") == "bearer"
+            and not v
+        ):
             raise ValueError("Bearer token is required when auth_type is bearer")
         return v
 
     @field_validator("nb_auth_username", "nb_auth_password")
     @classmethod
-    def validate_basic_auth(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
-        if hasattr(info, 'data') and info.data.get("nb_auth_type") == "basic":
+    def validate_basic_auth(
+        cls, v: Optional[str], info: ValidationInfo
+    ) -> Optional[str]:
+        if hasattr(info, "data") and info.data.get("nb_auth_type") == "basic":
             if not v:
-                raise ValueError("Username and password are required when auth_type is basic")
+                raise ValueError(
+                    "Username and password are required when auth_type is basic"
+                )
         return v
 
     @field_validator("nb_auth_header_name", "nb_auth_header_value")
     @classmethod
-    def validate_header_auth(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
-        if hasattr(info, 'data') and info.data.get("nb_auth_type") == "header":
+    def validate_header_auth(
+        cls, v: Optional[str], info: ValidationInfo
+    ) -> Optional[str]:
+        if hasattr(info, "data") and info.data.get("nb_auth_type") == "header":
             if not v:
-                raise ValueError("Header name and value are required when auth_type is header")
+                raise ValueError(
+                    "Header name and value are required when auth_type is header"
+                )
         return v
 
 
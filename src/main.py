@@ -1,18 +1,52 @@
 """Main application module for NB_Streamer."""
 
+import asyncio
 import json
 import logging
+import os
 import sys
+import time
 from contextlib import asynccontextmanager
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
-import uvicorn
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from . import IMPORT_STARTED
 from .config import config
+from .models.gelf import SerializedGELFMessage, syslog_level
+from .services.admission import (
+    ADMIT_PRIORITY_ONLY,
+    SHED,
+    AdmissionController,
+    LoopLagMonitor,
+)
+from .services.aggregator import aggregator_from_config
 from .services.auth import AuthService
+from .services.capture import capture_writer_from_config
+from .services.dedup import deduplicator_from_config
 from .services.graylog import GraylogService as GraylogForwarder
+from .services.offload import TransformDispatcher
+from .services.profiler import RollingStackSampler, StackSampler
+from .services.ratelimit import (
+    RateLimiter,
+    RateLimitSettings,
+    retry_after_header,
+    settings_from_config,
+)
+from .services.readiness import (
+    StartupReadiness,
+    check_json_codec,
+    probe_transport,
+    warm_models,
+    warm_regexes,
+)
+from .services.rules import rules_from_config
+from .services.shared_state import SharedState
+from .services.sinks import sinks_from_config
+from .services.slowlog import SlowEventRing, StageTimer
+from .services.tenants import TenantRegistry
 from .services.transformer import TransformerService as EventTransformer
 
 # Version information
@@ -30,13 +64,58 @@ logger = logging.getLogger(__name__)
 auth_service = AuthService()
 graylog_forwarder = GraylogForwarder()
 transformer = EventTransformer()
+event_rules = rules_from_config(config)
+deduplicator = deduplicator_from_config(config)
+aggregator = aggregator_from_config(config)
+capture_writer = capture_writer_from_config(config)
+sink_router = sinks_from_config(config)
+transform_dispatcher = TransformDispatcher(
+    transformer,
+    enabled=config.offload_enabled,
+    workers=config.offload_workers,
+    min_bytes=config.offload_min_bytes,
+    min_fields=config.offload_min_fields,
+)
+tenant_registry = TenantRegistry(
+    max_tenants=config.stats_max_tenants,
+    sketch_capacity=config.stats_sketch_capacity,
+)
+rate_limiter = RateLimiter(settings_from_config(config))
+loop_lag_monitor = LoopLagMonitor(interval=config.loop_lag_probe_interval_ms / 1000)
+admission = AdmissionController(
+    lag_monitor=loop_lag_monitor,
+    max_in_flight=config.max_in_flight,
+    lag_threshold_ms=config.loop_lag_threshold_ms,
+    keep_level=config.shed_keep_level,
+)
+background_profiler = RollingStackSampler(
+    interval=config.profiler_background_interval_ms / 1000,
+    window_seconds=config.profiler_background_window_seconds,
+    windows=config.profiler_background_windows,
+)
+profile_lock = asyncio.Lock()
+slow_events = SlowEventRing(
+    capacity=config.slow_event_ring_size,
+    threshold_ms=config.slow_event_threshold_ms,
+    payload_bytes=config.slow_event_payload_bytes,
+)
+readiness = StartupReadiness(
+    import_seconds=time.perf_counter() - IMPORT_STARTED,
+    retry_seconds=config.ready_retry_seconds,
+)
+
+# Set in each worker when running with NB_WORKERS > 1 (see server.serve)
+shared_state: Optional[SharedState] = None
+worker_index = 0
 
 # Statistics tracking
 stats = {
     "total_events_received": 0,
     "total_events_forwarded": 0,
     "total_events_failed": 0,
-    "events_by_tenant": {},
+    "total_events_rate_limited": 0,
+    "total_events_deduplicated": 0,
+    "total_events_filtered": 0,
     "events_by_level": {},
     "last_event_time": None,
     "service_start_time": None,
@@ -48,22 +127,46 @@ stats = {
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info(f"Starting NB_Streamer v{__version__}")
-    
+
     # Validate configuration
     try:
         config.validate_startup_configuration()
     except Exception as e:
         logger.error(f"Configuration validation failed: {e}")
         sys.exit(1)
-    
-    logger.info(f"Config: graylog_host={config.graylog_host}, port={config.port}, auth_type={config.auth_type}")
-    
+
+    logger.info(
+        f"Config: graylog_host={config.graylog_host}, port={config.port}, auth_type={config.auth_type}"
+    )
+
     # Initialize statistics
     from datetime import datetime, timezone
+
     stats["service_start_time"] = datetime.now(timezone.utc).isoformat()
-    
+
+    if config.profiler_background_enabled:
+        background_profiler.start()
+        logger.info("Background stack sampler enabled")
+
+    loop_lag_monitor.start()
+    transform_dispatcher.start()
+    aggregator.start(emit_aggregated)
+    capture_writer.start()
+    sink_router.start()
+
+    readiness.start(readiness_steps())
+
     yield
 
+    await readiness.stop()
+    await aggregator.stop()
+    await capture_writer.stop()
+    await sink_router.stop()
+    transform_dispatcher.stop()
+    graylog_forwarder.shutdown()
+    await loop_lag_monitor.stop()
+    background_profiler.stop()
+
 
 app = FastAPI(
     title="NB_Streamer",
@@ -82,33 +185,61 @@ app.add_middleware(
 )
 
 
-def update_statistics(tenant: str, level: str, success: bool) -> None:
-    """Update application statistics."""
+def readiness_steps() -> list:
+    """Warm-up steps that must pass before /ready reports ready."""
+    steps = [
+        ("models", warm_models),
+        ("regexes", warm_regexes),
+        ("json_codec", check_json_codec),
+    ]
+    if config.ready_probe_transport:
+        steps.append(
+            (
+                "transport",
+                lambda: probe_transport(
+                    config.graylog_protocol,
+                    config.graylog_host,
+                    config.graylog_port,
+                    config.ready_probe_timeout,
+                ),
+            )
+        )
+    return steps
+
+
+def service_unavailable(reason: str) -> HTTPException:
+    """Build the 503 returned when load is being shed."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={
+            "code": "OVERLOADED",
+            "message": "NB_Streamer is shedding load, retry later",
+            "details": {"reason": reason},
+        },
+        headers={"Retry-After": str(config.shed_retry_after_seconds)},
+    )
+
+
+def update_statistics(tenant: str, level: str, success: bool, count: int = 1) -> None:
+    """Update application statistics for ``count`` events sharing one outcome."""
     from datetime import datetime, timezone
-    
-    stats["total_events_received"] += 1
+
+    stats["total_events_received"] += count
     stats["last_event_time"] = datetime.now(timezone.utc).isoformat()
-    
-    if success:
-        stats["total_events_forwarded"] += 1
-    else:
-        stats["total_events_failed"] += 1
-    
-    # Track by tenant
-    if tenant not in stats["events_by_tenant"]:
-        stats["events_by_tenant"][tenant] = {"received": 0, "forwarded": 0, "failed": 0}
-    
-    stats["events_by_tenant"][tenant]["received"] += 1
+
     if success:
-        stats["events_by_tenant"][tenant]["forwarded"] += 1
+        stats["total_events_forwarded"] += count
     else:
-        stats["events_by_tenant"][tenant]["failed"] += 1
-    
+        stats["total_events_failed"] += count
+
+    # Track by tenant (bounded; the long tail goes to a heavy-hitters sketch)
+    tenant_registry.record(tenant, success, count)
+
     # Track by level
     if level not in stats["events_by_level"]:
         stats["events_by_level"][level] = 0
-    stats["events_by_level"][level] += 1
-    
+    stats["events_by_level"][level] += count
+
     # Calculate success rate
     total = stats["total_events_received"]
     if total > 0:
@@ -116,17 +247,104 @@ def update_statistics(tenant: str, level: str, success: bool) -> None:
     else:
         stats["success_rate"] = 0.0
 
+    if shared_state is not None:
+        shared_state.record_event(int(level) if level.isdigit() else 6, success, count)
+
+
+async def emit_aggregated(
+    tenant: str, event_data: Dict[str, Any], summary_fields: Dict[str, Any]
+) -> bool:
+    """
+    Transform and forward the first event of an aggregation group.
+
+    Statistics count every event in the group, not the one summary message.
+    """
+    message = await transformer.transform_event(event_data, tenant)
+    message.custom_fields.update(summary_fields)
+    message = publish_to_sinks(tenant, message)
+    success = await graylog_forwarder.forward_event(message)
+    update_statistics(
+        tenant,
+        str(getattr(message, "level", 6)),
+        success,
+        summary_fields.get("_NB_count", 1),
+    )
+    return success
+
+
+def publish_to_sinks(tenant: str, message: Any) -> Any:
+    """Serialize once and queue the bytes on every sink; Graylog reuses them."""
+    if not sink_router.enabled:
+        return message
+    if not isinstance(message, SerializedGELFMessage):
+        message = SerializedGELFMessage(
+            message.level, graylog_forwarder.encoder.encode(message)
+        )
+    sink_router.publish(tenant, message.level, message.payload)
+    return message
+
+
+def init_worker(shared: SharedState, index: int) -> None:
+    """Prepare a forked worker: own Graylog transport, shared counters and limits."""
+    global graylog_forwarder, shared_state, worker_index
+    graylog_forwarder = GraylogForwarder()
+    shared_state = shared
+    worker_index = index
+    rate_limiter.attach(shared)
+    deduplicator.attach(shared.dedup_buffer(), shared.lock)
+    logger.info(f"Worker {index} started (pid {os.getpid()})")
+
+
+def global_statistics() -> Dict[str, Any]:
+    """Totals summed over all workers from the shared state segment."""
+    from datetime import datetime, timezone
+
+    counters = shared_state.counters()
+    received = counters["received"]
+    last_event = shared_state.last_event_time()
+    return {
+        "total_events_received": received,
+        "total_events_forwarded": counters["forwarded"],
+        "total_events_failed": counters["failed"],
+        "total_events_rate_limited": counters["rate_limited"],
+        "total_events_deduplicated": counters["deduplicated"],
+        "events_by_level": {
+            str(level): counters[f"level_{level}"]
+            for level in range(8)
+            if counters[f"level_{level}"]
+        },
+        "last_event_time": (
+            datetime.fromtimestamp(last_event, timezone.utc).isoformat()
+            if last_event
+            else None
+        ),
+        "success_rate": counters["forwarded"] / received if received else 0.0,
+    }
+
+
+async def read_request_body(request: Request) -> Tuple[bytes, int]:
+    """Read the full request body, returning it with the number of chunks received."""
+    chunks = []
+    async for chunk in request.stream():
+        if chunk:
+            chunks.append(chunk)
+    return b"".join(chunks), len(chunks)
+
 
 def extract_request_context(request: Request) -> Dict[str, Any]:
     """Extract context information from request."""
     # Get client IP (handle proxy headers)
-    client_ip = request.headers.get("x-forwarded-for", request.client.host if request.client else "unknown")
+    client_ip = request.headers.get(
+        "x-forwarded-for", request.client.host if request.client else "unknown"
+    )
     if "," in client_ip:
         client_ip = client_ip.split(",")[0].strip()
-    
+
     # Detect protocol
-    protocol = "https" if request.headers.get("x-forwarded-proto") == "https" else "http"
-    
+    protocol = (
+        "https" if request.headers.get("x-forwarded-proto") == "https" else "http"
+    )
+
     return {
         "method": request.method,
         "path": str(request.url.path),
@@ -143,7 +361,32 @@ async def health_check():
         "status": "healthy",
         "service": "nb_streamer",
         "version": __version__,
-        "message": "Simplified single-endpoint architecture"
+        "message": "Simplified single-endpoint architecture",
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until startup warm-up has finished."""
+    if not readiness.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "code": "NOT_READY",
+                "message": (
+                    "NB_Streamer is shutting down"
+                    if readiness.draining
+                    else "NB_Streamer is still warming up"
+                ),
+                "details": {"pending": readiness.pending_steps()},
+            },
+            headers={"Retry-After": str(max(1, round(config.ready_retry_seconds)))},
+        )
+    return {
+        "status": "ready",
+        "service": "nb_streamer",
+        "version": __version__,
+        "startup_seconds": readiness.startup_seconds,
     }
 
 
@@ -151,42 +394,182 @@ async def health_check():
 async def get_statistics():
     """Get application statistics."""
     from datetime import datetime, timezone
+
     current_stats = stats.copy()
+    current_stats["events_by_tenant"] = tenant_registry.exact_counts()
+    current_stats["top_tenants"] = tenant_registry.top_tenants(config.stats_top_k)
+    current_stats["tenant_overflow"] = tenant_registry.overflow_summary()
+    current_stats["slow_events"] = slow_events.summary()
+    current_stats["rate_limiting"] = rate_limiter.summary()
+    current_stats["filtering"] = event_rules.summary()
+    current_stats["projection"] = transformer.projections.summary()
+    current_stats["plan_cache"] = (
+        transformer.plan_cache.summary()
+        if transformer.plan_cache is not None
+        else {"enabled": False}
+    )
+    current_stats["deduplication"] = deduplicator.summary()
+    current_stats["admission"] = admission.summary()
+    current_stats["aggregation"] = aggregator.summary()
+    current_stats["capture"] = capture_writer.summary()
+    current_stats["sinks"] = sink_router.summary()
+    current_stats["transform_offload"] = transform_dispatcher.summary()
+    current_stats["compression"] = graylog_forwarder.compression_summary()
+    current_stats["serializer"] = graylog_forwarder.encoder.summary()
+    current_stats["startup"] = readiness.summary()
+    if shared_state is not None:
+        # Totals are global; tenant, admission and slow-event data are per worker
+        current_stats.update(global_statistics())
+        current_stats["worker"] = {
+            "index": worker_index,
+            "pid": os.getpid(),
+            "workers": config.workers,
+            "mode": config.worker_mode,
+            "shared_state": shared_state.summary(),
+        }
     current_stats["current_time"] = datetime.now(timezone.utc).isoformat()
-    
+
     # Calculate uptime if service_start_time exists
     if current_stats["service_start_time"]:
-        start_time = datetime.fromisoformat(current_stats["service_start_time"].replace("Z", "+00:00"))
+        start_time = datetime.fromisoformat(
+            current_stats["service_start_time"].replace("Z", "+00:00")
+        )
         current_time = datetime.now(timezone.utc)
         uptime = (current_time - start_time).total_seconds()
         current_stats["uptime_seconds"] = uptime
-    
+
     return {"status": "success", "statistics": current_stats}
 
 
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def profile_process(
+    request: Request, seconds: float = 5.0, interval_ms: Optional[float] = None
+):
+    """Sample all threads for a number of seconds and return collapsed stacks."""
+    await auth_service.authenticate_admin(request)
+
+    if not 0 < seconds <= config.profiler_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be in (0, {config.profiler_max_seconds}]",
+        )
+    interval_ms = interval_ms or config.profiler_interval_ms
+    if interval_ms <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="interval_ms must be positive",
+        )
+    if profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running",
+        )
+
+    async with profile_lock:
+        sampler = StackSampler(interval=interval_ms / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
+
+
+@app.get("/debug/profile/rolling", response_class=PlainTextResponse)
+async def profile_rolling(request: Request):
+    """Return the always-on sampler's rolling aggregate as collapsed stacks."""
+    await auth_service.authenticate_admin(request)
+
+    if not background_profiler.running:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Background profiler is disabled (NB_PROFILER_BACKGROUND_ENABLED)",
+        )
+
+    summary = background_profiler.summary()
+    return PlainTextResponse(
+        background_profiler.collapsed(),
+        headers={"X-Profile-Samples": str(summary["samples"])},
+    )
+
+
+@app.get("/debug/slow")
+async def get_slow_events(request: Request):
+    """Return the slowest recent events with their per-stage timing breakdown."""
+    await auth_service.authenticate_admin(request)
+    return {
+        "status": "success",
+        **slow_events.summary(),
+        "events": slow_events.snapshot(),
+    }
+
+
+@app.get("/admin/rate-limits")
+async def get_rate_limits(request: Request):
+    """Return the active rate limit settings."""
+    await auth_service.authenticate_admin(request)
+    return {"status": "success", "settings": rate_limiter.settings.model_dump()}
+
+
+@app.put("/admin/rate-limits")
+async def put_rate_limits(request: Request, settings: RateLimitSettings):
+    """Hot-swap the rate limit settings without a restart."""
+    await auth_service.authenticate_admin(request)
+    settings.overrides = {
+        tenant.lower(): policy for tenant, policy in settings.overrides.items()
+    }
+    rate_limiter.configure(settings)
+    return {"status": "success", "settings": rate_limiter.settings.model_dump()}
+
+
 @app.post("/events")
 async def process_events(request: Request):
     """Process NetBird events with tenant identification via NB_Tenant field."""
+    # Admission control runs before anything else, so shedding stays cheap
+    admission_decision = admission.try_enter()
+    if admission_decision == SHED:
+        raise service_unavailable("overloaded")
+
+    received_at = time.time()
+    timer = StageTimer()
+    tenant = None
+    raw_body = b""
+    chunk_count = 0
+    status_code = status.HTTP_200_OK
     try:
         # Authenticate request
-        await auth_service.authenticate(request)
-        
+        with timer.stage("auth"):
+            await auth_service.authenticate(request)
+
         # Parse request body
         try:
-            raw_body = await request.body()
+            with timer.stage("body_read"):
+                raw_body, chunk_count = await read_request_body(request)
 
-            event_data = json.loads(raw_body)
+            with timer.stage("json_loads"):
+                event_data = json.loads(raw_body)
         except json.JSONDecodeError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid JSON: {str(e)}"
+                detail=f"Invalid JSON: {str(e)}",
             )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Error reading request body: {str(e)}"
+                detail=f"Error reading request body: {str(e)}",
             )
-        
+
+        # Under overload only high-severity events are kept
+        if admission_decision == ADMIT_PRIORITY_ONLY and not admission.keep_event(
+            syslog_level(
+                event_data.get("level") if isinstance(event_data, dict) else None
+            )
+        ):
+            raise service_unavailable("low_severity")
+
         # Validate NB_Tenant field
         if "NB_Tenant" not in event_data:
             raise HTTPException(
@@ -196,13 +579,13 @@ async def process_events(request: Request):
                     "message": "NB_Tenant field is required in event payload",
                     "details": {
                         "missing_field": "NB_Tenant",
-                        "note": "Add 'NB_Tenant': 'your-tenant-name' to your NetBird webhook body template"
-                    }
-                }
+                        "note": "Add 'NB_Tenant': 'your-tenant-name' to your NetBird webhook body template",
+                    },
+                },
             )
 
         tenant = event_data["NB_Tenant"].lower()
-        
+
         # Validate tenant format
         if not config.validate_tenant_format(tenant):
             raise HTTPException(
@@ -213,66 +596,141 @@ async def process_events(request: Request):
                     "details": {
                         "tenant": tenant,
                         "allowed_characters": "alphanumeric, hyphens, underscores",
-                        "regex_pattern": "^[a-zA-Z0-9_-]+$"
-                    }
+                        "regex_pattern": "^[a-zA-Z0-9_-]+$",
+                    },
+                },
+            )
+
+        # Archive the body as received; replay re-applies everything below
+        capture_writer.capture(tenant, raw_body, received_at)
+
+        # Per-tenant drop/keep/sample rules on the raw event
+        if event_rules.enabled:
+            with timer.stage("filter"):
+                keep = event_rules.keep(tenant, event_data)
+            if not keep:
+                stats["total_events_filtered"] += 1
+                return {
+                    "status": "filtered",
+                    "message": "Event dropped by filtering rules",
+                    "tenant_id": tenant,
                 }
+
+        # Acknowledge webhook retries of an already forwarded event
+        with timer.stage("dedup"):
+            duplicate = deduplicator.is_duplicate(tenant, event_data)
+        if duplicate:
+            stats["total_events_deduplicated"] += 1
+            if shared_state is not None:
+                shared_state.add("deduplicated")
+            return {
+                "status": "duplicate",
+                "message": "Event already forwarded to Graylog",
+                "tenant_id": tenant,
+            }
+
+        # Per-tenant and global rate limits
+        with timer.stage("rate_limit"):
+            retry_after = rate_limiter.check(
+                tenant_registry.state_for(tenant), len(raw_body)
+            )
+        if retry_after:
+            stats["total_events_rate_limited"] += 1
+            if shared_state is not None:
+                shared_state.add("rate_limited")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "code": "RATE_LIMITED",
+                    "message": f"Rate limit exceeded for tenant '{tenant}'",
+                    "details": {"tenant": tenant, "retry_after_seconds": retry_after},
+                },
+                headers={"Retry-After": retry_after_header(retry_after)},
             )
 
+        # Coalesce repetitive events into windowed summary messages
+        if aggregator.matches(event_data):
+            with timer.stage("aggregate"):
+                await aggregator.add(tenant, event_data)
+            deduplicator.remember(tenant, event_data)
+            return {
+                "status": "aggregated",
+                "message": "Event accepted for aggregated forwarding to Graylog",
+                "tenant_id": tenant,
+            }
+
         # Transform event
-        transformed_event = await transformer.transform_event(event_data, tenant)
-        
+        with timer.stage("transform_event"):
+            transformed_event = await transform_dispatcher.transform(
+                event_data, tenant, len(raw_body)
+            )
+
+        # Queue on the additional sinks, independent of the Graylog outcome
+        transformed_event = publish_to_sinks(tenant, transformed_event)
+
         # Forward to Graylog
-        success = await graylog_forwarder.forward_event(transformed_event)
-        
+        with timer.stage("forward_event"):
+            success = await graylog_forwarder.forward_event(transformed_event)
+
         # Extract request context for logging
         context = extract_request_context(request)
-        
+
         if success:
             # Update statistics
             level = str(getattr(transformed_event, "level", 6))  # Default to INFO level
             update_statistics(tenant, level, True)
-            
+            deduplicator.remember(tenant, event_data)
+
             # Log success
             context["message"] = "Successfully forwarded event to Graylog"
             context["tenant"] = tenant
             logger.info(f"Successfully forwarded event to Graylog | Context: {context}")
-            
+
             return {
                 "status": "success",
                 "message": "Event processed and forwarded to Graylog",
-                "tenant_id": tenant
+                "tenant_id": tenant,
             }
         else:
             # Update statistics
             level = str(getattr(transformed_event, "level", 6))  # Default to INFO level
             update_statistics(tenant, level, False)
-            
+
             # Log failure
             context["message"] = "Failed to forward event to Graylog"
             context["tenant"] = tenant
             logger.error(f"Failed to forward event to Graylog | Context: {context}")
-            
+
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Failed to forward event to Graylog"
+                detail="Failed to forward event to Graylog",
             )
 
-    except HTTPException:
+    except HTTPException as e:
+        status_code = e.status_code
         raise
     except Exception as e:
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         context = extract_request_context(request)
         context["message"] = f"Unexpected error processing event: {str(e)}"
-        logger.error(f"Unexpected error processing event: {str(e)} | Context: {context}")
-        
+        logger.error(
+            f"Unexpected error processing event: {str(e)} | Context: {context}"
+        )
+
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
                 "code": "INTERNAL_ERROR",
                 "message": "Internal server error processing event",
-                "details": {"error": str(e)}
-            }
+                "details": {"error": str(e)},
+            },
         )
+    finally:
+        admission.leave()
+        slow_events.observe(timer, tenant, raw_body, chunk_count, status_code)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=config.host, port=config.port)
+    from .server import serve
+
+    serve(app, init_worker)
@@ -9,70 +9,102 @@ from typing import Any, Dict, Optional, Tuple
 
 from pydantic import BaseModel, Field, field_validator
 
+
 def convert_go_timestamp_to_iso(timestamp_str):
     """
     Convert Go timestamp format to ISO 8601 format.
-    
+
     NETBIRD BUG WORKAROUND: Converts Go timestamps and handles HTML entities
     (&#43; for +) that appear in NetBird webhook payloads due to upstream bug.
-    
+
     This function should be REMOVED when NetBird fixes the upstream bug.
     See NETBIRD_BUG_WORKAROUND.md for details.
-    
+
     Go format: '2025-08-28 23:04:20.987971503 +0000 UTC'
     ISO format: '2025-08-28T23:04:20.987Z'
     """
     import re
     import html
     from datetime import datetime
-    
+
     if not isinstance(timestamp_str, str):
         return timestamp_str
-    
+
     # Decode HTML entities (e.g., &#43; -> +)
     timestamp_str = html.unescape(timestamp_str)
-    
+
     # Pattern to match Go timestamp: YYYY-MM-DD HH:MM:SS.nnnnnnnnn +0000 UTC
-    go_timestamp_pattern = r'^(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2}:\d{2})\.(\d+)\s+\+0000\s+UTC$'
+    go_timestamp_pattern = (
+        r"^(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2}:\d{2})\.(\d+)\s+\+0000\s+UTC$"
+    )
     match = re.match(go_timestamp_pattern, timestamp_str.strip())
-    
+
     if match:
         date_part = match.group(1)
-        time_part = match.group(2) 
+        time_part = match.group(2)
         nanosec_part = match.group(3)
-        
+
         # Convert nanoseconds to milliseconds (truncate to 3 digits)
-        millisec = nanosec_part[:3].ljust(3, '0')
-        
+        millisec = nanosec_part[:3].ljust(3, "0")
+
         # Format as ISO 8601
         iso_timestamp = f"{date_part}T{time_part}.{millisec}Z"
         return iso_timestamp
-    
-    return timestamp_str
 
+    return timestamp_str
 
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
+
+
 def debug_event_fields(event_data):
     """Debug helper to log event structure"""
     logger.info(f"EVENT DEBUG: Received event with {len(event_data)} fields")
     logger.info(f"EVENT DEBUG: Field names: {list(event_data.keys())}")
-    
+
     # Check for meta-related fields
-    meta_related = {k: v for k, v in event_data.items() if 'meta' in k.lower()}
+    meta_related = {k: v for k, v in event_data.items() if "meta" in k.lower()}
     if meta_related:
-        logger.info(f"EVENT DEBUG: Meta-related fields found: {list(meta_related.keys())}")
+        logger.info(
+            f"EVENT DEBUG: Meta-related fields found: {list(meta_related.keys())}"
+        )
         for key, value in meta_related.items():
-            logger.info(f"EVENT DEBUG: {key} = {repr(value)} (type: {type(value).__name__})")
+            logger.info(
+                f"EVENT DEBUG: {key} = {repr(value)} (type: {type(value).__name__})"
+            )
     else:
         logger.info("EVENT DEBUG: No meta-related fields found")
-    
+
     # Show a sample of all fields for debugging
     sample_fields = dict(list(event_data.items())[:5])  # First 5 fields
     logger.info(f"EVENT DEBUG: Sample fields: {sample_fields}")
 
 
+# Syslog severity for the level names NetBird (and other sources) may send
+SYSLOG_LEVELS = {
+    "EMERGENCY": 0,
+    "EMERG": 0,
+    "ALERT": 1,
+    "CRITICAL": 2,
+    "CRIT": 2,
+    "ERROR": 3,
+    "ERR": 3,
+    "WARNING": 4,
+    "WARN": 4,
+    "NOTICE": 5,
+    "INFO": 6,
+    "INFORMATION": 6,
+    "DEBUG": 7,
+}
+
+
+def syslog_level(value: Any) -> int:
+    """Map an event level value to a syslog severity, defaulting to INFO (6)."""
+    if value is None:
+        return 6
+    return SYSLOG_LEVELS.get(str(value).upper(), 6)
+
 
 def parse_ip_port(addr_string: str) -> Tuple[Optional[str], Optional[str]]:
     """
@@ -110,6 +142,35 @@ def parse_ip_port(addr_string: str) -> Tuple[Optional[str], Optional[str]]:
     return addr_string, None
 
 
+# Common field patterns that might contain IP:port combinations
+ADDRESS_FIELD_PATTERNS = (
+    "source_addr",
+    "destination_addr",
+    "dest_addr",
+    "src_addr",
+    "remote_addr",
+    "local_addr",
+    "peer_addr",
+    "client_addr",
+    "server_addr",
+)
+
+
+def is_address_field(field_name: str) -> bool:
+    """Check if a flattened field name matches any address pattern."""
+    field_lower = field_name.lower()
+    return any(pattern in field_lower for pattern in ADDRESS_FIELD_PATTERNS)
+
+
+def port_field_name(field_name: str) -> str:
+    """Name of the port field split from an address field."""
+    # Convert source_addr -> source_port, destination_addr -> port
+    name = field_name.replace("_addr", "_port").replace("_address", "_port")
+    if name == field_name:  # If no replacement happened, append _port
+        name = f"{field_name}_port"
+    return name
+
+
 def enhance_address_fields(flattened_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Enhance flattened data by parsing IP:port combinations into separate fields.
@@ -124,28 +185,9 @@ def enhance_address_fields(flattened_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     enhanced_data = flattened_data.copy()
 
-    # Common field patterns that might contain IP:port combinations
-    address_field_patterns = [
-        "source_addr",
-        "destination_addr",
-        "dest_addr",
-        "src_addr",
-        "remote_addr",
-        "local_addr",
-        "peer_addr",
-        "client_addr",
-        "server_addr",
-    ]
-
     # Find and process address fields
     for field_name, field_value in list(flattened_data.items()):
-        # Check if this field matches any address pattern
-        field_lower = field_name.lower()
-        is_address_field = any(
-            pattern in field_lower for pattern in address_field_patterns
-        )
-
-        if is_address_field and isinstance(field_value, str):
+        if is_address_field(field_name) and isinstance(field_value, str):
             ip, port = parse_ip_port(field_value)
 
             if port is not None:
@@ -153,16 +195,7 @@ def enhance_address_fields(flattened_data: Dict[str, Any]) -> Dict[str, Any]:
                 enhanced_data[field_name] = ip
 
                 # Add a new port field
-                # Convert source_addr -> source_port, destination_addr -> port
-                port_field_name = field_name.replace("_addr", "_port").replace(
-                    "_address", "_port"
-                )
-                if (
-                    port_field_name == field_name
-                ):  # If no replacement happened, append _port
-                    port_field_name = f"{field_name}_port"
-
-                enhanced_data[port_field_name] = port
+                enhanced_data[port_field_name(field_name)] = port
 
     return enhanced_data
 
@@ -170,134 +203,153 @@ def enhance_address_fields(flattened_data: Dict[str, Any]) -> Dict[str, Any]:
 def parse_json_fields(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parse JSON strings and Go map strings in specific fields.
-    
+
     This function looks for fields like 'meta' that might contain JSON strings
     or Go map format strings and attempts to parse them into structured data.
-    
+
     Args:
         data: Dictionary that might contain JSON string values or Go map strings
-        
+
     Returns:
         Dictionary with JSON/Go map strings parsed into structured data
     """
     parsed_data = data.copy()
-    
+
     # Fields that commonly contain structured data
-    structured_field_candidates = ['meta', 'metadata', 'data', 'payload', 'details']
-    
+    structured_field_candidates = ["meta", "metadata", "data", "payload", "details"]
+
     for key, value in data.items():
         if isinstance(value, str) and len(value.strip()) > 0:
             stripped = value.strip()
-            
+
             # NETBIRD BUG WORKAROUND: Check for Go map format (remove when NetBird fixes upstream bug)
-            if stripped.startswith('map[') and stripped.endswith(']'):
+            if stripped.startswith("map[") and stripped.endswith("]"):
                 try:
                     parsed_go_map = parse_go_map(stripped)
                     if parsed_go_map:
                         parsed_data[key] = parsed_go_map
-                        logger.info(f"Successfully parsed Go map format in field '{key}' - found {len(parsed_go_map)} keys")
+                        logger.info(
+                            f"Successfully parsed Go map format in field '{key}' - found {len(parsed_go_map)} keys"
+                        )
                         continue  # Successfully parsed, move to next field
                 except Exception as e:
                     logger.warning(f"Failed to parse Go map in field '{key}': {e}")
-            
+
             # Check for JSON format (standard JSON objects/arrays)
-            elif (stripped.startswith('{') and stripped.endswith('}')) or (stripped.startswith('[') and stripped.endswith(']')):
+            elif (stripped.startswith("{") and stripped.endswith("}")) or (
+                stripped.startswith("[") and stripped.endswith("]")
+            ):
                 try:
                     parsed_json = json.loads(stripped)
                     parsed_data[key] = parsed_json
-                    logger.info(f"Successfully parsed JSON content in field '{key}' (type: {type(parsed_json).__name__})")
+                    logger.info(
+                        f"Successfully parsed JSON content in field '{key}' (type: {type(parsed_json).__name__})"
+                    )
                     continue  # Successfully parsed, move to next field
                 except (json.JSONDecodeError, TypeError):
                     pass  # Fall through to other checks
-            
+
             # Check if this field is a known candidate for structured data and try JSON parsing
             elif key.lower() in [f.lower() for f in structured_field_candidates]:
                 try:
                     # Try to parse as JSON
                     parsed_json = json.loads(stripped)
                     parsed_data[key] = parsed_json
-                    logger.info(f"Successfully parsed JSON in field '{key}' (type: {type(parsed_json).__name__})")
+                    logger.info(
+                        f"Successfully parsed JSON in field '{key}' (type: {type(parsed_json).__name__})"
+                    )
                     continue  # Successfully parsed, move to next field
                 except (json.JSONDecodeError, TypeError):
                     pass  # Keep original value
-    
+
     return parsed_data
+
+
 def parse_go_map(go_map_string):
     """
     Parse Go map string format like: map[key1:value1 key2:value2 ...]
     Returns a dictionary.
-    
+
     NETBIRD BUG WORKAROUND: This function exists to handle a NetBird bug where
-    the 'meta' field in webhook payloads contains Go map syntax instead of 
+    the 'meta' field in webhook payloads contains Go map syntax instead of
     proper JSON when using custom webhook body templates.
-    
+
     This workaround should be REMOVED when NetBird fixes the upstream bug.
     See NETBIRD_BUG_WORKAROUND.md for details.
-    
+
     Handles empty values, complex timestamps, and special characters correctly.
     """
-    if not go_map_string.startswith('map[') or not go_map_string.endswith(']'):
+    if not go_map_string.startswith("map[") or not go_map_string.endswith("]"):
         return None
-    
+
     # Extract the content between map[ and ]
     content = go_map_string[4:-1]  # Remove 'map[' and ']'
-    
+
     result = {}
-    
+
     # More robust parsing using regex to find all key:value patterns
     import re
-    
+
     # First, let's find all potential keys by looking for the pattern "word:"
     # This helps us identify where keys start, even with empty values
     key_positions = []
-    
+
     # Find all positions where we have "word:" pattern
-    for match in re.finditer(r'\b([a-zA-Z_][a-zA-Z0-9_]*):', content):
-        key_positions.append({
-            'start': match.start(),
-            'end': match.end(),
-            'key': match.group(1),
-            'key_end': match.end()
-        })
-    
+    for match in re.finditer(r"\b([a-zA-Z_][a-zA-Z0-9_]*):", content):
+        key_positions.append(
+            {
+                "start": match.start(),
+                "end": match.end(),
+                "key": match.group(1),
+                "key_end": match.end(),
+            }
+        )
+
     if not key_positions:
         return {}
-    
+
     # Now process each key-value pair
     for i, key_info in enumerate(key_positions):
-        key = key_info['key']
-        value_start = key_info['key_end']  # Start after the colon
-        
+        key = key_info["key"]
+        value_start = key_info["key_end"]  # Start after the colon
+
         # Determine where the value ends
         if i + 1 < len(key_positions):
             # Value ends where the next key starts
-            value_end = key_positions[i + 1]['start']
+            value_end = key_positions[i + 1]["start"]
         else:
             # Last key-value pair, value goes to the end
             value_end = len(content)
-        
+
         # Extract the value
         value = content[value_start:value_end].strip()
-        
+
         # Clean up the value
         # Remove quotes if present
         if len(value) >= 2:
-            if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+            if (value.startswith('"') and value.endswith('"')) or (
+                value.startswith("'") and value.endswith("'")
+            ):
                 value = value[1:-1]
-        
+
         # Handle empty values
         if not value:
             value = ""
-        
+
         # Convert Go timestamp format to ISO 8601 for timestamp fields
-        if key.endswith('timestamp') and isinstance(value, str):
+        if key.endswith("timestamp") and isinstance(value, str):
             value = convert_go_timestamp_to_iso(value)
-        
+
         result[key] = value
-    
+
     return result
+
+
 def flatten_dict(
-    data: Dict[str, Any], parent_key: str = "", separator: str = "_"
+    data: Dict[str, Any],
+    parent_key: str = "",
+    separator: str = "_",
+    projection=None,
 ) -> Dict[str, Any]:
     """
     Recursively flatten a nested dictionary.
@@ -306,6 +358,8 @@ def flatten_dict(
         data: Dictionary to flatten
         parent_key: Current parent key path
         separator: Separator to use between keys
+        projection: Optional FieldProjection; excluded subtrees and fields
+            are skipped before they are flattened or stringified
 
     Returns:
         Flattened dictionary with concatenated keys
@@ -316,9 +370,23 @@ def flatten_dict(
         # Create new key with parent path
         new_key = f"{parent_key}{separator}{key}" if parent_key else key
 
+        if projection is not None and value is not None:
+            subtree = isinstance(value, dict) or (
+                isinstance(value, list)
+                and len(value) > 0
+                and all(isinstance(item, dict) for item in value)
+            )
+            if subtree:
+                excluded = projection.prunes(new_key)
+            else:
+                excluded = not projection.includes(new_key)
+            if excluded:
+                projection.dropped(new_key, value)
+                continue
+
         if isinstance(value, dict):
             # Recursively flatten nested dictionaries
-            items.extend(flatten_dict(value, new_key, separator).items())
+            items.extend(flatten_dict(value, new_key, separator, projection).items())
         elif isinstance(value, list):
             # Handle lists by creating indexed fields or converting to JSON
             if len(value) > 0 and all(isinstance(item, dict) for item in value):
@@ -326,7 +394,11 @@ def flatten_dict(
                 for i, item in enumerate(value):
                     if isinstance(item, dict):
                         indexed_key = f"{new_key}_{i}"
-                        items.extend(flatten_dict(item, indexed_key, separator).items())
+                        items.extend(
+                            flatten_dict(
+                                item, indexed_key, separator, projection
+                            ).items()
+                        )
                     else:
                         items.append((f"{new_key}_{i}", str(item)))
             else:
@@ -415,6 +487,8 @@ class GELFMessage(BaseModel):
         host: str,
         tenant_id: str,
         short_message: Optional[str] = None,
+        projection=None,
+        plan_cache=None,
     ) -> "GELFMessage":
         """
         Create GELF message from Netbird event data with flattened and enhanced fields.
@@ -424,13 +498,17 @@ class GELFMessage(BaseModel):
             host: Source host identifier
             tenant_id: Tenant/client identifier
             short_message: Override for short message
+            projection: Optional FieldProjection restricting and renaming the
+                emitted ``_NB_*`` fields
+            plan_cache: Optional TransformPlanCache; events whose structure
+                was seen before skip flattening and address-field detection
         """
         # DEBUG: Log the incoming event structure
         debug_event_fields(event_data)
-        
+
         # First, parse any JSON strings in the event data (like meta field)
         parsed_event_data = parse_json_fields(event_data)
-        
+
         # Generate short message if not provided
         if not short_message:
             # Try to use the actual Message field from Netbird events
@@ -438,9 +516,13 @@ class GELFMessage(BaseModel):
                 short_message = str(parsed_event_data["Message"]).strip()
             else:
                 # Fallback to constructing from available fields
-                event_type = parsed_event_data.get("type", parsed_event_data.get("event_type", ""))
+                event_type = parsed_event_data.get(
+                    "type", parsed_event_data.get("event_type", "")
+                )
                 action = parsed_event_data.get("action", "")
-                user = parsed_event_data.get("user", parsed_event_data.get("InitiatorID", ""))
+                user = parsed_event_data.get(
+                    "user", parsed_event_data.get("InitiatorID", "")
+                )
 
                 if action and user:
                     short_message = f"Netbird {event_type}: {action} by {user}"
@@ -500,25 +582,7 @@ class GELFMessage(BaseModel):
             timestamp = time.time()
 
         # Convert level to syslog level if it's a string
-        level = 6  # Default INFO
-        if "level" in parsed_event_data:
-            level_str = str(parsed_event_data["level"]).upper()
-            level_mapping = {
-                "EMERGENCY": 0,
-                "EMERG": 0,
-                "ALERT": 1,
-                "CRITICAL": 2,
-                "CRIT": 2,
-                "ERROR": 3,
-                "ERR": 3,
-                "WARNING": 4,
-                "WARN": 4,
-                "NOTICE": 5,
-                "INFO": 6,
-                "INFORMATION": 6,
-                "DEBUG": 7,
-            }
-            level = level_mapping.get(level_str, 6)
+        level = syslog_level(parsed_event_data.get("level"))
 
         # Prepare custom fields with flattened and enhanced structure
         custom_fields = {}
@@ -526,11 +590,18 @@ class GELFMessage(BaseModel):
         # Add tenant field
         custom_fields["_NB_tenant"] = tenant_id
 
-        # Flatten the entire event data structure (now with parsed JSON fields)
-        flattened_data = flatten_dict(parsed_event_data)
+        field_names = None
+        if plan_cache is not None:
+            # Same fields and order as below, from a plan cached per event shape
+            enhanced_data, field_names = plan_cache.fields(
+                parsed_event_data, projection
+            )
+        else:
+            # Flatten the entire event data structure (now with parsed JSON fields)
+            flattened_data = flatten_dict(parsed_event_data, projection=projection)
 
-        # Enhance flattened data by parsing IP:port combinations
-        enhanced_data = enhance_address_fields(flattened_data)
+            # Enhance flattened data by parsing IP:port combinations
+            enhanced_data = enhance_address_fields(flattened_data)
 
         # Add all enhanced fields with NB_ prefix
         for key, value in enhanced_data.items():
@@ -544,6 +615,22 @@ class GELFMessage(BaseModel):
                 if chosen_ts_field_key == key:
                     skip_field = True
 
+            if not skip_field and field_names is not None:
+                # Planned output name; None for fields excluded by projection
+                name = field_names[key]
+                if name is None:
+                    projection.dropped(key, value)
+                else:
+                    custom_fields[name] = value
+                continue
+
+            if not skip_field and projection is not None:
+                # Fields derived by enhance_address_fields (e.g. *_port)
+                if not projection.includes(key):
+                    projection.dropped(key, value)
+                    continue
+                key = projection.rename.get(key, key)
+
             if not skip_field:
                 # Ensure we have a string value for GELF
                 if isinstance(value, (dict, list)):
@@ -563,11 +650,36 @@ class GELFMessage(BaseModel):
             else:
                 serializable_event_data[key] = value
 
+        full_message = None
+        if projection is None or projection.full_message:
+            full_message = json.dumps(serializable_event_data, indent=2)
+        if projection is not None:
+            projection.emitted(full_message is not None, serializable_event_data)
+
         return cls(
             host=host,
             short_message=short_message,
-            full_message=json.dumps(serializable_event_data, indent=2),
+            full_message=full_message,
             timestamp=timestamp,
             level=level,
             custom_fields=custom_fields,
         )
+
+
+class SerializedGELFMessage:
+    """
+    A GELF message that has already been encoded to JSON bytes.
+
+    Produced when the transform runs outside the event loop (e.g. in a worker
+    process); carries the fields the pipeline still needs after serialization.
+    """
+
+    __slots__ = ("level", "payload")
+
+    def __init__(self, level: int, payload: bytes):
+        self.level = level
+        self.payload = payload
+
+    @classmethod
+    def from_message(cls, message: GELFMessage) -> "SerializedGELFMessage":
+        return cls(level=message.level, payload=message.to_json().encode("utf-8"))
@@ -0,0 +1,129 @@
+"""
+Template-based GELF serializer.
+
+``GELFMessage.to_json`` dumps the whole model into a dict and runs it
+through ``json.dumps`` for every message, re-encoding constants such as
+``"version":"1.1"``, ``"facility":"nb_streamer"``, the tenant's ``host``
+and every ``_NB_*`` key name. ``GELFEncoder`` caches those fragments already
+escaped and only escapes the dynamic values, producing output that is
+byte-for-byte identical to ``to_json().encode("utf-8")``.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, List, Tuple
+
+from .gelf import GELFMessage
+
+# Bound on cached fragments per kind; key names are bounded by event shapes
+MAX_FRAGMENTS = 4096
+
+_INFINITY = float("inf")
+
+
+def encode_value(value: Any) -> str:
+    """Encode one JSON value exactly as ``json.dumps`` with compact separators."""
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value == _INFINITY:
+            return "Infinity"
+        if value == -_INFINITY:
+            return "-Infinity"
+        return float.__repr__(value)
+    return json.dumps(value, separators=(",", ":"))
+
+
+class GELFEncoder:
+    """Serialize GELF messages from cached, pre-escaped fragments."""
+
+    def __init__(self):
+        self._heads: Dict[Tuple[Any, Any], str] = {}
+        self._keys: Dict[str, str] = {}
+        self._facilities: Dict[Any, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _head(self, version: Any, host: Any) -> str:
+        """``{"version":…,"host":…,"short_message":`` for one host."""
+        head = self._heads.get((version, host))
+        if head is None:
+            self.misses += 1
+            parts = ["{"]
+            if version is not None:
+                parts.append(f'"version":{encode_value(version)},')
+            parts.append(f'"host":{encode_value(host)},"short_message":')
+            head = "".join(parts)
+            if len(self._heads) >= MAX_FRAGMENTS:
+                self._heads.clear()
+            self._heads[(version, host)] = head
+        else:
+            self.hits += 1
+        return head
+
+    def _key(self, key: str) -> str:
+        fragment = self._keys.get(key)
+        if fragment is None:
+            fragment = f",{encode_basestring_ascii(key)}:"
+            if len(self._keys) >= MAX_FRAGMENTS:
+                self._keys.clear()
+            self._keys[key] = fragment
+        return fragment
+
+    def encode(self, message: GELFMessage) -> bytes:
+        """
+        Serialize ``message`` to compact GELF JSON.
+
+        Returns:
+            bytes: identical to ``message.to_json().encode("utf-8")``
+        """
+        if message.host is None or message.short_message is None:
+            # Fields the template assumes are present; use the reference path
+            return message.to_json().encode("utf-8")
+
+        parts: List[str] = [
+            self._head(message.version, message.host),
+            encode_value(message.short_message),
+        ]
+        if message.full_message is not None:
+            parts.append(',"full_message":')
+            parts.append(encode_value(message.full_message))
+        if message.timestamp is not None:
+            parts.append(',"timestamp":')
+            parts.append(encode_value(message.timestamp))
+        if message.level is not None:
+            parts.append(',"level":')
+            parts.append(encode_value(message.level))
+        if message.facility is not None:
+            facility = self._facilities.get(message.facility)
+            if facility is None:
+                facility = f',"facility":{encode_value(message.facility)}'
+                if len(self._facilities) >= MAX_FRAGMENTS:
+                    self._facilities.clear()
+                self._facilities[message.facility] = facility
+            parts.append(facility)
+
+        key_fragment = self._key
+        for key, value in message.custom_fields.items():
+            if value is not None:
+                parts.append(key_fragment(key))
+                parts.append(encode_value(value))
+        parts.append("}")
+        # Every fragment is ASCII (non-ASCII is \\u-escaped), so one encode suffices
+        return "".join(parts).encode("ascii")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "host_fragments": len(self._heads),
+            "key_fragments": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,141 @@
+"""
+Process management for NB_Streamer.
+
+With ``NB_WORKERS=1`` (the default) the application runs in a single uvicorn
+process. With more workers a small master process creates the shared state
+segment, forks the workers and supervises them:
+
+* ``prefork``: the master binds the listening socket and every worker
+  accepts on the inherited socket.
+* ``reuseport``: every worker binds its own socket with ``SO_REUSEPORT`` and
+  the kernel balances incoming connections across them.
+
+Each worker builds its own Graylog transport after the fork.
+"""
+
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+from .config import config
+from .services.dedup import deduplicator_from_config
+from .services.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+WorkerInit = Callable[[SharedState, int], None]
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """Create a listening TCP socket for the workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(
+    app: FastAPI,
+    index: int,
+    shared: SharedState,
+    init_worker: WorkerInit,
+    listen_sock: Optional[socket.socket],
+) -> None:
+    """Body of a forked worker process; never returns."""
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    code = 0
+    try:
+        init_worker(shared, index)
+        if listen_sock is None:
+            listen_sock = bind_socket(config.host, config.port, reuse_port=True)
+        server = uvicorn.Server(uvicorn.Config(app, log_level=config.log_level.lower()))
+        server.run(sockets=[listen_sock])
+    except Exception:
+        logger.exception(f"Worker {index} crashed")
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(app: FastAPI, init_worker: WorkerInit) -> None:
+    """Run the application with the configured number of workers."""
+    if config.workers <= 1:
+        uvicorn.run(app, host=config.host, port=config.port)
+        return
+
+    if config.worker_mode == "reuseport" and not hasattr(socket, "SO_REUSEPORT"):
+        logger.error("SO_REUSEPORT is not available on this platform")
+        sys.exit(1)
+
+    shared = SharedState(
+        tenant_slots=config.shared_tenant_slots,
+        dedup_bytes=deduplicator_from_config(config).shared_buffer_size,
+    )
+    listen_sock = None
+    if config.worker_mode == "prefork":
+        listen_sock = bind_socket(config.host, config.port)
+
+    logger.info(
+        f"Starting {config.workers} workers ({config.worker_mode}) on "
+        f"{config.host}:{config.port}, shared segment {shared.name}"
+    )
+
+    workers: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(app, index, shared, init_worker, listen_sock)
+        workers[pid] = index
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        for index in range(config.workers):
+            spawn(index)
+
+        while workers:
+            try:
+                pid, wait_status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = workers.pop(pid, None)
+            if index is None or stopping:
+                continue
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited with status {wait_status}; "
+                "restarting"
+            )
+            time.sleep(1)
+            spawn(index)
+    finally:
+        if listen_sock is not None:
+            listen_sock.close()
+        shared.close(unlink=True)
+        logger.info("All workers stopped")
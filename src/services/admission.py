@@ -0,0 +1,165 @@
+"""
+Admission control and load shedding for NB_Streamer.
+
+Two signals decide whether new events are accepted:
+
+* the number of requests currently in flight on this process (a hard limit),
+* event-loop lag measured by a probe task that sleeps for a fixed interval
+  and records how late it wakes up (a soft limit).
+
+Over the hard limit every request is rejected with 503 before its body is
+read. Over the soft limit requests are rejected too, unless priority mode is
+configured, in which case high-severity events are still accepted.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ADMIT = "admit"
+ADMIT_PRIORITY_ONLY = "priority"
+SHED = "shed"
+
+
+class LoopLagMonitor:
+    """Measure event-loop scheduling lag with a periodic sleep probe."""
+
+    def __init__(self, interval: float, alpha: float = 0.3):
+        self.interval = interval
+        self.alpha = alpha
+        self.lag = 0.0
+        self.lag_ewma = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        self.lag = lag
+        self.lag_ewma = (
+            lag
+            if self.samples == 0
+            else self.alpha * lag + (1 - self.alpha) * self.lag_ewma
+        )
+        self.max_lag = max(self.max_lag, lag)
+        self.samples += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - started - self.interval)
+
+    def start(self) -> None:
+        """Start the probe on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class AdmissionController:
+    """Decide whether a request may enter the pipeline."""
+
+    def __init__(
+        self,
+        lag_monitor: LoopLagMonitor,
+        max_in_flight: int,
+        lag_threshold_ms: float,
+        keep_level: Optional[int] = None,
+    ):
+        self.lag_monitor = lag_monitor
+        self.max_in_flight = max_in_flight
+        self.lag_threshold = lag_threshold_ms / 1000
+        self.keep_level = keep_level
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.shed_total = 0
+        self.shed_by_reason: Dict[str, int] = {
+            "in_flight": 0,
+            "loop_lag": 0,
+            "low_severity": 0,
+        }
+        self.kept_high_severity = 0
+
+    @property
+    def overloaded(self) -> bool:
+        """Whether the soft (lag) limit is currently exceeded."""
+        return (
+            self.lag_threshold > 0 and self.lag_monitor.lag_ewma >= self.lag_threshold
+        )
+
+    @property
+    def shedding(self) -> bool:
+        return self.overloaded or (
+            self.max_in_flight > 0 and self.in_flight >= self.max_in_flight
+        )
+
+    def try_enter(self) -> str:
+        """
+        Admit a request, or decide to shed it.
+
+        Returns:
+            ADMIT, ADMIT_PRIORITY_ONLY (admitted, but only high-severity
+            events may proceed) or SHED. Admitted requests must call leave().
+        """
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            self._shed("in_flight")
+            return SHED
+
+        decision = ADMIT
+        if self.overloaded:
+            if self.keep_level is None:
+                self._shed("loop_lag")
+                return SHED
+            decision = ADMIT_PRIORITY_ONLY
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return decision
+
+    def leave(self) -> None:
+        self.in_flight -= 1
+
+    def keep_event(self, level: int) -> bool:
+        """In priority mode, decide whether an event of ``level`` is kept."""
+        if self.keep_level is not None and level <= self.keep_level:
+            self.kept_high_severity += 1
+            return True
+        self._shed("low_severity")
+        return False
+
+    def _shed(self, reason: str) -> None:
+        self.shed_total += 1
+        self.shed_by_reason[reason] += 1
+        if self.shed_total == 1 or self.shed_total % 1000 == 0:
+            logger.warning(
+                f"Shedding load ({reason}); {self.shed_total} events shed so far"
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        monitor = self.lag_monitor
+        return {
+            "shedding": self.shedding,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_in_flight": self.max_in_flight,
+            "loop_lag_ms": round(monitor.lag * 1000, 3),
+            "loop_lag_ewma_ms": round(monitor.lag_ewma * 1000, 3),
+            "loop_lag_max_ms": round(monitor.max_lag * 1000, 3),
+            "loop_lag_threshold_ms": self.lag_threshold * 1000,
+            "keep_level": self.keep_level,
+            "shed_total": self.shed_total,
+            "shed_by_reason": dict(self.shed_by_reason),
+            "kept_high_severity": self.kept_high_severity,
+        }
@@ -0,0 +1,223 @@
+"""
+Windowed coalescing of repetitive events.
+
+Large NetBird accounts produce storms of near-identical events (peer logins,
+"peer connected"). When aggregation is enabled, matching events are grouped
+by tenant, activity code (or message) and a configurable set of payload
+fields. Each group is held for one window and then emitted as a single GELF
+message built from the first event, annotated with ``_NB_count``, the first
+and last event timestamps and a sample of event ids. A group that only saw
+one event is emitted unchanged.
+
+The number of open groups is bounded; when the bound is reached the oldest
+group is emitted early. Open groups are flushed on shutdown.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# emit(tenant, first raw event, extra GELF custom fields) -> forwarded
+Emitter = Callable[[str, Dict[str, Any], Dict[str, Any]], Awaitable[bool]]
+
+
+def activity_code(event: Dict[str, Any]) -> str:
+    """Activity code if NetBird sent one, otherwise the message text."""
+    for field in ("ActivityCode", "Activity", "Message", "message", "type"):
+        value = event.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return ""
+
+
+def event_timestamp(event: Dict[str, Any]) -> Optional[str]:
+    value = event.get("Timestamp", event.get("timestamp"))
+    return None if value is None else str(value)
+
+
+class EventGroup:
+    """Events coalesced into one summary message."""
+
+    __slots__ = (
+        "tenant",
+        "first_event",
+        "count",
+        "first_timestamp",
+        "last_timestamp",
+        "sampled_ids",
+        "opened",
+    )
+
+    def __init__(self, tenant: str, event: Dict[str, Any], opened: float):
+        self.tenant = tenant
+        self.first_event = event
+        self.count = 0
+        self.first_timestamp = event_timestamp(event)
+        self.last_timestamp = self.first_timestamp
+        self.sampled_ids: List[str] = []
+        self.opened = opened
+
+    def add(self, event: Dict[str, Any], sample_ids: int) -> None:
+        self.count += 1
+        timestamp = event_timestamp(event)
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        event_id = event.get("ID", event.get("id"))
+        if event_id is not None and len(self.sampled_ids) < sample_ids:
+            self.sampled_ids.append(str(event_id))
+
+    def summary_fields(self) -> Dict[str, Any]:
+        """Custom GELF fields describing the group; empty for a single event."""
+        if self.count <= 1:
+            return {}
+        return {
+            "_NB_count": self.count,
+            "_NB_first_timestamp": self.first_timestamp,
+            "_NB_last_timestamp": self.last_timestamp,
+            "_NB_sampled_ids": ",".join(self.sampled_ids),
+        }
+
+
+class EventAggregator:
+    """Group matching events per window and emit one message per group."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        window_seconds: float,
+        group_fields: Sequence[str],
+        match: Sequence[str],
+        max_groups: int,
+        sample_ids: int,
+    ):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.group_fields = tuple(group_fields)
+        self.match = frozenset(match)
+        self.max_groups = max_groups
+        self.sample_ids = sample_ids
+        self.emit: Optional[Emitter] = None
+        self._groups: "OrderedDict[Tuple, EventGroup]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.aggregated = 0
+        self.emitted = 0
+        self.emitted_early = 0
+        self.emit_failures = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if not self.enabled:
+            return False
+        return not self.match or activity_code(event) in self.match
+
+    def group_key(self, tenant: str, event: Dict[str, Any]) -> Tuple:
+        fields = tuple(str(event.get(field, "")) for field in self.group_fields)
+        return (tenant, activity_code(event), fields)
+
+    async def add(self, tenant: str, event: Dict[str, Any]) -> None:
+        """Add an event to its group, opening one if needed."""
+        key = self.group_key(tenant, event)
+        group = self._groups.get(key)
+        evicted = None
+        if group is None:
+            if len(self._groups) >= self.max_groups:
+                _, evicted = self._groups.popitem(last=False)
+                self.emitted_early += 1
+            group = EventGroup(tenant, event, time.monotonic())
+            self._groups[key] = group
+        group.add(event, self.sample_ids)
+        self.aggregated += 1
+        # Only await once the table is consistent, so a concurrent add() with
+        # the same key joins this group instead of opening a second one
+        if evicted is not None:
+            await self._emit(evicted)
+
+    async def _emit(self, group: EventGroup) -> None:
+        try:
+            ok = await self.emit(
+                group.tenant, group.first_event, group.summary_fields()
+            )
+        except Exception as e:
+            logger.error(f"Failed to emit aggregated event for {group.tenant}: {e}")
+            ok = False
+        if ok:
+            self.emitted += 1
+        else:
+            self.emit_failures += 1
+
+    async def flush(self, force: bool = False) -> int:
+        """Emit groups whose window has closed (all groups if ``force``)."""
+        deadline = time.monotonic() - self.window_seconds
+        flushed = 0
+        # Groups are ordered by opening time, so stop at the first open one
+        while self._groups:
+            key, group = next(iter(self._groups.items()))
+            if not force and group.opened > deadline:
+                break
+            del self._groups[key]
+            await self._emit(group)
+            flushed += 1
+        return flushed
+
+    async def _run(self) -> None:
+        interval = min(1.0, self.window_seconds / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Aggregation flush failed: {e}")
+
+    def start(self, emit: Emitter) -> None:
+        self.emit = emit
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and emit partial windows."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.emit is not None:
+            flushed = await self.flush(force=True)
+            if flushed:
+                logger.info(f"Flushed {flushed} aggregation groups on shutdown")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window_seconds,
+            "group_fields": list(self.group_fields),
+            "open_groups": len(self._groups),
+            "max_groups": self.max_groups,
+            "aggregated_events": self.aggregated,
+            "emitted": self.emitted,
+            "emitted_early": self.emitted_early,
+            "emit_failures": self.emit_failures,
+            "events_saved": max(
+                0,
+                self.aggregated - self.emitted - self.emit_failures - len(self._groups),
+            ),
+        }
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def aggregator_from_config(config) -> EventAggregator:
+    return EventAggregator(
+        enabled=config.aggregate_enabled,
+        window_seconds=config.aggregate_window_seconds,
+        group_fields=_split(config.aggregate_fields),
+        match=_split(config.aggregate_match),
+        max_groups=config.aggregate_max_groups,
+        sample_ids=config.aggregate_sample_ids,
+    )
@@ -59,6 +59,36 @@ class AuthService:
                 detail=f"Authentication error: {str(e)}",
             )
 
+    async def authenticate_admin(self, request: Request) -> bool:
+        """
+        Authenticate a request for an administrative endpoint.
+
+        Admin endpoints require NB_ADMIN_TOKEN as a Bearer token and are
+        disabled when it is not set; they never fall back to the event
+        authentication, which may be ``none``.
+
+        Raises:
+            HTTPException: If no admin token is configured or it does not match
+        """
+        if not config.admin_token:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin endpoints are disabled; set NB_ADMIN_TOKEN",
+            )
+
+        scheme, token = get_authorization_scheme_param(
+            request.headers.get("Authorization")
+        )
+        if scheme.lower() != "bearer" or not self._secure_compare(
+            token, config.admin_token
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid admin token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return True
+
     async def _authenticate_bearer(self, request: Request) -> bool:
         """Authenticate using Bearer token."""
         authorization = request.headers.get("Authorization")
@@ -0,0 +1,294 @@
+"""
+Opt-in capture of raw request bodies to rotated gzip NDJSON archives.
+
+When ``NB_CAPTURE_ENABLED`` is set, every accepted ``/events`` body (after
+tenant validation, before filtering) can be appended to a capture file as a
+record ``{"received_at": ..., "tenant": ..., "body": ...}``: the format of
+``src.utils.archive``, so captures feed ``src.tools.replay``,
+``src.tools.convert`` and ``scripts/loadgen.py --archive`` unchanged.
+Captures can be limited to some tenants and sampled.
+
+The request path only appends to a bounded in-memory queue. A background
+task drains it in batches every ``NB_CAPTURE_FLUSH_SECONDS`` (or as soon as
+a full batch is waiting) and writes them on a dedicated thread, so disk I/O
+never runs on the event loop. If the disk falls behind and the queue is
+full, new captures are dropped and counted instead of delaying ingest.
+
+Files are named ``capture-<UTC start>-<pid>-<seq>.ndjson.gz`` and carry a
+``.part`` suffix while open; they are renamed once rotated (by compressed
+size or age) or on shutdown, so a glob of ``*.ndjson.gz`` only ever sees
+complete gzip streams.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# (receive time as epoch seconds, tenant, raw body)
+Capture = Tuple[float, str, bytes]
+
+# Upper bound on captures written per thread hop
+MAX_BATCH = 1000
+
+
+def capture_record(received_at: float, tenant: str, body: bytes) -> bytes:
+    """One NDJSON capture line."""
+    return (
+        json.dumps(
+            {
+                "received_at": datetime.fromtimestamp(
+                    received_at, timezone.utc
+                ).isoformat(),
+                "tenant": tenant,
+                "body": body.decode("utf-8", errors="replace"),
+            }
+        ).encode("utf-8")
+        + b"\n"
+    )
+
+
+class RotatingCaptureFile:
+    """Gzip NDJSON files rotated by compressed size or age; not thread-safe."""
+
+    def __init__(
+        self,
+        directory: str,
+        rotate_bytes: int,
+        rotate_seconds: float,
+        compress_level: int = 6,
+        prefix: str = "capture",
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress_level = compress_level
+        self.path: Optional[str] = None
+        self._raw: Optional[BinaryIO] = None
+        self._gzip: Optional[gzip.GzipFile] = None
+        self._opened = 0.0
+        self._sequence = 0
+        self.files_completed = 0
+        self.bytes_written = 0
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        name = f"{self.prefix}-{started}-{os.getpid()}-{self._sequence:04d}.ndjson.gz"
+        self.path = os.path.join(self.directory, name)
+        self._raw = open(self.path + ".part", "wb")
+        self._gzip = gzip.GzipFile(
+            fileobj=self._raw, mode="wb", compresslevel=self.compress_level
+        )
+        self._opened = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self._gzip is not None
+
+    def due(self) -> bool:
+        """Whether the open file has reached its size or age limit."""
+        if self._raw is None:
+            return False
+        if self.rotate_bytes and self._raw.tell() >= self.rotate_bytes:
+            return True
+        return bool(
+            self.rotate_seconds
+            and time.monotonic() - self._opened >= self.rotate_seconds
+        )
+
+    def write(self, lines: Iterable[bytes]) -> None:
+        if self.due():
+            self.close()
+        if self._gzip is None:
+            self._open()
+        stream = self._gzip
+        assert stream is not None
+        for line in lines:
+            stream.write(line)
+            self.bytes_written += len(line)
+
+    def close(self) -> None:
+        """Finish the open file, if any, and give it its final name."""
+        if self._gzip is None or self._raw is None or self.path is None:
+            return
+        try:
+            self._gzip.close()
+            self._raw.close()
+            os.replace(self.path + ".part", self.path)
+            self.files_completed += 1
+        finally:
+            self._gzip = None
+            self._raw = None
+
+
+class CaptureWriter:
+    """Filter, sample and queue captures; write them off the event loop."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        directory: str,
+        tenants: Optional[Iterable[str]] = None,
+        sample_rate: float = 1.0,
+        queue_size: int = 10000,
+        rotate_bytes: int = 64 * 1024 * 1024,
+        rotate_seconds: float = 3600.0,
+        flush_seconds: float = 1.0,
+    ):
+        self.enabled = enabled
+        self.tenants = {t.lower() for t in tenants} if tenants else None
+        self.sample_rate = sample_rate
+        self.queue_size = queue_size
+        self.flush_seconds = flush_seconds
+        self.file = RotatingCaptureFile(directory, rotate_bytes, rotate_seconds)
+        self._pending: Deque[Capture] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._random = random.Random()
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.write_errors = 0
+        self.skipped_tenant = 0
+        self.skipped_sample = 0
+
+    def capture(self, tenant: str, body: bytes, received_at: float) -> bool:
+        """Queue a body for writing; returns False if filtered or dropped."""
+        if not self.enabled:
+            return False
+        if self.tenants is not None and tenant not in self.tenants:
+            self.skipped_tenant += 1
+            return False
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            self.skipped_sample += 1
+            return False
+        if len(self._pending) >= self.queue_size:
+            # Never wait for the disk on the request path
+            self.dropped += 1
+            return False
+        self._pending.append((received_at, tenant, body))
+        self.queued += 1
+        if self._wakeup is not None and len(self._pending) >= MAX_BATCH:
+            self._wakeup.set()
+        return True
+
+    def _write(self, batch: List[Capture]) -> None:
+        """Runs on the writer thread."""
+        try:
+            self.file.write(capture_record(*item) for item in batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} captures: {e}")
+            self.write_errors += 1
+            self.failed += len(batch)
+            try:
+                self.file.close()
+            except Exception:
+                pass
+
+    def _rotate_if_due(self) -> None:
+        if self.file.due():
+            self.file.close()
+
+    def _drain(self) -> List[Capture]:
+        count = min(len(self._pending), MAX_BATCH)
+        return [self._pending.popleft() for _ in range(count)]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        wakeup = self._wakeup
+        assert wakeup is not None, "started without a wakeup event"
+        while True:
+            # Woken early by a full batch, otherwise every flush interval
+            try:
+                await asyncio.wait_for(wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            if not self._pending:
+                # Idle: still close files that have reached their age
+                await loop.run_in_executor(self._executor, self._rotate_if_due)
+            while self._pending:
+                await loop.run_in_executor(self._executor, self._write, self._drain())
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        # One thread keeps writes ordered and the gzip stream single-writer
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="nb-capture"
+        )
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Capturing request bodies to {self.file.directory}")
+
+    async def stop(self) -> None:
+        """Write what is still queued and close the current file."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+        executor = self._executor
+        assert executor is not None
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            await loop.run_in_executor(executor, self._write, self._drain())
+        await loop.run_in_executor(executor, self.file.close)
+        executor.shutdown(wait=True)
+        self._executor = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.file.directory,
+            "tenants": sorted(self.tenants) if self.tenants is not None else None,
+            "sample_rate": self.sample_rate,
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "write_errors": self.write_errors,
+            "skipped_tenant": self.skipped_tenant,
+            "skipped_sample": self.skipped_sample,
+            "queue_depth": len(self._pending),
+            "queue_size": self.queue_size,
+            "bytes_written": self.file.bytes_written,
+            "files_completed": self.file.files_completed,
+            "current_file": self.file.path if self.file.is_open else None,
+        }
+
+
+def capture_writer_from_config(config: Config) -> CaptureWriter:
+    return CaptureWriter(
+        enabled=config.capture_enabled,
+        directory=config.capture_dir,
+        tenants=[
+            t.strip() for t in (config.capture_tenants or "").split(",") if t.strip()
+        ],
+        sample_rate=config.capture_sample_rate,
+        queue_size=config.capture_queue_size,
+        rotate_bytes=config.capture_rotate_bytes,
+        rotate_seconds=config.capture_rotate_seconds,
+        flush_seconds=config.capture_flush_seconds,
+    )
@@ -0,0 +1,254 @@
+"""
+Deduplication of retried NetBird webhook deliveries.
+
+NetBird retries a webhook when it times out, and relays in front of
+NB_Streamer may retry again, so the same activity event can arrive several
+times. Events are keyed on ``(tenant, ID)`` and remembered once they were
+forwarded successfully; a later delivery with the same key is acknowledged
+without being transformed or forwarded again.
+
+Two stores are available:
+
+* ``ttl``: an exact, bounded LRU of keys with a time-to-live.
+* ``bloom``: a time-bucketed Bloom filter with two windows of
+  ``ttl_seconds`` each. Memory is fixed, false positives happen at the
+  configured rate and keys are remembered for between one and two windows.
+  The filter works on a plain buffer, so multi-worker deployments place it
+  in the shared memory segment and deduplicate across all workers.
+"""
+
+import hashlib
+import math
+import struct
+import sys
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+_EPOCH = struct.Struct("q")
+_HALF = struct.Struct("<QQ")
+
+
+def dedup_key(tenant: str, event: Dict[str, Any]) -> Optional[bytes]:
+    """Compact key for an event, or None when the payload carries no id."""
+    event_id = event.get("ID", event.get("id"))
+    if event_id is None or event_id == "":
+        return None
+    return hashlib.blake2b(f"{tenant}\0{event_id}".encode(), digest_size=16).digest()
+
+
+def bloom_parameters(capacity: int, error_rate: float):
+    """Optimal (bits, hash count) for ``capacity`` keys at ``error_rate``."""
+    bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class TTLCache:
+    """Exact set of recent keys, bounded by count and age."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in insertion order, so expired ones are at the front
+        while self._entries:
+            key, expires = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[key]
+
+    def contains(self, key: bytes, now: float) -> bool:
+        expires = self._entries.get(key)
+        return expires is not None and expires > now
+
+    def add(self, key: bytes, now: float) -> None:
+        self._expire(now)
+        self._entries[key] = now + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the table, keys and expiry floats."""
+        per_entry = sys.getsizeof(b"x" * 16) + sys.getsizeof(1.0)
+        return sys.getsizeof(self._entries) + len(self._entries) * per_entry
+
+
+class BloomFilter:
+    """
+    Two-window Bloom filter over a caller-provided or private buffer.
+
+    Buffer layout: two windows, each an int64 epoch followed by the bit array.
+    The current window is ``int(now // window_seconds)``; a window slot whose
+    epoch is stale is cleared when the next key is added to it.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        capacity: int,
+        error_rate: float,
+        buffer=None,
+        lock=None,
+    ):
+        self.window_seconds = window_seconds
+        self.num_bits, self.num_hashes = bloom_parameters(capacity, error_rate)
+        self._window_bytes = (self.num_bits + 7) // 8
+        self._stride = _EPOCH.size + self._window_bytes
+        size = self.buffer_size(capacity, error_rate)
+        self.buf = buffer if buffer is not None else bytearray(size)
+        self._lock = lock if lock is not None else nullcontext()
+
+    @staticmethod
+    def buffer_size(capacity: int, error_rate: float) -> int:
+        bits, _ = bloom_parameters(capacity, error_rate)
+        return 2 * (_EPOCH.size + (bits + 7) // 8)
+
+    def _bits_offset(self, epoch: int, create: bool) -> Optional[int]:
+        """Offset of ``epoch``'s bit array; None if not held. Caller holds lock."""
+        header = (epoch % 2) * self._stride
+        if _EPOCH.unpack_from(self.buf, header)[0] != epoch:
+            if not create:
+                return None
+            start = header + _EPOCH.size
+            self.buf[start : start + self._window_bytes] = bytes(self._window_bytes)
+            _EPOCH.pack_into(self.buf, header, epoch)
+        return header + _EPOCH.size
+
+    def _positions(self, key: bytes):
+        # Kirsch-Mitzenmacher double hashing from the two halves of the key
+        h1, h2 = _HALF.unpack(key[:16])
+        h2 |= 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def contains(self, key: bytes, now: float) -> bool:
+        epoch = int(now // self.window_seconds)
+        positions = self._positions(key)
+        with self._lock:
+            for window in (epoch, epoch - 1):
+                offset = self._bits_offset(window, create=False)
+                if offset is not None and all(
+                    self.buf[offset + (bit >> 3)] & (1 << (bit & 7))
+                    for bit in positions
+                ):
+                    return True
+        return False
+
+    def add(self, key: bytes, now: float) -> None:
+        epoch = int(now // self.window_seconds)
+        positions = self._positions(key)
+        with self._lock:
+            offset = self._bits_offset(epoch, create=True)
+            for bit in positions:
+                self.buf[offset + (bit >> 3)] |= 1 << (bit & 7)
+
+    def memory_bytes(self) -> int:
+        return 2 * self._stride
+
+
+class Deduplicator:
+    """Detect redelivered events and account hit rates."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        backend: str,
+        ttl_seconds: float,
+        max_entries: int,
+        error_rate: float,
+    ):
+        self.enabled = enabled
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.error_rate = error_rate
+        self.shared = False
+        self.checks = 0
+        self.duplicates = 0
+        self.remembered = 0
+        self.without_id = 0
+        if enabled and backend == "bloom":
+            self.store = BloomFilter(ttl_seconds, max_entries, error_rate)
+        else:
+            self.store = TTLCache(ttl_seconds, max_entries)
+
+    @property
+    def shared_buffer_size(self) -> int:
+        """Bytes to reserve in the shared segment for a global filter."""
+        if not self.enabled or self.backend != "bloom":
+            return 0
+        return BloomFilter.buffer_size(self.max_entries, self.error_rate)
+
+    def attach(self, buffer, lock) -> None:
+        """Use a Bloom filter in shared memory so all workers see each key."""
+        if self.backend != "bloom" or buffer is None:
+            return
+        self.store = BloomFilter(
+            self.ttl_seconds, self.max_entries, self.error_rate, buffer, lock
+        )
+        self.shared = True
+
+    def _now(self) -> float:
+        # Bloom windows must agree across processes, so they use wall time
+        return time.time() if self.backend == "bloom" else time.monotonic()
+
+    def is_duplicate(self, tenant: str, event: Dict[str, Any]) -> bool:
+        """True if an event with the same tenant and id was already forwarded."""
+        if not self.enabled:
+            return False
+        key = dedup_key(tenant, event)
+        if key is None:
+            self.without_id += 1
+            return False
+        self.checks += 1
+        if self.store.contains(key, self._now()):
+            self.duplicates += 1
+            return True
+        return False
+
+    def remember(self, tenant: str, event: Dict[str, Any]) -> None:
+        """Record a successfully forwarded event."""
+        if not self.enabled:
+            return
+        key = dedup_key(tenant, event)
+        if key is not None:
+            self.store.add(key, self._now())
+            self.remembered += 1
+
+    def summary(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "backend": self.backend,
+            "shared": self.shared,
+            "ttl_seconds": self.ttl_seconds,
+            "checks": self.checks,
+            "duplicates": self.duplicates,
+            "hit_rate": round(self.duplicates / self.checks, 4) if self.checks else 0.0,
+            "remembered": self.remembered,
+            "without_id": self.without_id,
+            "memory_bytes": self.store.memory_bytes() if self.enabled else 0,
+        }
+        if isinstance(self.store, TTLCache):
+            summary["entries"] = len(self.store)
+            summary["max_entries"] = self.max_entries
+        else:
+            summary["capacity_per_window"] = self.max_entries
+            summary["false_positive_rate"] = self.error_rate
+        return summary
+
+
+def deduplicator_from_config(config) -> Deduplicator:
+    return Deduplicator(
+        enabled=config.dedup_enabled,
+        backend=config.dedup_backend,
+        ttl_seconds=config.dedup_ttl_seconds,
+        max_entries=config.dedup_max_entries,
+        error_rate=config.dedup_error_rate,
+    )
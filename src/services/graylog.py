@@ -1,10 +1,13 @@
 """Graylog service for NB_Streamer."""
 
+import asyncio
 import socket
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 from ..config import config
-from ..models.gelf import GELFMessage
+from ..models.gelf import GELFMessage, SerializedGELFMessage
+from ..models.gelf_encoder import GELFEncoder
 
 
 class GraylogService:
@@ -20,6 +23,15 @@ class GraylogService:
                 else socket.SOCK_STREAM
             ),
         )
+        self.encoder = GELFEncoder()
+        # zlib releases the GIL, so large payloads are compressed on a small
+        # dedicated pool instead of blocking the event loop. Created lazily so
+        # forked workers never inherit a pool whose threads did not survive.
+        self._compress_pool = None
+        self.compressed_inline = 0
+        self.compressed_inline_bytes = 0
+        self.compressed_off_loop = 0
+        self.compressed_off_loop_bytes = 0
 
     def connect(self):
         """Establish connection in case of TCP protocol."""
@@ -34,14 +46,80 @@ class GraylogService:
             message: GELFMessage object to be sent
         """
         # Convert the message to JSON
-        message_json = message.to_json().encode("utf-8")
+        self.send_payload(self.encoder.encode(message))
 
+    def send_payload(self, message_json: bytes):
+        """
+        Send an already serialized GELF message to Graylog.
+
+        Args:
+            message_json: UTF-8 encoded GELF JSON
+        """
         # Compress if needed
         if config.compression_enabled:
+            self.compressed_inline += 1
+            self.compressed_inline_bytes += len(message_json)
             message_json = zlib.compress(message_json)
 
-        # Send the message
-        self.sock.sendto(message_json, (config.graylog_host, config.graylog_port))
+        self.send_raw(message_json)
+
+    def send_raw(self, data: bytes):
+        """Send bytes that are already compressed as configured."""
+        self.sock.sendto(data, (config.graylog_host, config.graylog_port))
+
+    async def encode_payload(self, message_json: bytes) -> bytes:
+        """
+        Compress a serialized GELF message as configured.
+
+        Payloads of at least NB_COMPRESSION_OFFLOAD_MIN_BYTES are compressed
+        on the compression thread pool; smaller ones inline, where a thread
+        hop would cost more than the compression itself.
+
+        Args:
+            message_json: UTF-8 encoded GELF JSON
+
+        Returns:
+            bytes: Wire payload ready for send_raw
+        """
+        if not config.compression_enabled:
+            return message_json
+
+        size = len(message_json)
+        if config.compression_threads and size >= config.compression_offload_min_bytes:
+            if self._compress_pool is None:
+                self._compress_pool = ThreadPoolExecutor(
+                    max_workers=config.compression_threads,
+                    thread_name_prefix="gelf-compress",
+                )
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(
+                self._compress_pool, zlib.compress, message_json
+            )
+            self.compressed_off_loop += 1
+            self.compressed_off_loop_bytes += size
+            return compressed
+
+        self.compressed_inline += 1
+        self.compressed_inline_bytes += size
+        return zlib.compress(message_json)
+
+    def compression_summary(self) -> dict:
+        """Counters for /stats; byte counts are uncompressed input sizes."""
+        return {
+            "enabled": config.compression_enabled,
+            "threads": config.compression_threads,
+            "offload_min_bytes": config.compression_offload_min_bytes,
+            "inline": self.compressed_inline,
+            "inline_bytes": self.compressed_inline_bytes,
+            "off_loop": self.compressed_off_loop,
+            "off_loop_bytes": self.compressed_off_loop_bytes,
+        }
+
+    def shutdown(self):
+        """Stop the compression thread pool."""
+        if self._compress_pool is not None:
+            self._compress_pool.shutdown(wait=True)
+            self._compress_pool = None
 
     def close(self):
         """Close the socket connection."""
@@ -50,28 +128,34 @@ class GraylogService:
     async def forward_event(self, transformed_event: dict) -> bool:
         """
         Forward an event to Graylog.
-        
+
         Args:
             transformed_event: Dictionary containing the transformed event data
-            
+
         Returns:
             bool: True if successful, False otherwise
         """
         try:
             # Create GELF message from transformed event
             from ..models.gelf import GELFMessage
+
             gelf_message = transformed_event
-            
+
             # Connect if using TCP
             self.connect()
-            
-            # Send the message
-            self.send_gelf_message(gelf_message)
-            
+
+            # Serialize, compress (off the loop when large) and send
+            if isinstance(gelf_message, SerializedGELFMessage):
+                message_json = gelf_message.payload
+            else:
+                message_json = self.encoder.encode(gelf_message)
+            self.send_raw(await self.encode_payload(message_json))
+
             return True
         except Exception as e:
             # Log the error but don't raise - return False to indicate failure
             import logging
+
             logger = logging.getLogger(__name__)
             logger.error(f"Failed to forward event to Graylog: {str(e)}")
             return False
@@ -0,0 +1,167 @@
+"""
+Process-pool offload for oversized or CPU-heavy event transforms.
+
+Most NetBird events are small and are transformed inline on the event loop.
+An event with a huge ``meta`` (many peers or routes) spends a long time in
+``parse_go_map``, ``flatten_dict`` and ``json.dumps`` and would stall every
+other request, so the ``TransformDispatcher`` sends such events to a
+``ProcessPoolExecutor``. Pool workers import the transform code once at
+start-up and return the GELF message already serialized to bytes.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple, Union
+
+from ..models.gelf import GELFMessage, SerializedGELFMessage
+
+logger = logging.getLogger(__name__)
+
+# Set in pool worker processes by _init_worker
+_worker_transformer = None
+_worker_encoder = None
+
+
+def _init_worker() -> None:
+    """Pre-import the transform pipeline in a pool worker."""
+    global _worker_transformer, _worker_encoder
+    from ..models.gelf_encoder import GELFEncoder
+    from .transformer import TransformerService
+
+    _worker_transformer = TransformerService()
+    _worker_encoder = GELFEncoder()
+
+
+def _transform_in_worker(
+    raw_event_data: Dict[str, Any], tenant: str
+) -> Tuple[int, bytes]:
+    """Transform and serialize one event inside a pool worker."""
+    message = _worker_transformer.transform(raw_event_data, tenant)
+    return message.level, _worker_encoder.encode(message)
+
+
+def _noop() -> None:
+    """Submitted at start-up so workers are spawned before traffic arrives."""
+
+
+def event_complexity(raw_event_data: Dict[str, Any]) -> int:
+    """
+    Cheap estimate of how many fields an event will flatten into.
+
+    Counts top-level keys plus the entries of structured values; Go map
+    strings (``map[k:v ...]``) are estimated from their ``:`` separators.
+    """
+    complexity = len(raw_event_data)
+    for value in raw_event_data.values():
+        if isinstance(value, str):
+            if value.startswith("map["):
+                complexity += value.count(":")
+        elif isinstance(value, (dict, list)):
+            complexity += len(value)
+    return complexity
+
+
+class TransformDispatcher:
+    """Run small transforms inline and heavy ones in a process pool."""
+
+    def __init__(
+        self,
+        transformer,
+        enabled: bool,
+        workers: int,
+        min_bytes: int,
+        min_fields: int,
+    ):
+        self.transformer = transformer
+        self.enabled = enabled
+        self.workers = workers
+        self.min_bytes = min_bytes
+        self.min_fields = min_fields
+        self.inline = 0
+        self.offloaded = 0
+        self.offload_failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Create the pool and spawn its workers ahead of traffic."""
+        if not self.enabled or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_worker,
+        )
+        for _ in range(self.workers):
+            self._pool.submit(_noop)
+        logger.info(f"Transform offload pool started with {self.workers} workers")
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def is_heavy(self, raw_event_data: Dict[str, Any], size: int) -> bool:
+        return size >= self.min_bytes or (
+            event_complexity(raw_event_data) >= self.min_fields
+        )
+
+    async def transform(
+        self, raw_event_data: Dict[str, Any], tenant: str, size: int
+    ) -> Union[GELFMessage, SerializedGELFMessage]:
+        """
+        Transform an event, offloading it when it is large or complex.
+
+        Returns:
+            GELFMessage for inline transforms, SerializedGELFMessage for
+            offloaded ones; both are accepted by GraylogService.forward_event
+        """
+        if self._pool is None or not self.is_heavy(raw_event_data, size):
+            self.inline += 1
+            return await self.transformer.transform_event(raw_event_data, tenant)
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            level, payload = await loop.run_in_executor(
+                self._pool, _transform_in_worker, raw_event_data, tenant
+            )
+            self.offloaded += 1
+            return SerializedGELFMessage(level=level, payload=payload)
+        except BrokenProcessPool:
+            logger.error("Transform offload pool broke; recreating it")
+            self.offload_failures += 1
+            self._pool = None
+            self.start()
+        except Exception as e:
+            logger.error(f"Offloaded transform failed, retrying inline: {e}")
+            self.offload_failures += 1
+        finally:
+            self.in_flight -= 1
+
+        self.inline += 1
+        return await self.transformer.transform_event(raw_event_data, tenant)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._pool is not None,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilisation": (
+                round(min(self.in_flight / self.workers, 1.0), 3)
+                if self.workers
+                else 0.0
+            ),
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "offload_failures": self.offload_failures,
+            "min_bytes": self.min_bytes,
+            "min_fields": self.min_fields,
+        }
@@ -0,0 +1,184 @@
+"""
+Shape-keyed transform plans for repeated event structures.
+
+Events produced by one NetBird webhook template share the same key
+structure, yet ``flatten_dict`` rebuilds every key path with string
+formatting and ``enhance_address_fields`` runs its substring tests against
+every key, for every event. A ``TransformPlan`` records, for one structure
+(and field projection), the value paths and flattened names of all leaves,
+the conversions applied to them, the fields eligible for an IP:port split and
+the final ``_NB_*`` output names. Events with a known shape go straight to
+value extraction.
+
+Plans reproduce ``flatten_dict`` followed by ``enhance_address_fields``
+exactly, including key order and later-key-wins collisions.
+"""
+
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models.gelf import is_address_field, parse_ip_port, port_field_name
+
+Path = Tuple[Any, ...]
+
+
+def event_shape(data: Dict[str, Any]) -> Tuple:
+    """Hashable signature of the key structure and leaf kinds of ``data``."""
+    signature = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            signature.append((key, event_shape(value)))
+        elif isinstance(value, list):
+            if len(value) > 0 and all(isinstance(item, dict) for item in value):
+                signature.append((key, ("[", tuple(event_shape(i) for i in value))))
+            else:
+                signature.append((key, "L"))
+        elif value is None:
+            signature.append((key, None))
+        elif isinstance(value, datetime):
+            signature.append((key, "t"))
+        else:
+            signature.append((key, "v"))
+    return tuple(signature)
+
+
+def _isoformat(value: datetime) -> str:
+    return value.isoformat()
+
+
+def _lookup(data: Any, path: Path) -> Any:
+    for step in path:
+        data = data[step]
+    return data
+
+
+class TransformPlan:
+    """Precomputed flattening and naming for one event shape."""
+
+    __slots__ = ("leaves", "dropped", "address_fields", "names")
+
+    def __init__(self, data: Dict[str, Any], projection=None):
+        self.leaves: List[Tuple[Path, str, Callable[[Any], str]]] = []
+        self.dropped: List[Tuple[Path, str]] = []
+        self._walk(data, "", (), projection)
+
+        flat_keys = list(dict.fromkeys(key for _, key, _ in self.leaves))
+        self.address_fields = [
+            (key, port_field_name(key)) for key in flat_keys if is_address_field(key)
+        ]
+        self.names: Dict[str, Optional[str]] = {}
+        for key in flat_keys + [port for _, port in self.address_fields]:
+            if projection is None:
+                self.names[key] = f"_NB_{key}"
+            elif projection.includes(key):
+                self.names[key] = f"_NB_{projection.rename.get(key, key)}"
+            else:
+                self.names[key] = None
+
+    def _walk(self, data: Dict[str, Any], parent_key: str, path: Path, projection):
+        # Mirrors flatten_dict, recording paths instead of values
+        for key, value in data.items():
+            new_key = f"{parent_key}_{key}" if parent_key else key
+            value_path = path + (key,)
+
+            if projection is not None and value is not None:
+                subtree = isinstance(value, dict) or (
+                    isinstance(value, list)
+                    and len(value) > 0
+                    and all(isinstance(item, dict) for item in value)
+                )
+                if subtree:
+                    excluded = projection.prunes(new_key)
+                else:
+                    excluded = not projection.includes(new_key)
+                if excluded:
+                    self.dropped.append((value_path, new_key))
+                    continue
+
+            if isinstance(value, dict):
+                self._walk(value, new_key, value_path, projection)
+            elif isinstance(value, list):
+                if len(value) > 0 and all(isinstance(item, dict) for item in value):
+                    for i, item in enumerate(value):
+                        self._walk(
+                            item, f"{new_key}_{i}", value_path + (i,), projection
+                        )
+                else:
+                    self.leaves.append((value_path, new_key, json.dumps))
+            elif isinstance(value, datetime):
+                self.leaves.append((value_path, new_key, _isoformat))
+            elif value is None:
+                continue
+            else:
+                self.leaves.append((value_path, new_key, str))
+
+    def apply(self, data: Dict[str, Any], projection=None) -> Dict[str, str]:
+        """Flattened and address-enhanced fields of ``data``."""
+        fields: Dict[str, str] = {}
+        for path, key, convert in self.leaves:
+            value = data
+            for step in path:
+                value = value[step]
+            fields[key] = convert(value)
+
+        if projection is not None:
+            for path, key in self.dropped:
+                projection.dropped(key, _lookup(data, path))
+
+        for key, port_key in self.address_fields:
+            ip, port = parse_ip_port(fields[key])
+            if port is not None:
+                fields[key] = ip
+                fields[port_key] = port
+        return fields
+
+
+class TransformPlanCache:
+    """LRU cache of transform plans keyed by projection and event shape."""
+
+    def __init__(self, max_plans: int):
+        self.max_plans = max_plans
+        self._plans: "OrderedDict[Tuple, TransformPlan]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def plan_for(self, data: Dict[str, Any], projection=None) -> TransformPlan:
+        key = (
+            projection.plan_key if projection is not None else None,
+            event_shape(data),
+        )
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+        self.misses += 1
+        plan = TransformPlan(data, projection)
+        self._plans[key] = plan
+        if len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+            self.evictions += 1
+        return plan
+
+    def fields(
+        self, data: Dict[str, Any], projection=None
+    ) -> Tuple[Dict[str, str], Dict[str, Optional[str]]]:
+        """Enhanced flattened fields and their ``_NB_*`` output names."""
+        plan = self.plan_for(data, projection)
+        return plan.apply(data, projection), plan.names
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "plans": len(self._plans),
+            "max_plans": self.max_plans,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,142 @@
+"""
+Statistical stack sampling profiler for NB_Streamer.
+
+A background thread periodically snapshots the stacks of all other threads
+via ``sys._current_frames()`` and counts identical stacks. Output uses the
+collapsed-stack format understood by flamegraph.pl, speedscope and similar
+tools: one ``frame;frame;frame count`` line per distinct stack.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(code) -> str:
+    """Render a code object as a flamegraph frame label."""
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def collapse_stack(frame, thread_name: str, max_depth: int = 128) -> str:
+    """Collapse a frame chain into ``thread;outermost;...;innermost``."""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name)
+    labels.reverse()
+    return ";".join(labels)
+
+
+def format_collapsed(counts: Counter) -> str:
+    """Format stack counts as collapsed-stack text, hottest stacks first."""
+    return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+
+
+class StackSampler:
+    """Thread-based sampler that counts collapsed stacks of all other threads."""
+
+    def __init__(self, interval: float, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nb-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id, f"thread-{thread_id}")
+                self._record(collapse_stack(frame, name, self.max_depth))
+            self.samples += 1
+
+    def _record(self, stack: str) -> None:
+        self.counts[stack] += 1
+
+    def collapsed(self) -> str:
+        return format_collapsed(self.counts)
+
+
+class RollingStackSampler(StackSampler):
+    """
+    Always-on sampler keeping a rolling aggregate over the last few windows.
+
+    Samples are counted into the current window; once a window has elapsed it
+    is retired into a fixed-length deque, so memory stays bounded by
+    ``windows`` times the number of distinct stacks per window.
+    """
+
+    def __init__(
+        self, interval: float, window_seconds: float, windows: int, max_depth: int = 128
+    ):
+        super().__init__(interval, max_depth)
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._windows: Deque[Tuple[float, Counter]] = deque(maxlen=windows)
+        self._window_start = time.monotonic()
+
+    def _record(self, stack: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_seconds:
+                self._windows.append((self._window_start, self.counts))
+                self.counts = Counter()
+                self._window_start = now
+            self.counts[stack] += 1
+
+    def aggregate(self) -> Counter:
+        """Sum the retained windows and the current partial window."""
+        with self._lock:
+            total: Counter = Counter()
+            for _, window in self._windows:
+                total.update(window)
+            total.update(self.counts)
+            return total
+
+    def collapsed(self) -> str:
+        return format_collapsed(self.aggregate())
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            retained = len(self._windows)
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval_seconds": self.interval,
+            "window_seconds": self.window_seconds,
+            "windows_retained": retained,
+        }
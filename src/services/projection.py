@@ -0,0 +1,222 @@
+"""
+Per-tenant field projection for GELF messages.
+
+Every flattened key of an event becomes an ``_NB_*`` field, including noisy
+ones, which inflates messages and the number of indexed fields in Graylog.
+Projections restrict and rename those fields per tenant. They are loaded
+from the JSON file named by ``NB_PROJECTION_FILE``::
+
+    {
+      "default": {"deny": ["meta_raw*"]},
+      "tenants": {
+        "acme": {
+          "allow": ["ID", "Message", "InitiatorID", "TargetID", "meta_*"],
+          "deny": ["meta_os_*"],
+          "rename": {"InitiatorID": "user"},
+          "full_message": false
+        }
+      }
+    }
+
+Patterns are globs over flattened key names without the ``_NB_`` prefix. A
+tenant's projection replaces the default one. The compiled projection is
+consulted inside ``flatten_dict``, so excluded subtrees and fields are never
+flattened, stringified or serialized.
+
+Events, dropped fields and bytes saved are reported per tenant. Tenants served
+by the default rule share its compiled patterns but get their own counters,
+for up to ``MAX_DEFAULT_TENANTS`` tenants; further tenants are counted under
+``__default__``.
+"""
+
+import copy
+import fnmatch
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Approximate JSON overhead of one custom field: quotes, colon, comma, "_NB_"
+FIELD_OVERHEAD = 10
+# Memoized include decisions per projection; keys are bounded by event shapes
+CACHE_SIZE = 4096
+# Tenants on the default rule with their own counters in the summary
+MAX_DEFAULT_TENANTS = 1000
+
+
+class ProjectionRule(BaseModel):
+    allow: Optional[List[str]] = None
+    deny: List[str] = Field(default_factory=list)
+    rename: Dict[str, str] = Field(default_factory=dict)
+    full_message: bool = True
+
+
+class ProjectionFile(BaseModel):
+    default: Optional[ProjectionRule] = None
+    tenants: Dict[str, ProjectionRule] = Field(default_factory=dict)
+
+
+def _literal_head(pattern: str) -> str:
+    """Part of a glob before its first wildcard."""
+    match = re.search(r"[*?\[]", pattern)
+    return pattern if match is None else pattern[: match.start()]
+
+
+def estimate_size(value: Any) -> int:
+    """Rough serialized size of a value without serializing it."""
+    if isinstance(value, dict):
+        return sum(len(str(k)) + estimate_size(v) + 4 for k, v in value.items())
+    if isinstance(value, list):
+        return sum(estimate_size(item) + 1 for item in value) + 2
+    if isinstance(value, str):
+        return len(value) + 2
+    return len(str(value))
+
+
+class FieldProjection:
+    """A compiled projection with bytes-saved accounting."""
+
+    def __init__(self, rule: ProjectionRule):
+        self.rule = rule
+        self.full_message = rule.full_message
+        self.rename = dict(rule.rename)
+        self._allow = (
+            re.compile("|".join(fnmatch.translate(p) for p in rule.allow))
+            if rule.allow is not None
+            else None
+        )
+        self._deny = (
+            re.compile("|".join(fnmatch.translate(p) for p in rule.deny))
+            if rule.deny
+            else None
+        )
+        self._allow_heads = [_literal_head(p) for p in rule.allow or ()]
+        # "prefix*" deny patterns exclude whole subtrees
+        self._deny_prefixes = [
+            p[:-1] for p in rule.deny if p.endswith("*") and _literal_head(p) == p[:-1]
+        ]
+        self._includes: Dict[str, bool] = {}
+        self._prunes: Dict[str, bool] = {}
+        # Shared by views from for_tenant(), so transform plans stay per rule
+        self.plan_key: "FieldProjection" = self
+        self.events = 0
+        self.fields_dropped = 0
+        self.bytes_saved = 0
+
+    def for_tenant(self) -> "FieldProjection":
+        """A view sharing the compiled rule and caches, with its own counters."""
+        view = copy.copy(self)
+        view.events = 0
+        view.fields_dropped = 0
+        view.bytes_saved = 0
+        return view
+
+    def includes(self, key: str) -> bool:
+        """Whether the flattened field ``key`` is emitted."""
+        decision = self._includes.get(key)
+        if decision is None:
+            decision = (self._allow is None or self._allow.match(key) is not None) and (
+                self._deny is None or self._deny.match(key) is None
+            )
+            if len(self._includes) >= CACHE_SIZE:
+                self._includes.clear()
+            self._includes[key] = decision
+        return decision
+
+    def prunes(self, key: str) -> bool:
+        """Whether no field under the nested ``key`` can be emitted."""
+        decision = self._prunes.get(key)
+        if decision is None:
+            prefix = f"{key}_"
+            denied = any(prefix.startswith(head) for head in self._deny_prefixes)
+            allowed = self._allow is None or any(
+                head.startswith(prefix) or prefix.startswith(head)
+                for head in self._allow_heads
+            )
+            decision = denied or not allowed
+            if len(self._prunes) >= CACHE_SIZE:
+                self._prunes.clear()
+            self._prunes[key] = decision
+        return decision
+
+    def dropped(self, key: str, value: Any) -> None:
+        """Account a field or subtree that was not emitted."""
+        self.fields_dropped += 1
+        self.bytes_saved += len(key) + estimate_size(value) + FIELD_OVERHEAD
+
+    def emitted(self, with_full_message: bool, event_data: Dict[str, Any]) -> None:
+        """Account one built message, including an omitted full_message."""
+        self.events += 1
+        if not with_full_message:
+            self.bytes_saved += estimate_size(event_data)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "fields_dropped": self.fields_dropped,
+            "bytes_saved_estimate": self.bytes_saved,
+        }
+
+
+class Projections:
+    """Compiled projections by tenant."""
+
+    def __init__(
+        self,
+        projections: Optional[ProjectionFile] = None,
+        max_default_tenants: int = MAX_DEFAULT_TENANTS,
+    ):
+        projections = projections or ProjectionFile()
+        self.default = (
+            FieldProjection(projections.default) if projections.default else None
+        )
+        self.tenants = {
+            tenant.lower(): FieldProjection(rule)
+            for tenant, rule in projections.tenants.items()
+        }
+        self.max_default_tenants = max_default_tenants
+        self._defaulted: Dict[str, FieldProjection] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.default is not None or bool(self.tenants)
+
+    def get(self, tenant: Optional[str]) -> Optional[FieldProjection]:
+        projection = self.tenants.get(tenant) if tenant is not None else None
+        if projection is not None or self.default is None or tenant is None:
+            return projection or self.default
+        projection = self._defaulted.get(tenant)
+        if projection is None:
+            if len(self._defaulted) >= self.max_default_tenants:
+                return self.default
+            projection = self._defaulted[tenant] = self.default.for_tenant()
+        return projection
+
+    def summary(self) -> Dict[str, Any]:
+        tenants = {tenant: p.summary() for tenant, p in self.tenants.items()}
+        tenants.update((tenant, p.summary()) for tenant, p in self._defaulted.items())
+        if self.default is not None:
+            # Tenants beyond max_default_tenants
+            tenants["__default__"] = self.default.summary()
+        return {"enabled": self.enabled, "tenants": tenants}
+
+
+def projections_from_config(config) -> Projections:
+    """Load and compile the projection file named by NB_PROJECTION_FILE, if any."""
+    if not config.projection_file:
+        return Projections()
+    try:
+        with open(config.projection_file, encoding="utf-8") as f:
+            data = ProjectionFile.model_validate(json.load(f))
+        projections = Projections(data)
+    except (OSError, ValueError, re.error) as e:
+        raise ValueError(f"Invalid NB_PROJECTION_FILE {config.projection_file}: {e}")
+    logger.info(
+        f"Loaded field projections for {len(data.tenants)} tenants "
+        f"from {config.projection_file}"
+    )
+    return projections
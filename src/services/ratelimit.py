@@ -0,0 +1,258 @@
+"""
+In-process token bucket rate limiting for NB_Streamer.
+
+Limits are applied per tenant (events/s and bytes/s) and globally. Tenant
+buckets live on the tenant's ``TenantState`` so a lookup is a single dict
+access; the limiter itself only holds the policy and the global buckets.
+Policies can be swapped at runtime with ``RateLimiter.configure``; existing
+buckets pick up the new rates lazily on their next check. In multi-worker
+mode the buckets and settings are moved into shared memory (see
+``services.shared_state``) so limits hold across all workers.
+"""
+
+import json
+import logging
+import math
+import time
+from contextlib import nullcontext
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .tenants import TenantState
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(BaseModel):
+    """Sustained rates for one scope; 0 disables the corresponding limit."""
+
+    events_per_second: float = Field(default=0.0, ge=0)
+    bytes_per_second: float = Field(default=0.0, ge=0)
+
+
+class RateLimitSettings(BaseModel):
+    """Complete, hot-swappable rate limit configuration."""
+
+    enabled: bool = False
+    burst_seconds: float = Field(default=1.0, gt=0)
+    global_limits: RateLimitPolicy = Field(default_factory=RateLimitPolicy)
+    tenant: RateLimitPolicy = Field(default_factory=RateLimitPolicy)
+    overrides: Dict[str, RateLimitPolicy] = Field(default_factory=dict)
+
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second up to ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def reconfigure(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = min(self.tokens, capacity)
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Refill and return the seconds until ``amount`` tokens are available."""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A single request larger than the burst needs a full bucket.
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.rate > 0:
+            self.tokens -= min(amount, self.capacity)
+
+
+def _limits(
+    policy: RateLimitPolicy, burst_seconds: float
+) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """(rate, capacity) pairs for the events and bytes buckets of ``policy``."""
+    events_rate = policy.events_per_second
+    bytes_rate = policy.bytes_per_second
+    return (
+        (events_rate, max(events_rate * burst_seconds, 1.0)),
+        (bytes_rate, max(bytes_rate * burst_seconds, 1.0)),
+    )
+
+
+class RateLimiter:
+    """Per-tenant and global admission control using token buckets."""
+
+    def __init__(self, settings: RateLimitSettings):
+        self.limited = 0
+        self.limited_by_scope: Dict[str, int] = {"global": 0, "tenant": 0}
+        self.generation = 0
+        self.shared = None
+        self._shared_generation = 0
+        self._lock = nullcontext()
+        self.configure(settings)
+
+    def attach(self, shared) -> None:
+        """
+        Move bucket state and settings into a ``SharedState`` segment.
+
+        Used by multi-worker deployments so limits are enforced globally. The
+        first worker to attach publishes its settings; later ones adopt them.
+        Must be called before the first check.
+        """
+        self.shared = shared
+        self._lock = shared.lock
+        with self._lock:
+            if shared.settings_generation() == 0:
+                self._shared_generation = shared.publish_settings(
+                    self.settings.model_dump_json().encode()
+                )
+            self._apply(self.settings)
+
+    def configure(self, settings: RateLimitSettings) -> None:
+        """Atomically replace the active policy (for all workers, if shared)."""
+        with self._lock:
+            if self.shared is not None:
+                self._shared_generation = self.shared.publish_settings(
+                    settings.model_dump_json().encode()
+                )
+            self._apply(settings)
+        logger.info(
+            f"Rate limiting {'enabled' if settings.enabled else 'disabled'} "
+            f"(generation {self.generation})"
+        )
+
+    def _apply(self, settings: RateLimitSettings) -> None:
+        self.settings = settings
+        self.generation += 1
+        events, nbytes = _limits(settings.global_limits, settings.burst_seconds)
+        if self.shared is not None:
+            self._global = self.shared.global_buckets(events, nbytes)
+        else:
+            now = time.monotonic()
+            self._global = (TokenBucket(*events, now), TokenBucket(*nbytes, now))
+
+    def _sync_shared_settings(self) -> None:
+        """Adopt settings published by another worker. Caller holds lock."""
+        if self.shared.settings_generation() == self._shared_generation:
+            return
+        self._shared_generation, data = self.shared.read_settings()
+        self._apply(RateLimitSettings.model_validate_json(data))
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.enabled
+
+    def policy_for(self, tenant: str) -> RateLimitPolicy:
+        return self.settings.overrides.get(tenant, self.settings.tenant)
+
+    def _tenant_buckets(
+        self, state: TenantState, now: float
+    ) -> Tuple[TokenBucket, TokenBucket]:
+        cached = state.rate_buckets
+        if cached is not None and cached[0] == self.generation:
+            return cached[1], cached[2]
+
+        events, nbytes = _limits(
+            self.policy_for(state.name), self.settings.burst_seconds
+        )
+        if cached is None:
+            if self.shared is not None:
+                events_bucket, bytes_bucket = self.shared.tenant_buckets(
+                    state.name, events, nbytes
+                )
+            else:
+                events_bucket = TokenBucket(*events, now)
+                bytes_bucket = TokenBucket(*nbytes, now)
+        else:
+            events_bucket, bytes_bucket = cached[1], cached[2]
+            events_bucket.reconfigure(*events)
+            bytes_bucket.reconfigure(*nbytes)
+        state.rate_buckets = (self.generation, events_bucket, bytes_bucket)
+        return events_bucket, bytes_bucket
+
+    def check(self, state: TenantState, size: int) -> float:
+        """
+        Admit one event of ``size`` bytes for the tenant owning ``state``.
+
+        Tokens are only taken when every bucket admits the event.
+
+        Returns:
+            float: 0.0 if admitted, otherwise seconds until a retry could succeed
+        """
+        with self._lock:
+            if self.shared is not None:
+                self._sync_shared_settings()
+            if not self.settings.enabled:
+                return 0.0
+            return self._check(state, size)
+
+    def _check(self, state: TenantState, size: int) -> float:
+        now = time.monotonic()
+        tenant_events, tenant_bytes = self._tenant_buckets(state, now)
+        global_events, global_bytes = self._global
+
+        tenant_wait = max(
+            tenant_events.wait_time(1, now), tenant_bytes.wait_time(size, now)
+        )
+        global_wait = max(
+            global_events.wait_time(1, now), global_bytes.wait_time(size, now)
+        )
+        if tenant_wait or global_wait:
+            self.limited += 1
+            state.limited += 1
+            self.limited_by_scope["tenant" if tenant_wait else "global"] += 1
+            return max(tenant_wait, global_wait)
+
+        tenant_events.consume(1)
+        tenant_bytes.consume(size)
+        global_events.consume(1)
+        global_bytes.consume(size)
+        return 0.0
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "enabled": self.settings.enabled,
+            "generation": self.generation,
+            "limited": self.limited,
+            "limited_by_scope": dict(self.limited_by_scope),
+        }
+
+
+def retry_after_header(wait: float) -> str:
+    """Format a wait time as an HTTP Retry-After delta-seconds value."""
+    return str(max(1, math.ceil(wait)))
+
+
+def settings_from_config(config) -> RateLimitSettings:
+    """Build the initial rate limit settings from environment configuration."""
+    overrides: Dict[str, RateLimitPolicy] = {}
+    if config.rate_limit_overrides:
+        try:
+            raw: Optional[dict] = json.loads(config.rate_limit_overrides)
+            overrides = {
+                tenant.lower(): RateLimitPolicy(**policy)
+                for tenant, policy in (raw or {}).items()
+            }
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid NB_RATE_LIMIT_OVERRIDES: {e}")
+
+    return RateLimitSettings(
+        enabled=config.rate_limit_enabled,
+        burst_seconds=config.rate_limit_burst_seconds,
+        global_limits=RateLimitPolicy(
+            events_per_second=config.rate_limit_global_events_per_second,
+            bytes_per_second=config.rate_limit_global_bytes_per_second,
+        ),
+        tenant=RateLimitPolicy(
+            events_per_second=config.rate_limit_tenant_events_per_second,
+            bytes_per_second=config.rate_limit_tenant_bytes_per_second,
+        ),
+        overrides=overrides,
+    )
@@ -0,0 +1,190 @@
+"""
+Startup readiness for NB_Streamer.
+
+``/health`` only says the process is up. ``/ready`` stays unready until a
+list of warm-up steps has completed once:
+
+* ``models``: a sample event goes through ``NetbirdEvent``,
+  ``GELFMessage.from_netbird_event`` and the GELF encoder, so pydantic
+  validators and serializers are built before the first real event;
+* ``regexes``: the Go timestamp, Go map and IP:port parsers run once, filling
+  the ``re`` module's pattern cache;
+* ``json_codec``: the JSON codec is loaded and reported (the ``json`` C
+  accelerator, or a warning when only the pure-Python fallback exists);
+* ``transport``: the Graylog address resolves (UDP) or accepts a connection
+  (TCP).
+
+Failed steps are retried every ``NB_READY_RETRY_SECONDS`` until they pass.
+Import and startup durations are kept for ``/stats``.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import socket
+import time
+from json import decoder as json_decoder
+from json import encoder as json_encoder
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from ..models.gelf import (
+    GELFMessage,
+    convert_go_timestamp_to_iso,
+    parse_go_map,
+    parse_ip_port,
+    parse_json_fields,
+)
+from ..models.gelf_encoder import GELFEncoder
+from ..models.netbird import NetbirdEvent
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[], Union[Any, Awaitable[Any]]]
+
+WARM_UP_EVENT = {
+    "ID": "warm-up",
+    "Timestamp": "2025-08-28T23:04:20.987Z",
+    "Message": "Readiness warm-up",
+    "InitiatorID": "warm-up@nb-streamer",
+    "TargetID": "warm-up",
+    "meta": (
+        "map[source_addr:10.0.0.1:51820 peer_name:warm-up "
+        "created_at:2025-08-28 23:04:20.987654321 +0000 UTC]"
+    ),
+}
+
+
+def warm_models() -> None:
+    """Build and serialize one GELF message from a representative event."""
+    event = NetbirdEvent.from_raw_json(parse_json_fields(dict(WARM_UP_EVENT)))
+    message = GELFMessage.from_netbird_event(
+        event.dict(), host="nb_streamer_warm_up", tenant_id="warm_up"
+    )
+    json.loads(GELFEncoder().encode(message))
+
+
+def warm_regexes() -> None:
+    """Run every regex-based parser once so their patterns are compiled."""
+    convert_go_timestamp_to_iso("2025-08-28 23:04:20.987654321 +0000 UTC")
+    parse_go_map("map[key:value other:10.0.0.1:80]")
+    parse_ip_port("10.0.0.1:80")
+    parse_ip_port("[fe80::1]:80")
+
+
+def check_json_codec() -> str:
+    """Name of the JSON codec in use, warning when it is the slow fallback."""
+    json.loads(json.dumps(WARM_UP_EVENT))
+    if json_decoder.c_scanstring is None or json_encoder.c_make_encoder is None:
+        logger.warning("json C accelerator (_json) unavailable, using pure Python")
+        return "json (pure Python)"
+    return "json (C accelerated)"
+
+
+async def probe_transport(protocol: str, host: str, port: int, timeout: float) -> str:
+    """Resolve (UDP) or connect to (TCP) the Graylog input."""
+    if protocol == "tcp":
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=timeout
+        )
+        writer.close()
+        await writer.wait_closed()
+        return f"connected to {host}:{port}"
+
+    loop = asyncio.get_running_loop()
+    addresses = await asyncio.wait_for(
+        loop.getaddrinfo(host, port, type=socket.SOCK_DGRAM), timeout=timeout
+    )
+    return f"resolved {host}:{port} to {addresses[0][4][0]}"
+
+
+def _new_record() -> Dict[str, Any]:
+    return {"ok": False, "attempts": 0, "seconds": None, "result": None}
+
+
+class StartupReadiness:
+    """Track warm-up steps, readiness and import/startup durations."""
+
+    def __init__(self, import_seconds: float, retry_seconds: float):
+        self.import_seconds = import_seconds
+        self.retry_seconds = retry_seconds
+        self.ready = False
+        self.draining = False
+        self.startup_seconds: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._started: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_step(self, name: str, step: Step) -> bool:
+        """Run one step, recording its outcome, duration and attempt count."""
+        record = self.steps.setdefault(name, _new_record())
+        record["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            if record["attempts"] == 1:
+                logger.warning(f"Readiness step {name} failed: {record['error']}")
+            return False
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 6)
+        record["ok"] = True
+        record["result"] = result
+        record.pop("error", None)
+        return True
+
+    async def warm_up(self, steps: List[Tuple[str, Step]]) -> None:
+        """Run ``steps`` until every one has passed, then become ready."""
+        if self._started is None:
+            self._started = time.perf_counter()
+        pending = list(steps)
+        while True:
+            pending = [
+                (name, step)
+                for name, step in pending
+                if not await self.run_step(name, step)
+            ]
+            if not pending:
+                break
+            await asyncio.sleep(self.retry_seconds)
+
+        self.startup_seconds = round(time.perf_counter() - self._started, 6)
+        self.ready = True
+        logger.info(
+            f"Ready after {self.startup_seconds:.3f}s "
+            f"(imports took {self.import_seconds:.3f}s)"
+        )
+
+    def start(self, steps: List[Tuple[str, Step]]) -> None:
+        """Start warming up in the background on the running event loop."""
+        self._started = time.perf_counter()
+        for name, _ in steps:
+            self.steps.setdefault(name, _new_record())
+        self._task = asyncio.get_running_loop().create_task(self.warm_up(steps))
+
+    async def stop(self) -> None:
+        """Report unready from now on and cancel any warm-up still running."""
+        self.ready = False
+        self.draining = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def pending_steps(self) -> List[str]:
+        return [name for name, record in self.steps.items() if not record["ok"]]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "import_seconds": round(self.import_seconds, 6),
+            "startup_seconds": self.startup_seconds,
+            "steps": self.steps,
+        }
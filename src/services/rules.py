@@ -0,0 +1,226 @@
+"""
+Per-tenant filtering and sampling rules for NB_Streamer.
+
+Rules decide whether an event is forwarded at all, before any model is
+built or the event is transformed. They are loaded from the JSON file named
+by ``NB_RULES_FILE``::
+
+    {
+      "default": [
+        {"name": "no-dns", "action": "drop",
+         "match": {"activity": ["dns.setting.update"]}}
+      ],
+      "tenants": {
+        "acme": [
+          {"action": "sample", "rate": 0.1,
+           "match": {"message": "^Peer .* connected$", "initiator": ["svc-*"]}},
+          {"action": "keep", "match": {"max_level": 4}}
+        ]
+      }
+    }
+
+A tenant's own rules are evaluated first, then the defaults; the first rule
+whose conditions all match decides, and unmatched events are kept. Each rule
+is compiled once into a list of predicate closures over the raw event dict.
+Sampling hashes the tenant and event id, so every replica makes the same
+decision for the same event.
+"""
+
+import fnmatch
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ..models.gelf import syslog_level
+from .aggregator import activity_code
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+_HASH_SPACE = float(1 << 64)
+
+
+class RuleMatch(BaseModel):
+    """Conditions of a rule; every condition that is set must hold."""
+
+    activity: Optional[List[str]] = None
+    message: Optional[str] = None
+    initiator: Optional[List[str]] = None
+    target: Optional[List[str]] = None
+    min_level: Optional[int] = Field(default=None, ge=0, le=7)
+    max_level: Optional[int] = Field(default=None, ge=0, le=7)
+
+
+class Rule(BaseModel):
+    name: Optional[str] = None
+    action: Literal["drop", "keep", "sample"]
+    rate: float = Field(default=1.0, ge=0, le=1)
+    match: RuleMatch = Field(default_factory=RuleMatch)
+
+
+class RulesFile(BaseModel):
+    default: List[Rule] = Field(default_factory=list)
+    tenants: Dict[str, List[Rule]] = Field(default_factory=dict)
+
+
+def _glob_predicate(fields: Tuple[str, ...], patterns: List[str]) -> Predicate:
+    regex = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+    def predicate(event: Dict[str, Any]) -> bool:
+        for field in fields:
+            value = event.get(field)
+            if value is not None:
+                return regex.match(str(value)) is not None
+        return False
+
+    return predicate
+
+
+def compile_match(match: RuleMatch) -> List[Predicate]:
+    """Translate rule conditions into predicates over the raw event."""
+    predicates: List[Predicate] = []
+    if match.activity is not None:
+        activities = frozenset(match.activity)
+        predicates.append(lambda event: activity_code(event) in activities)
+    if match.message is not None:
+        message = re.compile(match.message)
+        predicates.append(
+            lambda event: message.search(
+                str(event.get("Message", event.get("message", "")))
+            )
+            is not None
+        )
+    if match.initiator is not None:
+        predicates.append(
+            _glob_predicate(("InitiatorID", "initiator_id", "user"), match.initiator)
+        )
+    if match.target is not None:
+        predicates.append(
+            _glob_predicate(("TargetID", "target_id", "peer"), match.target)
+        )
+    if match.min_level is not None or match.max_level is not None:
+        low = 0 if match.min_level is None else match.min_level
+        high = 7 if match.max_level is None else match.max_level
+        predicates.append(lambda event: low <= syslog_level(event.get("level")) <= high)
+    return predicates
+
+
+def sample_fraction(tenant: str, event: Dict[str, Any]) -> float:
+    """Deterministic position of an event in [0, 1) for sampling."""
+    event_id = event.get("ID", event.get("id"))
+    if event_id is None:
+        event_id = "\0".join(
+            str(event.get(field, ""))
+            for field in ("Timestamp", "timestamp", "Message", "InitiatorID")
+        )
+    digest = hashlib.blake2b(f"{tenant}\0{event_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / _HASH_SPACE
+
+
+class CompiledRule:
+    """A rule with its predicates and per-rule counters."""
+
+    __slots__ = ("id", "action", "rate", "predicates", "matched", "dropped")
+
+    def __init__(self, rule_id: str, rule: Rule):
+        self.id = rule_id
+        self.action = rule.action
+        self.rate = rule.rate
+        self.predicates = compile_match(rule.match)
+        self.matched = 0
+        self.dropped = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        for predicate in self.predicates:
+            if not predicate(event):
+                return False
+        return True
+
+    def keeps(self, tenant: str, event: Dict[str, Any]) -> bool:
+        if self.action == "keep":
+            return True
+        if self.action == "drop":
+            return False
+        return sample_fraction(tenant, event) < self.rate
+
+
+def _compile_list(scope: str, rules: List[Rule]) -> List[CompiledRule]:
+    return [
+        CompiledRule(f"{scope}:{index}:{rule.name or rule.action}", rule)
+        for index, rule in enumerate(rules)
+    ]
+
+
+class EventRules:
+    """Evaluate compiled per-tenant rules against raw events."""
+
+    def __init__(self, rules: Optional[RulesFile] = None):
+        rules = rules or RulesFile()
+        self.default = _compile_list("default", rules.default)
+        self.tenants = {
+            tenant.lower(): _compile_list(tenant.lower(), tenant_rules) + self.default
+            for tenant, tenant_rules in rules.tenants.items()
+        }
+        self.evaluated = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.default or self.tenants)
+
+    def keep(self, tenant: str, event: Dict[str, Any]) -> bool:
+        """True if the event should be forwarded."""
+        rules = self.tenants.get(tenant, self.default)
+        if not rules:
+            return True
+        self.evaluated += 1
+        for rule in rules:
+            if rule.matches(event):
+                rule.matched += 1
+                if rule.keeps(tenant, event):
+                    return True
+                rule.dropped += 1
+                self.dropped += 1
+                return False
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        rules = {rule.id: rule for rule in self.default}
+        for tenant_rules in self.tenants.values():
+            rules.update((rule.id, rule) for rule in tenant_rules)
+        return {
+            "enabled": self.enabled,
+            "evaluated": self.evaluated,
+            "dropped": self.dropped,
+            "rules": {
+                rule_id: {
+                    "action": rule.action,
+                    "rate": rule.rate,
+                    "matched": rule.matched,
+                    "dropped": rule.dropped,
+                }
+                for rule_id, rule in rules.items()
+            },
+        }
+
+
+def rules_from_config(config) -> EventRules:
+    """Load and compile the rules file named by NB_RULES_FILE, if any."""
+    if not config.rules_file:
+        return EventRules()
+    try:
+        with open(config.rules_file, encoding="utf-8") as f:
+            rules = RulesFile.model_validate(json.load(f))
+        compiled = EventRules(rules)
+    except (OSError, ValueError, re.error) as e:
+        raise ValueError(f"Invalid NB_RULES_FILE {config.rules_file}: {e}")
+    logger.info(
+        f"Loaded {len(rules.default)} default rules and rules for "
+        f"{len(rules.tenants)} tenants from {config.rules_file}"
+    )
+    return compiled
@@ -0,0 +1,231 @@
+"""
+Shared-memory state for multi-worker NB_Streamer deployments.
+
+When NB_Streamer runs several worker processes, counters and rate limit
+buckets must be global or ``/stats`` and limits would only describe the
+worker that happened to serve a request. The master process creates one
+shared memory segment and one lock before forking; every worker inherits
+both and reads/writes the segment with ``struct``.
+
+Segment layout::
+
+    counters        len(COUNTERS) x int64
+    last event      float64 (unix time)
+    settings        generation int64, length int64, SETTINGS_MAX bytes
+    global buckets  2 x (tokens float64, updated float64)
+    tenant slots    tenant_slots x (key uint64, 4 x float64)
+    overflow slot   key uint64, 4 x float64
+    dedup filter    dedup_bytes (see ``services.dedup.BloomFilter``)
+
+Token bucket timestamps use ``time.monotonic()``, which on Linux is the
+system-wide CLOCK_MONOTONIC and therefore comparable across workers. A
+zeroed bucket refills to capacity on first use, so fresh slots start full.
+
+Slots are never freed. Tenants that cannot claim a slot within ``MAX_PROBES``
+share the overflow slot after the hashed range, which no tenant can claim,
+so a full table never drains the buckets of a tenant that owns a slot.
+"""
+
+import hashlib
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from .ratelimit import TokenBucket
+
+COUNTERS = (
+    "received",
+    "forwarded",
+    "failed",
+    "rate_limited",
+    "deduplicated",
+    "tenant_slot_overflows",
+    *(f"level_{level}" for level in range(8)),
+)
+SETTINGS_MAX = 64 * 1024
+# Linear probing distance before a tenant falls back to the overflow slot
+MAX_PROBES = 8
+
+_INT = struct.Struct("q")
+_FLOAT = struct.Struct("d")
+_BUCKET = struct.Struct("dd")
+_SLOT_KEY = struct.Struct("Q")
+_SLOT_SIZE = _SLOT_KEY.size + 2 * _BUCKET.size
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose ``tokens``/``updated`` live in shared memory."""
+
+    __slots__ = ("_buf", "_offset")
+
+    def __init__(self, buf: memoryview, offset: int, rate: float, capacity: float):
+        self._buf = buf
+        self._offset = offset
+        self.rate = rate
+        self.capacity = capacity
+
+    @property
+    def tokens(self) -> float:
+        return _FLOAT.unpack_from(self._buf, self._offset)[0]
+
+    @tokens.setter
+    def tokens(self, value: float) -> None:
+        _FLOAT.pack_into(self._buf, self._offset, value)
+
+    @property
+    def updated(self) -> float:
+        return _FLOAT.unpack_from(self._buf, self._offset + _FLOAT.size)[0]
+
+    @updated.setter
+    def updated(self, value: float) -> None:
+        _FLOAT.pack_into(self._buf, self._offset + _FLOAT.size, value)
+
+
+class SharedState:
+    """Counters, settings and rate limit buckets shared by all workers."""
+
+    def __init__(self, tenant_slots: int, dedup_bytes: int = 0):
+        self.tenant_slots = tenant_slots
+        self.dedup_bytes = dedup_bytes
+        self._counters_offset = 0
+        self._last_event_offset = len(COUNTERS) * _INT.size
+        self._settings_offset = self._last_event_offset + _FLOAT.size
+        self._global_offset = self._settings_offset + 2 * _INT.size + SETTINGS_MAX
+        self._slots_offset = self._global_offset + 2 * _BUCKET.size
+        self._overflow_offset = self._slots_offset + tenant_slots * _SLOT_SIZE
+        self._dedup_offset = self._overflow_offset + _SLOT_SIZE
+        size = self._dedup_offset + dedup_bytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.buf = self._shm.buf
+        self.buf[:size] = bytes(size)
+        self.lock = multiprocessing.Lock()
+        self._index = {name: i for i, name in enumerate(COUNTERS)}
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def size(self) -> int:
+        return self._shm.size
+
+    def close(self, unlink: bool = False) -> None:
+        """Release the segment; the master unlinks it on shutdown."""
+        self.buf = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+    # Counters -------------------------------------------------------------
+
+    def _add(self, name: str, amount: int = 1) -> None:
+        offset = self._counters_offset + self._index[name] * _INT.size
+        _INT.pack_into(self.buf, offset, _INT.unpack_from(self.buf, offset)[0] + amount)
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self._add(name, amount)
+
+    def record_event(self, level: int, success: bool, count: int = 1) -> None:
+        """Account ``count`` processed events in a single critical section."""
+        with self.lock:
+            self._add("received", count)
+            self._add("forwarded" if success else "failed", count)
+            if 0 <= level <= 7:
+                self._add(f"level_{level}", count)
+            _FLOAT.pack_into(self.buf, self._last_event_offset, time.time())
+
+    def counters(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                name: _INT.unpack_from(self.buf, i * _INT.size)[0]
+                for i, name in enumerate(COUNTERS)
+            }
+
+    def last_event_time(self) -> Optional[float]:
+        value = _FLOAT.unpack_from(self.buf, self._last_event_offset)[0]
+        return value or None
+
+    # Settings -------------------------------------------------------------
+
+    def settings_generation(self) -> int:
+        return _INT.unpack_from(self.buf, self._settings_offset)[0]
+
+    def publish_settings(self, data: bytes) -> int:
+        """Store serialized settings and bump the generation. Caller holds lock."""
+        if len(data) > SETTINGS_MAX:
+            raise ValueError(f"Settings exceed {SETTINGS_MAX} bytes")
+        start = self._settings_offset + 2 * _INT.size
+        self.buf[start : start + len(data)] = data
+        generation = self.settings_generation() + 1
+        _INT.pack_into(self.buf, self._settings_offset + _INT.size, len(data))
+        _INT.pack_into(self.buf, self._settings_offset, generation)
+        return generation
+
+    def read_settings(self) -> Tuple[int, bytes]:
+        """Return (generation, serialized settings). Caller holds lock."""
+        generation = self.settings_generation()
+        length = _INT.unpack_from(self.buf, self._settings_offset + _INT.size)[0]
+        start = self._settings_offset + 2 * _INT.size
+        return generation, bytes(self.buf[start : start + length])
+
+    # Rate limit buckets ---------------------------------------------------
+
+    def global_buckets(
+        self, events: Tuple[float, float], nbytes: Tuple[float, float]
+    ) -> Tuple[SharedTokenBucket, SharedTokenBucket]:
+        """Views of the global (events, bytes) buckets for (rate, capacity)."""
+        return (
+            SharedTokenBucket(self.buf, self._global_offset, *events),
+            SharedTokenBucket(self.buf, self._global_offset + _BUCKET.size, *nbytes),
+        )
+
+    def _slot_for(self, tenant: str) -> int:
+        """Find or claim the slot for ``tenant``. Caller holds lock."""
+        key = int.from_bytes(
+            hashlib.blake2b(tenant.encode(), digest_size=8).digest(), "little"
+        )
+        key = key or 1  # 0 marks a free slot
+        start = key % self.tenant_slots
+        for probe in range(min(MAX_PROBES, self.tenant_slots)):
+            slot = (start + probe) % self.tenant_slots
+            offset = self._slots_offset + slot * _SLOT_SIZE
+            current = _SLOT_KEY.unpack_from(self.buf, offset)[0]
+            if current == key:
+                return offset
+            if current == 0:
+                _SLOT_KEY.pack_into(self.buf, offset, key)
+                return offset
+        # Probe window full: share the overflow slot, outside the hashed range
+        self._add("tenant_slot_overflows")
+        return self._overflow_offset
+
+    def tenant_buckets(
+        self, tenant: str, events: Tuple[float, float], nbytes: Tuple[float, float]
+    ) -> Tuple[SharedTokenBucket, SharedTokenBucket]:
+        """Views of ``tenant``'s (events, bytes) buckets. Caller holds lock."""
+        offset = self._slot_for(tenant) + _SLOT_KEY.size
+        return (
+            SharedTokenBucket(self.buf, offset, *events),
+            SharedTokenBucket(self.buf, offset + _BUCKET.size, *nbytes),
+        )
+
+    # Deduplication ----------------------------------------------------------
+
+    def dedup_buffer(self) -> Optional[memoryview]:
+        """Region reserved for the shared dedup filter, if any."""
+        if not self.dedup_bytes:
+            return None
+        return self.buf[self._dedup_offset : self._dedup_offset + self.dedup_bytes]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "segment": self.name,
+            "size_bytes": self.size,
+            "tenant_slots": self.tenant_slots,
+            "tenant_slot_overflows": self.counters()["tenant_slot_overflows"],
+            "dedup_bytes": self.dedup_bytes,
+        }
@@ -0,0 +1,108 @@
+"""
+Per-request stage timing and slow-event capture for NB_Streamer.
+
+Every request to ``/events`` carries a ``StageTimer``; once the request is
+finished the timer is offered to the ``SlowEventRing``, which keeps only the
+events whose total time exceeded the configured threshold.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+class StageTimer:
+    """Record start and end offsets for the named stages of one request."""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start, time.perf_counter()))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Stage offsets relative to the request start, in milliseconds."""
+        return {
+            name: {
+                "start_ms": round((start - self.started) * 1000, 3),
+                "end_ms": round((end - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+            }
+            for name, start, end in self.stages
+        }
+
+
+class SlowEventRing:
+    """Bounded ring buffer of requests slower than a threshold."""
+
+    def __init__(self, capacity: int, threshold_ms: float, payload_bytes: int):
+        self.threshold_ms = threshold_ms
+        self.payload_bytes = payload_bytes
+        self.observed = 0
+        self.captured = 0
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+
+    @property
+    def capacity(self) -> Optional[int]:
+        return self._events.maxlen
+
+    def observe(
+        self,
+        timer: StageTimer,
+        tenant: Optional[str],
+        body: bytes,
+        chunk_count: int,
+        status_code: int,
+    ) -> bool:
+        """
+        Capture the request if it exceeded the threshold.
+
+        Returns:
+            bool: True if the request was captured
+        """
+        self.observed += 1
+        total_ms = timer.elapsed_ms()
+        if total_ms < self.threshold_ms:
+            return False
+
+        self.captured += 1
+        self._events.append(
+            {
+                "time": datetime.now(timezone.utc).isoformat(),
+                "total_ms": round(total_ms, 3),
+                "status_code": status_code,
+                "tenant": tenant,
+                "payload_size": len(body),
+                "chunk_count": chunk_count,
+                "payload": body[: self.payload_bytes].decode("utf-8", "replace"),
+                "payload_truncated": len(body) > self.payload_bytes,
+                "stages": timer.breakdown(),
+            }
+        )
+        return True
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Captured events, newest first."""
+        return list(reversed(self._events))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.capacity,
+            "observed": self.observed,
+            "captured": self.captured,
+        }
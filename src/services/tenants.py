@@ -0,0 +1,205 @@
+"""
+Bounded per-tenant state for NB_Streamer.
+
+Tenant names come from the client-controlled ``NB_Tenant`` field, so any
+structure keyed by tenant must have a hard upper bound. The registry keeps
+exact state for the first ``max_tenants`` tenants it sees and accounts for
+the long tail in a Space-Saving heavy-hitters sketch.
+"""
+
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally, Agrawal, El Abbadi 2005).
+
+    Monitors at most ``capacity`` keys. When a new key arrives and the sketch
+    is full, the key with the smallest count is evicted and the newcomer
+    inherits its count as an over-estimation error. For every monitored key
+    ``count - error <= true count <= count``.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Sketch capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        # key -> [count, error]
+        self._counters: Dict[str, List[int]] = {}
+        # Min-heap of (count, key). Counts only ever grow, so an entry may be
+        # stale (lower than the live count); stale entries are refreshed lazily
+        # when they reach the top of the heap.
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Account ``count`` occurrences of ``key``."""
+        self.total += count
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += count
+            return
+
+        if len(self._counters) < self.capacity:
+            self._counters[key] = [count, 0]
+            heapq.heappush(self._heap, (count, key))
+            return
+
+        min_count, min_key = self._pop_min()
+        del self._counters[min_key]
+        self._counters[key] = [min_count + count, min_count]
+        heapq.heappush(self._heap, (min_count + count, key))
+
+    def _pop_min(self) -> Tuple[int, str]:
+        """Pop the monitored key with the smallest live count."""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            live = self._counters[key][0]
+            if live == count:
+                return count, key
+            heapq.heappush(self._heap, (live, key))
+
+    @property
+    def max_error(self) -> int:
+        """Upper bound on the over-estimation of any reported count."""
+        if len(self._counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self._counters.values())
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """Return the ``k`` keys with the highest estimated counts."""
+        items = heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0])
+        return [
+            {
+                "tenant": key,
+                "count": count,
+                "error": error,
+                "guaranteed": count - error,
+            }
+            for key, (count, error) in items
+        ]
+
+
+class TenantState:
+    """Per-tenant state: counters plus the tenant's rate limit buckets."""
+
+    __slots__ = (
+        "name",
+        "received",
+        "forwarded",
+        "failed",
+        "limited",
+        "rate_buckets",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.received = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.limited = 0
+        # (policy generation, events bucket, bytes bucket), see services.ratelimit
+        self.rate_buckets: Optional[Tuple[int, Any, Any]] = None
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "forwarded": self.forwarded,
+            "failed": self.failed,
+            "limited": self.limited,
+        }
+
+
+class TenantRegistry:
+    """Cardinality-bounded registry of tenant state."""
+
+    def __init__(self, max_tenants: int, sketch_capacity: int):
+        self.max_tenants = max_tenants
+        self._tenants: Dict[str, TenantState] = {}
+        self._overflow = SpaceSaving(sketch_capacity)
+        self._overflow_warned = False
+        # Shared state for all tenants beyond the cap, so that per-tenant
+        # controls still apply (collectively) to the long tail.
+        self.overflow_state = TenantState("__overflow__")
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def get(self, tenant: str) -> Optional[TenantState]:
+        """
+        Return the exact state for ``tenant``, creating it if there is room.
+
+        Returns:
+            TenantState, or None when the tenant falls into the overflow sketch
+        """
+        state = self._tenants.get(tenant)
+        if state is not None:
+            return state
+        if len(self._tenants) >= self.max_tenants:
+            if not self._overflow_warned:
+                logger.warning(
+                    f"Tenant tracking limit of {self.max_tenants} reached; "
+                    "further tenants are counted approximately"
+                )
+                self._overflow_warned = True
+            return None
+        state = TenantState(tenant)
+        self._tenants[tenant] = state
+        return state
+
+    def state_for(self, tenant: str) -> TenantState:
+        """Return the tenant's own state, or the shared overflow state."""
+        state = self.get(tenant)
+        return state if state is not None else self.overflow_state
+
+    def record(self, tenant: str, success: bool, count: int = 1) -> None:
+        """Record ``count`` processed events for ``tenant``."""
+        state = self.get(tenant)
+        if state is None:
+            self._overflow.add(tenant, count)
+            return
+        state.received += count
+        if success:
+            state.forwarded += count
+        else:
+            state.failed += count
+
+    def exact_counts(self) -> Dict[str, Dict[str, int]]:
+        """Per-tenant counters for the exactly tracked tenants."""
+        return {name: state.as_dict() for name, state in self._tenants.items()}
+
+    def top_tenants(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Top ``k`` tenants by received events, merging exact and sketched counts.
+
+        Exactly tracked tenants report an error of zero.
+        """
+        exact = [
+            {
+                "tenant": name,
+                "count": state.received,
+                "error": 0,
+                "guaranteed": state.received,
+            }
+            for name, state in self._tenants.items()
+        ]
+        merged = exact + self._overflow.top(k)
+        merged.sort(key=lambda entry: entry["count"], reverse=True)
+        return merged[:k]
+
+    def overflow_summary(self) -> Dict[str, Any]:
+        """Describe the approximate long-tail accounting."""
+        return {
+            "events": self._overflow.total,
+            "limited": self.overflow_state.limited,
+            "monitored_tenants": len(self._overflow),
+            "sketch_capacity": self._overflow.capacity,
+            "max_error": self._overflow.max_error,
+        }
@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional
 from ..config import config
 from ..models.gelf import GELFMessage
 from ..models.netbird import NetbirdEvent
+from .plan_cache import TransformPlanCache
+from .projection import projections_from_config
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +17,20 @@ class TransformerService:
 
     def __init__(self):
         # Use dynamic tenant resolution for multi-tenant mode
-        pass
+        self.projections = projections_from_config(config)
+        self.plan_cache = (
+            TransformPlanCache(config.plan_cache_size)
+            if config.plan_cache_size
+            else None
+        )
 
     def get_tenant_host_identifier(self, tenant_id: str) -> str:
         """Get the host identifier for a specific tenant."""
         return f"nb_streamer_{tenant_id}"
 
-    async def transform_event(self, raw_event_data: Dict[str, Any], tenant_override: Optional[str] = None) -> GELFMessage:
+    async def transform_event(
+        self, raw_event_data: Dict[str, Any], tenant_override: Optional[str] = None
+    ) -> GELFMessage:
         """
         Transform raw Netbird event data to GELF message with tenant context.
 
@@ -32,9 +41,15 @@ class TransformerService:
         Returns:
             GELFMessage: Transformed GELF message ready for transmission
         """
+        return self.transform(raw_event_data, tenant_override)
+
+    def transform(
+        self, raw_event_data: Dict[str, Any], tenant_override: Optional[str] = None
+    ) -> GELFMessage:
+        """Synchronous body of transform_event, usable outside the event loop."""
+        tenant_id = tenant_override
         try:
             # Determine tenant for this event
-            tenant_id = tenant_override
             if not tenant_id:
                 # Use tenant from path parameter
                 tenant_id = raw_event_data.get("NB_Tenant") or config.tenant_id
@@ -50,6 +65,8 @@ class TransformerService:
                 event_data=netbird_event.dict(),
                 host=host_identifier,
                 tenant_id=tenant_id,
+                projection=self.projections.get(tenant_id),
+                plan_cache=self.plan_cache,
             )
 
             return gelf_message
@@ -60,15 +77,19 @@ class TransformerService:
 
             # Create a fallback GELF message for failed transformations
             # Determine fallback tenant
-            fallback_tenant = tenant_override or raw_event_data.get("NB_Tenant") or config.tenant_id
+            fallback_tenant = (
+                tenant_override or raw_event_data.get("NB_Tenant") or config.tenant_id
+            )
             host_identifier = self.get_tenant_host_identifier(fallback_tenant)
-            
+
             # Try using regular transformation but with fallback short message
             fallback_message = GELFMessage.from_netbird_event(
                 event_data=raw_event_data,
                 host=host_identifier,
                 tenant_id=fallback_tenant,
                 short_message=f"Event transformation had issues: {str(e)}",
+                projection=self.projections.get(fallback_tenant),
+                plan_cache=self.plan_cache,
             )
 
             # Add error information to custom fields
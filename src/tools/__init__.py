@@ -0,0 +1 @@
+"""Standalone tools for testing and operating NB_Streamer."""
@@ -0,0 +1,274 @@
+"""
+Convert NDJSON event archives to GELF offline, in parallel.
+
+Reads archives in the ``src.utils.archive`` format (webhook payloads or
+capture records, gzip or plain), transforms every event with
+``TransformerService`` and ``GELFEncoder`` exactly as the server does, and
+writes, in input order:
+
+* ``ndjson``: one GELF JSON message per line;
+* ``tcp``: a GELF TCP stream, each message terminated by a null byte, which
+  can be piped straight into a Graylog TCP input;
+* ``udp``: the datagrams ``GraylogService`` would send (zlib-compressed when
+  ``NB_COMPRESSION_ENABLED``), each prefixed with its length as a 4-byte
+  big-endian integer.
+
+Lines are read in chunks of ``--chunk-lines`` and converted on a process
+pool (``--workers``, one per CPU by default; ``0`` converts in-process).
+At most two chunks per worker are read ahead of the output, so memory stays
+bounded whatever the size of the archives.
+Lines that cannot be converted are counted by reason, optionally written to
+``--errors`` as NDJSON, and make the command exit with status 1. The final
+report doubles as a pure-CPU throughput benchmark of the transform path.
+
+Usage:
+    python -m src.tools.convert events.ndjson.gz --output gelf.ndjson
+    python -m src.tools.convert capture.ndjson.gz --format tcp --output - \\
+        | nc graylog 12201
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import Counter, deque
+from itertools import groupby, islice
+from multiprocessing.pool import AsyncResult, Pool
+from operator import itemgetter
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from ..config import config
+from ..models.gelf_encoder import GELFEncoder
+from ..services.transformer import TransformerService
+from ..utils.archive import ArchiveError, parse_line, read_archives
+
+FORMATS = ("ndjson", "tcp", "udp")
+
+# (path, [(line number, line), ...])
+Chunk = Tuple[str, List[Tuple[int, str]]]
+# (framed output, errors, line count, input bytes)
+ChunkResult = Tuple[bytes, List[Dict[str, Any]], int, int]
+
+# Chunks submitted to the pool ahead of the output, per worker
+READ_AHEAD_PER_WORKER = 2
+
+# Per-process converter state, created by _init_converter
+_converter: Dict[str, Any] = {}
+
+
+def _init_converter(output_format: str) -> None:
+    # The transform logs every event at INFO
+    logging.disable(logging.INFO)
+    _converter.update(
+        format=output_format,
+        transformer=TransformerService(),
+        encoder=GELFEncoder(),
+    )
+
+
+def frame(payload: bytes, output_format: str) -> bytes:
+    """``payload`` as written for ``output_format``."""
+    if output_format == "ndjson":
+        return payload + b"\n"
+    if output_format == "tcp":
+        return payload + b"\0"
+    if config.compression_enabled:
+        payload = zlib.compress(payload)
+    return struct.pack(">I", len(payload)) + payload
+
+
+def convert_line(line: str) -> bytes:
+    """One archive line as framed GELF; raises ``ArchiveError`` if unusable."""
+    record = parse_line(line)
+    tenant = record["tenant"]
+    if not config.validate_tenant_format(tenant):
+        raise ArchiveError("tenant_format", f"Tenant '{tenant}' has invalid format")
+    message = _converter["transformer"].transform(record["event"], tenant)
+    return frame(_converter["encoder"].encode(message), _converter["format"])
+
+
+def convert_chunk(chunk: Chunk) -> ChunkResult:
+    """Framed output, errors, line count and input bytes of one chunk."""
+    path, lines = chunk
+    output: List[bytes] = []
+    errors: List[Dict[str, Any]] = []
+    size = 0
+    for number, line in lines:
+        size += len(line.encode("utf-8"))
+        try:
+            output.append(convert_line(line))
+        except ArchiveError as e:
+            errors.append(
+                {"source": path, "line": number, "reason": e.reason, "error": str(e)}
+            )
+        except Exception as e:
+            # One bad event must not abort a bulk conversion
+            errors.append(
+                {"source": path, "line": number, "reason": "transform", "error": str(e)}
+            )
+    return b"".join(output), errors, len(lines), size
+
+
+def read_chunks(paths: Iterable[str], chunk_lines: int) -> Iterator[Chunk]:
+    """Archive lines in chunks of up to ``chunk_lines``, never spanning files."""
+    for path, lines in groupby(read_archives(list(paths)), key=itemgetter(0)):
+        while True:
+            batch = [(number, line) for _, number, line in islice(lines, chunk_lines)]
+            if not batch:
+                break
+            yield path, batch
+
+
+def bounded_imap(
+    pool: Pool,
+    func: Callable[[Chunk], ChunkResult],
+    chunks: Iterable[Chunk],
+    window: int,
+) -> Iterator[ChunkResult]:
+    """
+    Ordered results of ``func`` over ``chunks``, like ``pool.imap``.
+
+    ``pool.imap`` reads its whole input up front; here at most ``window``
+    chunks are submitted but not yet consumed.
+    """
+    pending: Deque[AsyncResult] = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def open_output(path: str) -> BinaryIO:
+    if path == "-":
+        return sys.stdout.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "wb")  # type: ignore[return-value]
+    return open(path, "wb")
+
+
+def convert(
+    paths: Iterable[str],
+    output: BinaryIO,
+    output_format: str = "ndjson",
+    workers: int = 0,
+    chunk_lines: int = 1000,
+    errors: Optional[BinaryIO] = None,
+) -> Dict[str, Any]:
+    """Convert ``paths`` into ``output``; returns counts and throughput."""
+    started = time.perf_counter()
+    chunks = read_chunks(paths, chunk_lines)
+    reasons: Counter = Counter()
+    counts = {"lines": 0, "converted": 0, "input_bytes": 0, "output_bytes": 0}
+
+    def consume(results: Iterable[ChunkResult]) -> None:
+        for data, failed, lines, size in results:
+            output.write(data)
+            counts["lines"] += lines
+            counts["converted"] += lines - len(failed)
+            counts["input_bytes"] += size
+            counts["output_bytes"] += len(data)
+            for error in failed:
+                reasons[error["reason"]] += 1
+                if errors is not None:
+                    errors.write(json.dumps(error).encode() + b"\n")
+
+    if workers:
+        with multiprocessing.Pool(
+            workers, initializer=_init_converter, initargs=(output_format,)
+        ) as pool:
+            window = READ_AHEAD_PER_WORKER * workers
+            consume(bounded_imap(pool, convert_chunk, chunks, window))
+    else:
+        previous = dict(_converter)
+        _init_converter(output_format)
+        try:
+            consume(convert_chunk(chunk) for chunk in chunks)
+        finally:
+            logging.disable(logging.NOTSET)
+            _converter.clear()
+            _converter.update(previous)
+
+    elapsed = time.perf_counter() - started
+    return {
+        **counts,
+        "errors": dict(reasons),
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_second": (
+            round(counts["converted"] / elapsed, 1) if elapsed else 0.0
+        ),
+        "input_mb_per_second": (
+            round(counts["input_bytes"] / elapsed / 1e6, 2) if elapsed else 0.0
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("archives", nargs="+", help="NDJSON files, gzip or not; -")
+    parser.add_argument("--output", "-o", default="-", help="file, .gz or - (stdout)")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="conversion processes (0: in this process)",
+    )
+    parser.add_argument("--chunk-lines", type=int, default=1000)
+    parser.add_argument("--errors", help="write failed lines as NDJSON here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    output = open_output(args.output)
+    errors = open(args.errors, "wb") if args.errors else None
+    try:
+        summary = convert(
+            args.archives,
+            output,
+            output_format=args.format,
+            workers=args.workers,
+            chunk_lines=args.chunk_lines,
+            errors=errors,
+        )
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+        if errors is not None:
+            errors.close()
+    print(
+        f"lines={summary['lines']} converted={summary['converted']} "
+        f"errors={summary['errors']} workers={summary['workers']} "
+        f"in {summary['elapsed_seconds']}s ({summary['events_per_second']}/s, "
+        f"{summary['input_mb_per_second']} MB/s in, "
+        f"{summary['output_bytes']} bytes out)",
+        file=sys.stderr,
+    )
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
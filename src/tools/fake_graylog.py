@@ -0,0 +1,411 @@
+"""
+Fake Graylog: a local GELF sink that decodes, verifies and counts messages.
+
+Listens for GELF on any of:
+
+* UDP: plain, zlib or gzip datagrams, and chunked messages (magic
+  ``0x1e 0x0f``, 8-byte message id, sequence number and count) reassembled
+  in any order; incomplete messages expire after ``--chunk-timeout``;
+* TCP: null-byte delimited frames, as Graylog's GELF TCP input expects; a
+  frame ended by closing the connection is accepted but counted separately;
+* HTTP: ``POST /gelf`` with an optional ``Content-Encoding`` of ``gzip`` or
+  ``deflate``, answered with ``202`` like Graylog's GELF HTTP input.
+
+Every message is checked against the GELF 1.1 rules Graylog enforces
+(``version``, non-empty ``host`` and ``short_message``, numeric
+``timestamp``, integer ``level``, additional fields prefixed with ``_`` and
+not ``_id``). Counts, bytes and decode errors by reason are printed every
+``--report-interval`` seconds and served as JSON at ``GET /stats`` on the
+HTTP port; ``GET /messages`` returns the last ``--keep`` decoded messages
+and ``POST /reset`` clears everything.
+
+Usage:
+    python -m src.tools.fake_graylog --udp 12201 --tcp 12201 --http 12202
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import re
+import socket
+import sys
+import time
+import zlib
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MAGIC = b"\x1e\x0f"
+CHUNK_HEADER = 12
+MAX_CHUNKS = 128
+FIELD_NAME = re.compile(r"^[\w.\-]*$")
+
+
+class GELFDecodeError(ValueError):
+    """A payload that Graylog would reject; ``reason`` names the check."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def decompress(data: bytes) -> bytes:
+    """Inflate gzip or zlib payloads, detected by magic bytes like Graylog."""
+    try:
+        if data[:2] == b"\x1f\x8b":
+            return gzip.decompress(data)
+        if data[:1] == b"\x78":
+            return zlib.decompress(data)
+    except (OSError, EOFError, zlib.error) as e:
+        raise GELFDecodeError("decompress", str(e)) from e
+    return data
+
+
+def validate(message: Any) -> Dict[str, Any]:
+    """Check one decoded GELF message; raises GELFDecodeError."""
+    if not isinstance(message, dict):
+        raise GELFDecodeError("invalid", "GELF message is not a JSON object")
+    if message.get("version") != "1.1":
+        raise GELFDecodeError("invalid", f"bad version {message.get('version')!r}")
+    for field in ("host", "short_message"):
+        value = message.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise GELFDecodeError("invalid", f"missing or empty {field}")
+    timestamp = message.get("timestamp")
+    if timestamp is not None and (
+        isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))
+    ):
+        raise GELFDecodeError("invalid", "timestamp is not a number")
+    level = message.get("level")
+    if level is not None and (isinstance(level, bool) or not isinstance(level, int)):
+        raise GELFDecodeError("invalid", "level is not an integer")
+    for key in message:
+        if key in ("version", "host", "short_message", "full_message"):
+            continue
+        if key in ("timestamp", "level", "facility", "line", "file"):
+            continue
+        if not key.startswith("_") or key == "_id" or not FIELD_NAME.match(key):
+            raise GELFDecodeError("invalid", f"bad additional field name {key!r}")
+    return message
+
+
+class ChunkAssembler:
+    """Reassemble chunked GELF datagrams."""
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+        # message id -> (first seen, sequence count, {sequence: data})
+        self._pending: Dict[bytes, Tuple[float, int, Dict[int, bytes]]] = {}
+        self.expired = 0
+
+    def add(self, datagram: bytes, now: float) -> Optional[bytes]:
+        """Store one chunk; returns the whole payload once complete."""
+        if len(datagram) < CHUNK_HEADER:
+            raise GELFDecodeError("chunk", "truncated chunk header")
+        message_id = datagram[2:10]
+        sequence, count = datagram[10], datagram[11]
+        if count == 0 or count > MAX_CHUNKS or sequence >= count:
+            raise GELFDecodeError("chunk", f"bad chunk {sequence}/{count}")
+
+        _, expected, chunks = self._pending.setdefault(message_id, (now, count, {}))
+        if expected != count:
+            del self._pending[message_id]
+            raise GELFDecodeError("chunk", "inconsistent chunk count")
+        chunks[sequence] = datagram[CHUNK_HEADER:]
+        if len(chunks) < count:
+            return None
+        del self._pending[message_id]
+        return b"".join(chunks[i] for i in range(count))
+
+    def expire(self, now: float) -> int:
+        """Drop incomplete messages older than the timeout."""
+        stale = [
+            message_id
+            for message_id, (first_seen, _, _) in self._pending.items()
+            if now - first_seen > self.timeout
+        ]
+        for message_id in stale:
+            del self._pending[message_id]
+        self.expired += len(stale)
+        return len(stale)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+class GELFSink:
+    """Decode, validate and count GELF payloads from any transport."""
+
+    def __init__(self, keep: int = 100, validate_messages: bool = True):
+        self.validate_messages = validate_messages
+        self.chunks = ChunkAssembler()
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.monotonic()
+        self.received: Counter = Counter()
+        self.wire_bytes: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.hosts: Counter = Counter()
+        self.chunked = 0
+        self.unterminated_frames = 0
+        self.chunks.expired = 0
+        self.recent.clear()
+
+    def reject(self, transport: str, error: GELFDecodeError) -> None:
+        self.errors[f"{transport}:{error.reason}"] += 1
+        logger.debug(f"Rejected {transport} payload: {error}")
+
+    def handle(self, transport: str, payload: bytes) -> Optional[Dict[str, Any]]:
+        """Decode one complete (unchunked) payload; returns the message if valid."""
+        try:
+            data = decompress(payload)
+            try:
+                message = json.loads(data)
+            except ValueError as e:
+                raise GELFDecodeError("json", str(e)) from e
+            if self.validate_messages:
+                validate(message)
+        except GELFDecodeError as e:
+            self.reject(transport, e)
+            return None
+        self.received[transport] += 1
+        if isinstance(message, dict):
+            self.hosts[message.get("host")] += 1
+        if self.recent.maxlen:
+            self.recent.append(message)
+        return message
+
+    def datagram(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Handle one UDP datagram, chunked or not."""
+        self.wire_bytes["udp"] += len(data)
+        if data[:2] != CHUNK_MAGIC:
+            return self.handle("udp", data)
+        try:
+            payload = self.chunks.add(data, time.monotonic())
+        except GELFDecodeError as e:
+            self.reject("udp", e)
+            return None
+        if payload is None:
+            return None
+        self.chunked += 1
+        return self.handle("udp", payload)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        total = sum(self.received.values())
+        return {
+            "uptime_seconds": round(elapsed, 3),
+            "received": total,
+            "received_by_transport": dict(self.received),
+            "messages_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+            "wire_bytes": sum(self.wire_bytes.values()),
+            "wire_bytes_by_transport": dict(self.wire_bytes),
+            "decode_errors": sum(self.errors.values()),
+            "decode_errors_by_reason": dict(self.errors),
+            "chunked_messages": self.chunked,
+            "unterminated_tcp_frames": self.unterminated_frames,
+            "chunks_pending": self.chunks.pending,
+            "chunks_expired": self.chunks.expired,
+            "top_hosts": dict(self.hosts.most_common(10)),
+        }
+
+
+class UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sink: GELFSink):
+        self.sink = sink
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.sink.datagram(data)
+
+
+async def handle_tcp(sink: GELFSink, reader, writer) -> None:
+    """Read null-delimited GELF frames until the peer disconnects."""
+    buffer = b""
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            sink.wire_bytes["tcp"] += len(data)
+            buffer += data
+            *frames, buffer = buffer.split(b"\0")
+            for frame in frames:
+                if frame:
+                    sink.handle("tcp", frame)
+        if buffer.strip():
+            # A frame ended by closing the connection instead of a null byte;
+            # accepted, but counted because Graylog's framing expects the null
+            sink.unterminated_frames += 1
+            sink.handle("tcp", buffer)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _http_response(status: str, body: bytes = b"", content_type="application/json"):
+    return (
+        f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+
+
+async def handle_http(sink: GELFSink, reader, writer) -> None:
+    """Minimal keep-alive HTTP/1.1 server for GELF HTTP and the stats API."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "POST" and path.startswith("/gelf"):
+                sink.wire_bytes["http"] += len(body)
+                encoding = headers.get("content-encoding", "")
+                compressed = body[:2] == b"\x1f\x8b" or body[:1] == b"\x78"
+                if encoding in ("gzip", "deflate") and not compressed:
+                    sink.reject("http", GELFDecodeError("decompress", encoding))
+                    response = _http_response("400 Bad Request")
+                elif sink.handle("http", body) is None:
+                    response = _http_response("400 Bad Request")
+                else:
+                    response = _http_response("202 Accepted")
+            elif method == "GET" and path.startswith("/stats"):
+                response = _http_response("200 OK", json.dumps(sink.summary()).encode())
+            elif method == "GET" and path.startswith("/messages"):
+                response = _http_response(
+                    "200 OK", json.dumps(list(sink.recent)).encode()
+                )
+            elif method == "POST" and path.startswith("/reset"):
+                sink.reset()
+                response = _http_response("204 No Content")
+            else:
+                response = _http_response("404 Not Found")
+            writer.write(response)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_servers(
+    sink: GELFSink,
+    host: str,
+    udp_port: Optional[int] = None,
+    tcp_port: Optional[int] = None,
+    http_port: Optional[int] = None,
+) -> List[Any]:
+    """Start the requested listeners; returns transports and servers to close."""
+    loop = asyncio.get_running_loop()
+    handles: List[Any] = []
+    if udp_port is not None:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: UDPProtocol(sink), local_addr=(host, udp_port)
+        )
+        sock = transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        except OSError:
+            pass
+        handles.append(transport)
+    if tcp_port is not None:
+        handles.append(
+            await asyncio.start_server(
+                lambda r, w: handle_tcp(sink, r, w), host, tcp_port
+            )
+        )
+    if http_port is not None:
+        handles.append(
+            await asyncio.start_server(
+                lambda r, w: handle_http(sink, r, w), host, http_port
+            )
+        )
+    return handles
+
+
+def bound_ports(handles: List[Any]) -> List[Tuple[str, int]]:
+    """(kind, port) of every listener, useful when binding port 0."""
+    ports = []
+    for handle in handles:
+        if isinstance(handle, asyncio.AbstractServer):
+            ports.append(("tcp", handle.sockets[0].getsockname()[1]))
+        else:
+            ports.append(("udp", handle.get_extra_info("sockname")[1]))
+    return ports
+
+
+async def run(args: argparse.Namespace) -> None:
+    sink = GELFSink(keep=args.keep, validate_messages=not args.no_validate)
+    sink.chunks.timeout = args.chunk_timeout
+    handles = await start_servers(sink, args.host, args.udp, args.tcp, args.http)
+    logger.info(
+        f"Fake Graylog listening on {args.host}: udp={args.udp} tcp={args.tcp} "
+        f"http={args.http}"
+    )
+    last_total = 0
+    try:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            sink.chunks.expire(time.monotonic())
+            summary = sink.summary()
+            rate = (summary["received"] - last_total) / args.report_interval
+            last_total = summary["received"]
+            if not args.quiet:
+                logger.info(
+                    f"received={summary['received']} ({rate:.0f}/s) "
+                    f"bytes={summary['wire_bytes']} "
+                    f"errors={summary['decode_errors_by_reason']}"
+                )
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--udp", type=int, help="GELF UDP port (e.g. 12201)")
+    parser.add_argument("--tcp", type=int, help="GELF TCP port (e.g. 12201)")
+    parser.add_argument("--http", type=int, help="GELF HTTP and stats port")
+    parser.add_argument("--keep", type=int, default=100, help="messages kept")
+    parser.add_argument("--chunk-timeout", type=float, default=5.0)
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument(
+        "--no-validate", action="store_true", help="only decode, skip GELF checks"
+    )
+    parser.add_argument("--quiet", action="store_true", help="no periodic report")
+    args = parser.parse_args(argv)
+    if args.udp is None and args.tcp is None and args.http is None:
+        args.udp, args.tcp, args.http = 12201, 12201, 12202
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Replay archived NetBird webhook payloads to Graylog without HTTP.
+
+Reads NDJSON archives (see ``src.utils.archive``: plain payloads or capture
+records, optionally gzip-compressed) and sends every event through the same
+code as ``POST /events``: tenant validation, the per-tenant filtering rules
+(``NB_RULES_FILE``), ``TransformerService`` with projections and the plan
+cache, ``GELFEncoder`` and ``GraylogService``. Deduplication, rate limits
+and aggregation are left out: a replay re-sends on purpose, and is paced
+by ``--rate`` instead.
+
+Graylog is addressed through the usual ``NB_GRAYLOG_*`` settings, or
+``--host``/``--port``/``--protocol``. TCP replays keep one connection open
+and terminate each message with a null byte, as GELF TCP requires.
+
+Usage:
+    python -m src.tools.replay events.ndjson.gz --rate 2000
+    python -m src.tools.replay capture-*.ndjson.gz --tenant acme \\
+        --since 2025-08-01T00:00:00Z --until 2025-08-02T00:00:00Z
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..config import config
+from ..models.gelf_encoder import GELFEncoder
+from ..services.graylog import GraylogService
+from ..services.rules import rules_from_config
+from ..services.transformer import TransformerService
+from ..utils.archive import ArchiveError, parse_line, parse_timestamp, read_archives
+
+logger = logging.getLogger(__name__)
+
+
+class Replayer:
+    """Filter, transform and send archive lines, optionally at a fixed rate."""
+
+    def __init__(
+        self,
+        send: Callable[[bytes], None],
+        tenants: Optional[Iterable[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        rate: float = 0.0,
+        apply_rules: bool = True,
+        encoder: Optional[GELFEncoder] = None,
+    ):
+        self.send = send
+        self.tenants = {t.lower() for t in tenants} if tenants else None
+        self.since = since
+        self.until = until
+        self.rate = rate
+        self.transformer = TransformerService()
+        self.encoder = encoder or GELFEncoder()
+        self.rules = rules_from_config(config) if apply_rules else None
+        self.read = 0
+        self.sent = 0
+        self.sent_bytes = 0
+        self.skipped: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.started = time.perf_counter()
+
+    def in_range(self, received_at: Optional[datetime]) -> bool:
+        if self.since is None and self.until is None:
+            return True
+        if received_at is None:
+            return False
+        if self.since is not None and received_at < self.since:
+            return False
+        return self.until is None or received_at < self.until
+
+    def process(self, line: str) -> bool:
+        """Handle one archive line; returns whether an event was sent."""
+        self.read += 1
+        try:
+            record = parse_line(line)
+        except ArchiveError as e:
+            self.errors[e.reason] += 1
+            return False
+        tenant = record["tenant"]
+        if self.tenants is not None and tenant not in self.tenants:
+            self.skipped["tenant"] += 1
+            return False
+        if not self.in_range(record["received_at"]):
+            self.skipped["time_range"] += 1
+            return False
+        if not config.validate_tenant_format(tenant):
+            self.errors["tenant_format"] += 1
+            return False
+        event = record["event"]
+        if self.rules is not None and self.rules.enabled:
+            if not self.rules.keep(tenant, event):
+                self.skipped["rules"] += 1
+                return False
+
+        payload = self.encoder.encode(self.transformer.transform(event, tenant))
+        if self.rate:
+            # Hold the schedule without bursting to catch up after a stall
+            delay = self.started + self.sent / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        try:
+            self.send(payload)
+        except OSError as e:
+            logger.error(f"Failed to send event to Graylog: {e}")
+            self.errors["send"] += 1
+            return False
+        self.sent += 1
+        self.sent_bytes += len(payload)
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "read": self.read,
+            "sent": self.sent,
+            "sent_bytes": self.sent_bytes,
+            "skipped": dict(self.skipped),
+            "errors": dict(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "events_per_second": round(self.sent / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def graylog_sender(graylog: GraylogService) -> Callable[[bytes], None]:
+    """Send function for the configured protocol over one connection."""
+    if config.graylog_protocol == "tcp":
+        graylog.connect()
+
+        def send_tcp(payload: bytes) -> None:
+            graylog.sock.sendall(payload + b"\0")
+
+        return send_tcp
+    return graylog.send_payload
+
+
+def replay(
+    replayer: Replayer,
+    lines: Iterable[Tuple[str, int, str]],
+    progress_interval: float = 5.0,
+    report: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """Feed ``lines`` to ``replayer``, reporting progress every interval."""
+    next_report = time.perf_counter() + progress_interval
+    for path, number, line in lines:
+        replayer.process(line)
+        if progress_interval and time.perf_counter() >= next_report:
+            next_report += progress_interval
+            summary = replayer.summary()
+            report(
+                f"{path}:{number} read={summary['read']} sent={summary['sent']} "
+                f"({summary['events_per_second']:.0f}/s) "
+                f"skipped={summary['skipped']} errors={summary['errors']}"
+            )
+    return replayer.summary()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("archives", nargs="+", help="NDJSON files, gzip or not; -")
+    parser.add_argument(
+        "--rate", type=float, default=0.0, help="events per second (0: max speed)"
+    )
+    parser.add_argument("--tenant", action="append", help="only these tenants")
+    parser.add_argument("--since", help="ISO 8601; events received at or after")
+    parser.add_argument("--until", help="ISO 8601; events received before")
+    parser.add_argument("--host", help="Graylog host (default NB_GRAYLOG_HOST)")
+    parser.add_argument("--port", type=int, help="Graylog port")
+    parser.add_argument("--protocol", choices=("udp", "tcp"))
+    parser.add_argument(
+        "--no-rules", action="store_true", help="ignore NB_RULES_FILE filtering"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="transform and encode, send nothing"
+    )
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    since = parse_timestamp(args.since)
+    until = parse_timestamp(args.until)
+    for flag, value, parsed in (
+        ("--since", args.since, since),
+        ("--until", args.until, until),
+    ):
+        if value and parsed is None:
+            parser.error(f"{flag}: not an ISO 8601 timestamp: {value}")
+    if args.host:
+        config.nb_graylog_host = args.host
+    if args.port:
+        config.nb_graylog_port = args.port
+    if args.protocol:
+        config.nb_graylog_protocol = args.protocol
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    graylog = GraylogService()
+    replayer = Replayer(
+        send=(lambda payload: None) if args.dry_run else graylog_sender(graylog),
+        tenants=[t for spec in args.tenant or [] for t in spec.split(",")],
+        since=since,
+        until=until,
+        rate=args.rate,
+        apply_rules=not args.no_rules,
+        encoder=graylog.encoder,
+    )
+
+    def report(message: str) -> None:
+        print(message, file=sys.stderr)
+
+    try:
+        summary = replay(
+            replayer, read_archives(args.archives), args.progress_interval, report
+        )
+    except KeyboardInterrupt:
+        summary = replayer.summary()
+        report("Interrupted")
+    finally:
+        graylog.close()
+    print(
+        f"read={summary['read']} sent={summary['sent']} "
+        f"bytes={summary['sent_bytes']} skipped={summary['skipped']} "
+        f"errors={summary['errors']} in {summary['elapsed_seconds']}s "
+        f"({summary['events_per_second']}/s)"
+    )
+    return 1 if summary["errors"].get("send") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
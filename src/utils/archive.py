@@ -0,0 +1,128 @@
+"""
+Reading event archives: NDJSON files of NetBird webhook payloads.
+
+An archive holds one JSON object per line, optionally gzip-compressed
+(detected from the content, not the file name). Each line is either
+
+* a webhook payload as NetBird posts it, with ``NB_Tenant`` in the body, or
+* a capture record: ``{"received_at": ..., "tenant": ..., "body": ...}``
+  where ``body`` is the raw request body as a string, ``tenant`` the tenant
+  it was received for and ``received_at`` an ISO 8601 timestamp.
+
+Blank lines are skipped. Lines that cannot be used raise ``ArchiveError``
+with a short reason, so tools can count them and carry on.
+"""
+
+import gzip
+import io
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence, TextIO, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+CAPTURE_FIELDS = ("received_at", "tenant", "body")
+
+
+class ArchiveError(ValueError):
+    """A line of an archive that cannot be replayed."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def open_archive(path: str) -> TextIO:
+    """Open ``path`` (``-`` for stdin) as text, decompressing gzip content."""
+    binary = sys.stdin.buffer if path == "-" else open(path, "rb")
+    stream: Any = binary
+    if binary.peek(2)[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=binary)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """ISO 8601 string (``Z`` suffix allowed) or epoch seconds, as UTC."""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_line(line: str) -> Dict[str, Any]:
+    """
+    One archive line as ``{"event", "tenant", "received_at", "size"}``.
+
+    ``tenant`` is the capture record's tenant or the payload's ``NB_Tenant``,
+    lower-cased as the server does; ``received_at`` is the capture time, or
+    the payload's ``Timestamp`` for plain payloads; ``size`` is the request
+    body size in bytes.
+    """
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        raise ArchiveError("json", f"Invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ArchiveError("json", "Line is not a JSON object")
+
+    received_at = None
+    tenant = None
+    size = len(line.encode("utf-8"))
+    if "body" in data and "received_at" in data:
+        received_at = parse_timestamp(data["received_at"])
+        tenant = data.get("tenant")
+        body = data["body"]
+        if isinstance(body, str):
+            size = len(body.encode("utf-8"))
+            try:
+                body = json.loads(body)
+            except ValueError as e:
+                raise ArchiveError("json", f"Invalid JSON body: {e}") from e
+        if not isinstance(body, dict):
+            raise ArchiveError("json", "Captured body is not a JSON object")
+        data = body
+    else:
+        received_at = parse_timestamp(data.get("Timestamp"))
+
+    tenant = tenant or data.get("NB_Tenant")
+    if not isinstance(tenant, str) or not tenant:
+        raise ArchiveError("tenant", "No tenant in capture record or NB_Tenant")
+    return {
+        "event": data,
+        "tenant": tenant.lower(),
+        "received_at": received_at,
+        "size": size,
+    }
+
+
+def raw_body(line: str) -> bytes:
+    """The request body of an archive line, byte for byte as it was posted."""
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        raise ArchiveError("json", f"Invalid JSON: {e}") from e
+    if isinstance(data, dict) and "body" in data and "received_at" in data:
+        body = data["body"]
+        if isinstance(body, str):
+            return body.encode("utf-8")
+        return json.dumps(body).encode("utf-8")
+    return line.strip().encode("utf-8")
+
+
+def read_archives(
+    paths: Sequence[str],
+) -> Iterator[Tuple[str, int, str]]:
+    """``(path, line number, line)`` for every non-blank line of ``paths``."""
+    for path in paths:
+        with open_archive(path) as stream:
+            for number, line in enumerate(stream, 1):
+                if line.strip():
+                    yield path, number, line
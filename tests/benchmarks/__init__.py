@@ -0,0 +1 @@
+"""Micro-benchmarks for the NB_Streamer transform pipeline."""
@@ -0,0 +1,371 @@
+"""
+Per-event allocation profile of the transform and serialization path.
+
+Every corpus event goes through ``TransformerService.transform`` and
+``GELFEncoder.encode`` (the server's hot path minus transport) under
+``tracemalloc``, after a warm-up pass so caches are in their steady state.
+For each event class (``small``, ``medium``, ``huge``) the report gives, per
+event:
+
+* ``peak_bytes``: the high-water mark of traced memory above the starting
+  point while the event was processed;
+* ``allocated_bytes``: bytes allocated in total, i.e. the churn the garbage
+  collector and allocator have to deal with. ``tracemalloc`` only keeps live
+  blocks, so this sums the growth of traced memory between consecutive
+  function calls and returns (sampled with ``sys.setprofile``). Memory
+  allocated and freed inside a single C call is not seen, so the figure is
+  a lower bound, but it is stable between runs and grows with real copies;
+* ``retained_bytes``: memory still held once the result is dropped;
+* ``sites``: the ``src/`` lines responsible for the most allocated bytes and
+  for the most memory live at the peak. Allocations made in the standard
+  library or in dependencies are charged to the ``src/`` line that called
+  into them.
+
+``alloc_budgets.json`` holds the peak and allocated budgets per event class
+and the corpus settings they were measured with; ``check_budgets`` lists
+what went over, which ``tests/unit/test_allocation_budgets.py`` turns into a
+test failure. The figures are deterministic for a given Python version (CI
+runs 3.11), so the budgets only leave ``headroom`` (5%), less than one more
+copy of the event costs. They are only rewritten with ``--update-budgets``,
+also needed after a Python upgrade; commit the diff for review.
+
+Usage:
+    python -m tests.benchmarks.allocations
+    python -m tests.benchmarks.allocations --update-budgets
+"""
+
+import argparse
+import gc
+import json
+import logging
+import sys
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import src
+from src.models.gelf_encoder import GELFEncoder
+from src.services.transformer import TransformerService
+
+from .corpus import SIZES, generate_corpus
+
+BUDGETS = Path(__file__).with_name("alloc_budgets.json")
+DEFAULT_SETTINGS = {"events": 3, "seed": 1, "headroom": 0.05}
+FIGURES = ("peak_bytes", "allocated_bytes", "retained_bytes")
+
+SRC_ROOT = str(Path(src.__file__).resolve().parent)
+REPO_ROOT = str(Path(SRC_ROOT).parent)
+
+# Frames kept per allocation: enough to get from json/pydantic back to src/
+TRACEBACK_DEPTH = 16
+
+
+def site_name(filename: str, lineno: int) -> Optional[str]:
+    """``src/...:line`` for files in the package, ``None`` for anything else."""
+    if not filename.startswith(SRC_ROOT):
+        return None
+    return f"{filename[len(REPO_ROOT) + 1:]}:{lineno}"
+
+
+# code object -> whether it lives in src/; the profile hook runs on every call
+_in_src: Dict[CodeType, bool] = {}
+_sites: Dict[Tuple[CodeType, int], str] = {}
+
+
+def frame_site(frame: Optional[FrameType]) -> str:
+    """Innermost ``src/`` line on the stack of ``frame``."""
+    while frame is not None:
+        code = frame.f_code
+        in_src = _in_src.get(code)
+        if in_src is None:
+            in_src = _in_src[code] = code.co_filename.startswith(SRC_ROOT)
+        if in_src:
+            key = (code, frame.f_lineno)
+            site = _sites.get(key)
+            if site is None:
+                site = _sites[key] = site_name(code.co_filename, frame.f_lineno)
+            return site
+        frame = frame.f_back
+    return "<outside src>"
+
+
+def traceback_site(traceback: tracemalloc.Traceback) -> str:
+    """Innermost ``src/`` line of a ``tracemalloc`` traceback."""
+    for frame in reversed(list(traceback)):  # iterates oldest frame first
+        site = site_name(frame.filename, frame.lineno)
+        if site:
+            return site
+    return "<outside src>"
+
+
+def pipeline() -> Callable[[Dict[str, Any]], bytes]:
+    """The server's per-event work: transform, then GELF serialization."""
+    transformer = TransformerService()
+    encoder = GELFEncoder()
+
+    def process(raw: Dict[str, Any]) -> bytes:
+        # The server always passes the tenant from the request path
+        return encoder.encode(transformer.transform(raw, "bench"))
+
+    return process
+
+
+def profile_event(
+    operation: Callable[[Any], Any], item: Any, sites: Counter, peak_sites: Counter
+) -> Dict[str, int]:
+    """
+    Allocation figures of a single ``operation(item)`` call.
+
+    Allocated bytes are added to ``sites`` and the memory live at the peak to
+    ``peak_sites``, both by ``src/`` line. The call runs three times: plain,
+    for the peak and retained figures; under a profile hook with single-frame
+    tracing, to count allocations; and with full tracebacks to snapshot
+    memory close to the peak found by the first run.
+    """
+    tracemalloc.start(1)
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = operation(item)
+        peak = tracemalloc.get_traced_memory()[1]
+        del result
+        gc.collect()  # cycles are freed eventually; retained means kept
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    state = {"last": 0, "allocated": 0}
+
+    def count(frame: FrameType, event: str, arg: Any) -> None:
+        current = tracemalloc.get_traced_memory()[0]
+        grown = current - state["last"]
+        if grown > 0:
+            state["allocated"] += grown
+            sites[frame_site(frame)] += grown
+        # Read again so the bookkeeping above is not charged to the event
+        state["last"] = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.start(1)
+    try:
+        state["last"] = tracemalloc.get_traced_memory()[0]
+        _profiled(count, operation, item)
+        state["allocated"] += max(0, tracemalloc.get_traced_memory()[0] - state["last"])
+    finally:
+        tracemalloc.stop()
+
+    # The hook only sees memory between calls, below the exact peak, so
+    # snapshot from half the peak on and again at every 5% higher
+    snapshots: List[tracemalloc.Snapshot] = []
+    tracemalloc.start(TRACEBACK_DEPTH)
+    try:
+        baseline = tracemalloc.take_snapshot()
+        capture_start = tracemalloc.get_traced_memory()[0]
+        level = {"next": capture_start + (peak - start) * 0.5}
+
+        def capture(frame: FrameType, event: str, arg: Any) -> None:
+            current = tracemalloc.get_traced_memory()[0]
+            if current >= level["next"]:
+                snapshots[:] = [tracemalloc.take_snapshot()]
+                level["next"] = current + (current - capture_start) * 0.05
+
+        _profiled(capture, operation, item)
+    finally:
+        tracemalloc.stop()
+    for snapshot in snapshots:
+        for diff in snapshot.compare_to(baseline, "traceback"):
+            if diff.size_diff > 0:
+                peak_sites[traceback_site(diff.traceback)] += diff.size_diff
+    return {
+        "peak_bytes": peak - start,
+        "allocated_bytes": state["allocated"],
+        "retained_bytes": max(0, retained),
+    }
+
+
+def _profiled(
+    hook: Callable[[FrameType, str, Any], None],
+    operation: Callable[[Any], Any],
+    item: Any,
+) -> Any:
+    sys.setprofile(hook)
+    try:
+        return operation(item)
+    finally:
+        sys.setprofile(None)
+
+
+def harness_floor() -> Dict[str, int]:
+    """What ``profile_event`` reports for a call that allocates nothing."""
+    figures: Dict[str, int] = {}
+    for _ in range(3):  # the first calls still build harness internals
+        figures = profile_event(lambda item: None, None, Counter(), Counter())
+    return figures
+
+
+def profile_corpus(
+    events: Sequence[Dict[str, Any]],
+    operation: Optional[Callable[[Any], Any]] = None,
+    top: int = 5,
+) -> Dict[str, Any]:
+    """Mean per-event figures and top allocation sites over ``events``."""
+    operation = operation or pipeline()
+    totals: Counter = Counter()
+    sites: Counter = Counter()
+    peak_sites: Counter = Counter()
+    # Warm-up pass: encoder and plan caches and lazy imports, plus the site
+    # keys so growing ``sites`` is not charged to the events
+    for raw in events:
+        _profiled(
+            lambda frame, event, arg: sites.setdefault(frame_site(frame), 0),
+            operation,
+            raw,
+        )
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        floor = harness_floor()
+        for raw in events:
+            totals.update(profile_event(operation, raw, sites, peak_sites))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    count = len(events)
+    report: Dict[str, Any] = {
+        name: max(0, round(totals[name] / count) - floor[name]) for name in FIGURES
+    }
+    report["events"] = count
+    report["sites"] = {
+        "allocated": [
+            {"site": site, "bytes_per_event": round(size / count)}
+            for site, size in sites.most_common(top)
+            if size
+        ],
+        "peak": [
+            {"site": site, "bytes_per_event": round(size / count)}
+            for site, size in peak_sites.most_common(top)
+        ],
+    }
+    return report
+
+
+def run_profile(
+    events_per_size: int = 20,
+    sizes: Sequence[str] = SIZES,
+    seed: int = 1,
+    top: int = 5,
+) -> Dict[str, Dict[str, Any]]:
+    """Allocation report per event class, with INFO logging switched off."""
+    corpus = generate_corpus(events_per_size, sizes=sizes, seed=seed)
+    # The transform path logs every event at INFO
+    logging.disable(logging.INFO)
+    try:
+        return {
+            size: profile_corpus(events, top=top) for size, events in corpus.items()
+        }
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def load_budgets(path: Path = BUDGETS) -> Dict[str, Any]:
+    return json.loads(path.read_text())
+
+
+def check_budgets(
+    report: Dict[str, Dict[str, Any]], budgets: Dict[str, Any]
+) -> List[str]:
+    """One line per figure over budget, with the top sites to look at."""
+    failures = []
+    for size, figures in report.items():
+        limits = budgets.get("budgets", {}).get(size, {})
+        for name in FIGURES:
+            if name not in limits or figures[name] <= limits[name]:
+                continue
+            kind = "peak" if name == "peak_bytes" else "allocated"
+            hot = ", ".join(
+                f"{entry['site']} ({entry['bytes_per_event']} B)"
+                for entry in figures["sites"][kind][:3]
+            )
+            failures.append(
+                f"{size}: {name} {figures[name]} > budget {limits[name]}; "
+                f"top sites: {hot}"
+            )
+    return failures
+
+
+def print_report(report: Dict[str, Dict[str, Any]]) -> None:
+    for size, figures in report.items():
+        print(
+            f"{size:<7} peak {figures['peak_bytes']:>10} B  "
+            f"allocated {figures['allocated_bytes']:>10} B  "
+            f"retained {figures['retained_bytes']:>8} B  per event"
+        )
+        for kind in ("allocated", "peak"):
+            for entry in figures["sites"][kind]:
+                print(
+                    f"    {kind:<9} {entry['bytes_per_event']:>10} B  "
+                    f"{entry['site']}"
+                )
+
+
+def budgets_from(report: Dict[str, Dict[str, Any]], headroom: float) -> Dict:
+    """Budgets ``headroom`` above the peak and allocated figures of a run."""
+    return {
+        size: {
+            name: round(figures[name] * (1 + headroom))
+            for name in ("peak_bytes", "allocated_bytes")
+        }
+        for size, figures in report.items()
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budgets", type=Path, default=BUDGETS)
+    parser.add_argument("--events", type=int, help="events per size")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--top", type=int, default=5, help="sites per class")
+    parser.add_argument(
+        "--update-budgets",
+        action="store_true",
+        help="rewrite the budgets from this run (review and commit the diff)",
+    )
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    budgets: Dict[str, Any] = {}
+    if args.budgets.exists():
+        budgets = load_budgets(args.budgets)
+    settings = {**DEFAULT_SETTINGS, **budgets.get("settings", {})}
+    if args.events:
+        settings["events"] = args.events
+
+    report = run_profile(
+        events_per_size=settings["events"],
+        sizes=args.sizes.split(","),
+        seed=settings["seed"],
+        top=args.top,
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print_report(report)
+
+    if args.update_budgets:
+        updated = {
+            "settings": settings,
+            "budgets": budgets_from(report, settings["headroom"]),
+        }
+        args.budgets.write_text(json.dumps(updated, indent=2, sort_keys=True) + "\n")
+        print(f"Budgets written to {args.budgets}; review and commit the diff")
+        return 0
+
+    failures = check_budgets(report, budgets)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Generated corpus of realistic NetBird webhook payloads.
+
+Every payload starts from ``examples/test-event.json`` and adds the fields
+NetBird activity webhooks carry (``ID``, ``Timestamp``, ``Message``,
+``InitiatorID``, ``TargetID``, ``meta``). The three sizes differ in ``meta``:
+
+* ``small``: a handful of keys as a JSON object, like most activity events;
+* ``medium``: about 40 keys in Go map syntax, as sent by custom body templates
+  (see ``NETBIRD_BUG_WORKAROUND.md``), including address fields with ports;
+* ``huge``: about 2000 keys as a nested JSON object with lists of objects,
+  like bulk policy or route updates.
+
+Generation is deterministic for a given seed.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+SEED_EVENT = Path(__file__).resolve().parents[2] / "examples" / "test-event.json"
+
+SIZES = ("small", "medium", "huge")
+
+ACTIVITIES = [
+    ("peer.login", "Peer login"),
+    ("peer.add", "Peer added"),
+    ("user.invite", "User invited"),
+    ("policy.update", "Policy updated"),
+    ("route.update", "Route updated"),
+    ("setupkey.use", "Setup key used"),
+]
+
+OPERATING_SYSTEMS = ["linux", "darwin", "windows", "android", "ios"]
+
+_EPOCH = datetime(2025, 8, 28, tzinfo=timezone.utc)
+
+
+def load_seed_event() -> Dict[str, Any]:
+    with open(SEED_EVENT, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def to_go_map(values: Dict[str, Any]) -> str:
+    """Render a flat mapping the way Go's ``%v`` prints a ``map[string]any``."""
+    return "map[" + " ".join(f"{key}:{value}" for key, value in values.items()) + "]"
+
+
+def _address(rng: random.Random) -> str:
+    return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+def _meta(rng: random.Random, i: int, keys: int) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {
+        "peer_name": f"laptop-{i:05d}",
+        "os": rng.choice(OPERATING_SYSTEMS),
+        "source_addr": f"{_address(rng)}:{rng.randrange(1024, 65535)}",
+        "remote_addr": f"{_address(rng)}:51820",
+        "fqdn": f"laptop-{i:05d}.netbird.cloud",
+    }
+    for k in range(len(meta), keys):
+        meta[f"attr_{k}"] = f"value-{rng.randrange(10**6)}"
+    return meta
+
+
+def _huge_meta(rng: random.Random, i: int) -> Dict[str, Any]:
+    meta: Dict[str, Any] = _meta(rng, i, 1200)
+    meta["rules"] = [
+        {
+            "id": f"rule-{r}",
+            "enabled": rng.random() < 0.9,
+            "sources": [f"group-{rng.randrange(50)}" for _ in range(3)],
+            "peer_addr": f"{_address(rng)}:{rng.randrange(1024, 65535)}",
+        }
+        for r in range(150)
+    ]
+    meta["labels"] = {f"label_{k}": rng.randrange(1000) for k in range(200)}
+    return meta
+
+
+def make_event(seed: Dict[str, Any], size: str, i: int, rng: random.Random):
+    """One NetBird webhook payload of the given ``size``."""
+    activity, message = rng.choice(ACTIVITIES)
+    event = dict(seed)
+    event.update(
+        {
+            "ID": f"{i:08d}-{rng.getrandbits(32):08x}",
+            "Timestamp": (_EPOCH + timedelta(seconds=i)).isoformat(),
+            "Message": message,
+            "Activity": activity,
+            "InitiatorID": f"user-{rng.randrange(500)}@example.com",
+            "TargetID": f"peer-{rng.randrange(5000)}",
+            "AccountID": f"acct-{rng.randrange(20)}",
+        }
+    )
+    if size == "small":
+        event["meta"] = _meta(rng, i, 5)
+    elif size == "medium":
+        event["meta"] = to_go_map(_meta(rng, i, 40))
+    elif size == "huge":
+        event["meta"] = _huge_meta(rng, i)
+    else:
+        raise ValueError(f"unknown corpus size: {size}")
+    return event
+
+
+def generate_corpus(
+    events_per_size: int, sizes=SIZES, seed: int = 1
+) -> Dict[str, List[Dict[str, Any]]]:
+    """``events_per_size`` payloads for each size, deterministic for ``seed``."""
+    base = load_seed_event()
+    corpus = {}
+    for size in sizes:
+        rng = random.Random(f"{seed}-{size}")
+        corpus[size] = [make_event(base, size, i, rng) for i in range(events_per_size)]
+    return corpus
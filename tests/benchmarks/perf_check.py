@@ -0,0 +1,269 @@
+"""
+Performance regression gate for the transform pipeline benchmarks.
+
+Runs the benchmark suite (``tests/benchmarks/run.py``) and compares every
+``stage/size`` result with the committed ``baseline.json``:
+
+* throughput: the run fails if ops/s (median over chunks of events, best of
+  ``repeat`` runs) dropped by more than the benchmark's tolerance. Compare on
+  the machine class that recorded the baseline; with ``--normalize`` both
+  sides are divided by a fixed calibration workload instead, a rougher
+  comparison for baselines recorded elsewhere;
+* allocations: the run fails if blocks retained per event grew by more than
+  the allocation tolerance (plus one block of slack).
+
+Logging is configured as in production (``NB_LOG_LEVEL``, ``INFO`` by
+default) with output discarded, so extra per-event log calls show up as a
+throughput regression.
+
+Tolerances live in the baseline under ``tolerances``: ``default``,
+``allocations`` and optional ``stage/size`` glob patterns (for example
+``"compression/*": 0.4``). The baseline is only rewritten with
+``--update-baseline``; commit the resulting diff for review.
+
+Usage:
+    python -m tests.benchmarks.perf_check
+    python -m tests.benchmarks.perf_check --update-baseline
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .run import run_benchmarks
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+DEFAULT_SETTINGS = {
+    "events": 50,
+    "min_time": 0.2,
+    "alloc_events": 10,
+    "repeat": 3,
+    "seed": 1,
+}
+DEFAULT_TOLERANCES = {"default": 0.3, "allocations": 0.1}
+
+CALIBRATION_DOC = {
+    "ID": "calibration",
+    "meta": {f"key_{i}": f"value {i}" for i in range(40)},
+    "tags": list(range(20)),
+}
+
+
+def calibrate(seconds: float = 0.05, samples: int = 9) -> float:
+    """Median ops/s of a fixed JSON and string workload, as a machine speed unit."""
+    rates = []
+    for _ in range(samples):
+        operations = 0
+        started = time.perf_counter()
+        while True:
+            text = json.dumps(CALIBRATION_DOC)
+            data = json.loads(text)
+            "_".join(f"{key}_{value}" for key, value in data["meta"].items())
+            operations += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                break
+        rates.append(operations / elapsed)
+    return statistics.median(rates)
+
+
+def collect(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the suite ``repeat`` times; keep each benchmark's best median."""
+    benchmarks: Dict[str, Dict[str, float]] = {}
+    calibrations = []
+    for _ in range(settings["repeat"]):
+        calibrations.append(calibrate())
+        report = run_benchmarks(
+            events_per_size=settings["events"],
+            min_time=settings["min_time"],
+            alloc_events=settings["alloc_events"],
+            seed=settings["seed"],
+        )
+        for entry in report["results"]:
+            name = f"{entry['stage']}/{entry['size']}"
+            best = benchmarks.setdefault(
+                name,
+                {
+                    "ops_per_sec": 0.0,
+                    "alloc_blocks_per_event": entry["alloc_blocks_per_event"],
+                },
+            )
+            best["ops_per_sec"] = max(
+                best["ops_per_sec"], round(1e6 / entry["median_us_per_op"], 1)
+            )
+            best["alloc_blocks_per_event"] = min(
+                best["alloc_blocks_per_event"], entry["alloc_blocks_per_event"]
+            )
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "calibration_ops_per_sec": round(statistics.median(calibrations), 1),
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def tolerance_for(name: str, tolerances: Dict[str, float]) -> float:
+    """Most specific matching pattern wins; exact names beat globs."""
+    if name in tolerances:
+        return tolerances[name]
+    matches = [
+        (len(pattern), value)
+        for pattern, value in tolerances.items()
+        if pattern not in ("default", "allocations")
+        and fnmatch.fnmatchcase(name, pattern)
+    ]
+    if matches:
+        return max(matches)[1]
+    return tolerances.get("default", DEFAULT_TOLERANCES["default"])
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], normalize: bool = False
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Rows of the diff table and whether any benchmark regressed."""
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get("tolerances", {})}
+    base_unit = current_unit = 1.0
+    if normalize:
+        base_unit = baseline["environment"]["calibration_ops_per_sec"]
+        current_unit = current["environment"]["calibration_ops_per_sec"]
+    rows = []
+    failed = False
+    names = sorted(set(baseline["benchmarks"]) | set(current["benchmarks"]))
+    for name in names:
+        base = baseline["benchmarks"].get(name)
+        now = current["benchmarks"].get(name)
+        row: Dict[str, Any] = {"name": name}
+        if base is None:
+            row["status"] = "new"
+        elif now is None:
+            row["status"] = "MISSING"
+            failed = True
+        else:
+            limit = tolerance_for(name, tolerances)
+            change = (now["ops_per_sec"] / current_unit) / (
+                base["ops_per_sec"] / base_unit
+            ) - 1
+            alloc_limit = base["alloc_blocks_per_event"] * (
+                1 + tolerances["allocations"]
+            )
+            slower = change < -limit
+            heavier = now["alloc_blocks_per_event"] > alloc_limit + 1
+            if slower:
+                status = "SLOWER"
+            elif heavier:
+                status = "ALLOCS"
+            else:
+                status = "faster" if change > limit else "ok"
+            row.update(
+                baseline_ops=base["ops_per_sec"],
+                current_ops=now["ops_per_sec"],
+                change=change,
+                limit=limit,
+                baseline_blocks=base["alloc_blocks_per_event"],
+                current_blocks=now["alloc_blocks_per_event"],
+                status=status,
+            )
+            failed = failed or slower or heavier
+        rows.append(row)
+    return rows, failed
+
+
+def print_table(rows: Sequence[Dict[str, Any]]) -> None:
+    print(
+        f"{'benchmark':<32} {'base ops/s':>12} {'now ops/s':>12} "
+        f"{'change':>8} {'limit':>7} {'blocks':>15}  status"
+    )
+    for row in rows:
+        if "change" not in row:
+            print(
+                f"{row['name']:<32} {'':>12} {'':>12} {'':>8} {'':>7} {'':>15}  "
+                f"{row['status']}"
+            )
+            continue
+        blocks = f"{row['baseline_blocks']:g}->{row['current_blocks']:g}"
+        print(
+            f"{row['name']:<32} {row['baseline_ops']:>12.1f} "
+            f"{row['current_ops']:>12.1f} {row['change']:>+8.1%} "
+            f"{-row['limit']:>+7.0%} {blocks:>15}  {row['status']}"
+        )
+
+
+def configure_logging(level: str) -> None:
+    """Production-like logging whose output is thrown away."""
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="rewrite the baseline from this run (review and commit the diff)",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="scale by the calibration workload (baseline from another machine)",
+    )
+    parser.add_argument("--output", help="also write this run's results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Any] = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+    elif not args.update_baseline:
+        print(f"No baseline at {args.baseline}; create one with --update-baseline")
+        return 2
+    settings = {**DEFAULT_SETTINGS, **baseline.get("settings", {})}
+
+    configure_logging(os.environ.get("NB_LOG_LEVEL", "INFO").upper())
+    current = collect(settings)
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n")
+
+    if args.update_baseline:
+        updated = {
+            "settings": settings,
+            "tolerances": baseline.get("tolerances", DEFAULT_TOLERANCES),
+            **current,
+        }
+        args.baseline.write_text(json.dumps(updated, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}; review and commit the diff")
+        return 0
+
+    rows, failed = compare(baseline, current, normalize=args.normalize)
+    print_table(rows)
+    unit_ratio = (
+        current["environment"]["calibration_ops_per_sec"]
+        / baseline["environment"]["calibration_ops_per_sec"]
+    )
+    print(f"\nmachine speed vs baseline: {unit_ratio:.2f}x (calibration)")
+    if not args.normalize and abs(unit_ratio - 1) > 0.2:
+        print("warning: this machine differs from the baseline's; see --normalize")
+    if failed:
+        print("Performance regression detected")
+        return 1
+    print("No performance regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Run the transform pipeline micro-benchmarks and write JSON results.
+
+Each stage is timed on its own over the generated corpus, with its input
+prepared by the stages before it, so results isolate one function:
+
+``from_raw_json`` -> ``parse_json_fields`` -> ``flatten_dict`` ->
+``enhance_address_fields``; ``parse_go_map`` on the ``meta`` field rendered
+as a Go map; ``from_netbird_event`` on the event dict; ``to_json`` on the
+resulting message; ``compression`` (zlib, as used for GELF) on its JSON.
+
+For every stage and corpus size the output records operations per second
+and allocations per event, measured in a separate pass so tracing does not
+distort the timings: memory blocks and bytes still allocated when the call
+returns (its result and anything it cached) and the peak traced memory
+during the call, which also covers temporaries freed before it returned.
+
+Usage:
+    python -m tests.benchmarks.run --events 200 --output benchmark.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.models.gelf import (
+    GELFMessage,
+    enhance_address_fields,
+    flatten_dict,
+    parse_go_map,
+    parse_json_fields,
+)
+from src.models.netbird import NetbirdEvent
+
+from .corpus import SIZES, generate_corpus, to_go_map
+
+Stage = Tuple[Callable[[Dict[str, Any]], Any], Callable[[Any], Any]]
+
+
+def _event_dict(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return NetbirdEvent.from_raw_json(raw).dict()
+
+
+def _flat_meta(raw: Dict[str, Any]) -> Dict[str, Any]:
+    meta = parse_json_fields({"meta": raw["meta"]})["meta"]
+    return {k: v for k, v in meta.items() if not isinstance(v, (dict, list))}
+
+
+def _message(raw: Dict[str, Any]) -> GELFMessage:
+    return GELFMessage.from_netbird_event(
+        _event_dict(raw), host="nb_streamer_bench", tenant_id="bench"
+    )
+
+
+# name -> (prepare input from a raw corpus event, operation under test)
+STAGES: Dict[str, Stage] = {
+    "from_raw_json": (lambda raw: raw, NetbirdEvent.from_raw_json),
+    "parse_json_fields": (_event_dict, parse_json_fields),
+    "parse_go_map": (lambda raw: to_go_map(_flat_meta(raw)), parse_go_map),
+    "flatten_dict": (lambda raw: parse_json_fields(_event_dict(raw)), flatten_dict),
+    "enhance_address_fields": (
+        lambda raw: flatten_dict(parse_json_fields(_event_dict(raw))),
+        enhance_address_fields,
+    ),
+    "from_netbird_event": (
+        _event_dict,
+        lambda event: GELFMessage.from_netbird_event(
+            event, host="nb_streamer_bench", tenant_id="bench"
+        ),
+    ),
+    "to_json": (_message, lambda message: message.to_json()),
+    "compression": (
+        lambda raw: _message(raw).to_json().encode("utf-8"),
+        zlib.compress,
+    ),
+}
+
+
+def time_stage(
+    operation: Callable[[Any], Any],
+    inputs: Sequence[Any],
+    min_time: float,
+    chunk: int = 10,
+) -> Tuple[int, float, float]:
+    """
+    Run ``operation`` over ``inputs`` in passes for at least ``min_time``.
+
+    Each pass is timed in chunks of ``chunk`` inputs. Returns the iteration
+    count, the total elapsed time and the median time per operation across
+    chunks, which is the least noisy figure for comparisons between runs.
+    """
+    for item in inputs:  # warm-up pass
+        operation(item)
+    iterations = 0
+    per_op: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while True:
+            for offset in range(0, len(inputs), chunk):
+                batch = inputs[offset : offset + chunk]
+                chunk_started = time.perf_counter()
+                for item in batch:
+                    operation(item)
+                per_op.append((time.perf_counter() - chunk_started) / len(batch))
+            iterations += len(inputs)
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                return iterations, elapsed, statistics.median(per_op)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def allocations(
+    operation: Callable[[Any], Any], inputs: Sequence[Any]
+) -> Dict[str, float]:
+    """Per-event allocation figures of ``operation`` under ``tracemalloc``."""
+    peak_bytes = 0
+    retained_bytes = 0
+    retained_blocks = 0
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            blocks_before = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = operation(item)
+            current, peak = tracemalloc.get_traced_memory()
+            retained_blocks += sys.getallocatedblocks() - blocks_before
+            peak_bytes += peak - before
+            retained_bytes += current - before
+            del result
+    finally:
+        tracemalloc.stop()
+    count = len(inputs)
+    return {
+        "alloc_blocks_per_event": round(retained_blocks / count, 1),
+        "alloc_bytes_per_event": round(retained_bytes / count, 1),
+        "alloc_peak_bytes_per_event": round(peak_bytes / count, 1),
+    }
+
+
+def run_benchmarks(
+    events_per_size: int = 100,
+    sizes: Sequence[str] = SIZES,
+    stages: Optional[Sequence[str]] = None,
+    min_time: float = 0.5,
+    alloc_events: int = 20,
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """Benchmark every stage on every corpus size; returns the JSON report."""
+    corpus = generate_corpus(events_per_size, sizes=sizes, seed=seed)
+    results: List[Dict[str, Any]] = []
+    for name in stages or STAGES:
+        prepare, operation = STAGES[name]
+        for size, events in corpus.items():
+            inputs = [prepare(raw) for raw in events]
+            iterations, elapsed, median = time_stage(operation, inputs, min_time)
+            entry = {
+                "stage": name,
+                "size": size,
+                "iterations": iterations,
+                "ops_per_sec": round(iterations / elapsed, 1),
+                "us_per_op": round(elapsed / iterations * 1e6, 3),
+                "median_us_per_op": round(median * 1e6, 3),
+            }
+            entry.update(allocations(operation, inputs[:alloc_events]))
+            results.append(entry)
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "corpus": {
+            size: {
+                "events": len(events),
+                "mean_bytes": round(
+                    sum(len(json.dumps(e)) for e in events) / len(events)
+                ),
+            }
+            for size, events in corpus.items()
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=100, help="events per size")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--alloc-events", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # The transform path logs every event at INFO
+    logging.disable(logging.INFO)
+    try:
+        report = run_benchmarks(
+            events_per_size=args.events,
+            sizes=args.sizes.split(","),
+            stages=args.stages.split(","),
+            min_time=args.min_time,
+            alloc_events=args.alloc_events,
+            seed=args.seed,
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        for entry in report["results"]:
+            print(
+                f"{entry['stage']:<24} {entry['size']:<7} "
+                f"{entry['ops_per_sec']:>12.1f} ops/s "
+                f"{entry['alloc_blocks_per_event']:>9.1f} blocks/event"
+            )
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+Soak test: drive the app in-process at a steady rate and look for leaks.
+
+The app is imported in this process with Graylog pointed at the fake sink
+(``src.tools.fake_graylog``, in its own process so its per-host counters do
+not show up here) and requests go straight to the ASGI app through
+``httpx``, with its lifespan running, so only the service's own code is on
+the path. Events come from the benchmark corpus with churning
+tenants and payload shapes: the tenant and extra-field namespaces keep
+moving, so every structure keyed by tenant or event shape sees new keys for
+the whole run, and only bounded structures stay flat.
+
+Every ``--sample-interval`` seconds the run records RSS, objects tracked by
+the garbage collector, GC collections per generation and the size of the
+``/stats`` response (a proxy for per-tenant state). After the warm-up a
+least-squares line is fitted to each series; a series is flagged as growing
+when the fit is clearly linear (r² above ``--min-r2``) and the line rises by
+more than the series' threshold over the measured window.
+
+Usage:
+    python -m tests.benchmarks.soak --duration 600 --rate 200
+    python -m tests.benchmarks.soak --duration 3600 --output soak.json
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .corpus import SIZES, load_seed_event, make_event
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Caps reached within the warm-up at the default rate and churn
+SOAK_CAPS = {"NB_STATS_MAX_TENANTS": "100", "NB_PLAN_CACHE_SIZE": "64"}
+
+# Relative rise over the measured window above which a linear trend fails
+DEFAULT_THRESHOLDS = {
+    "rss_bytes": 0.1,
+    "gc_objects": 0.05,
+    "stats_bytes": 0.2,
+}
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process; peak RSS where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class EventSource:
+    """
+    Corpus events whose tenant and extra fields drift over time.
+
+    Tenants are drawn from a window of ``tenant_window`` names that moves on
+    by one every ``churn_every`` events; likewise for the names of a few
+    extra top-level fields, so payload shapes keep changing as well.
+    """
+
+    def __init__(
+        self,
+        sizes: Sequence[str] = SIZES,
+        weights: Sequence[float] = (90, 9, 1),
+        tenant_window: int = 50,
+        shape_window: int = 20,
+        churn_every: int = 100,
+        seed: int = 1,
+    ):
+        self.rng = random.Random(seed)
+        self.sizes = list(sizes)
+        self.weights = list(weights)[: len(self.sizes)]
+        self.tenant_window = tenant_window
+        self.shape_window = shape_window
+        self.churn_every = churn_every
+        self.base = load_seed_event()
+        # A pool per size keeps generation out of the way of the sender
+        self.pool = {
+            size: [make_event(self.base, size, i, self.rng) for i in range(20)]
+            for size in self.sizes
+        }
+        self.sequence = 0
+
+    def next(self) -> bytes:
+        self.sequence += 1
+        offset = self.sequence // self.churn_every
+        size = self.rng.choices(self.sizes, self.weights)[0]
+        event = dict(self.rng.choice(self.pool[size]))
+        event["ID"] = f"soak-{self.sequence}"
+        event["NB_Tenant"] = f"soak-{offset + self.rng.randrange(self.tenant_window)}"
+        for _ in range(self.rng.randrange(4)):
+            field = offset + self.rng.randrange(self.shape_window)
+            event[f"extra_{field}"] = self.sequence
+        return json.dumps(event).encode()
+
+
+def fit_trend(
+    times: Sequence[float], values: Sequence[float], threshold: float, min_r2: float
+) -> Dict[str, Any]:
+    """Least-squares line through ``values``; ``growing`` if it is a leak."""
+    span = times[-1] - times[0] if len(times) > 1 else 0
+    mean = statistics.fmean(values) if values else 0.0
+    if len(times) < 3 or span <= 0 or len(set(values)) < 2:
+        return {"slope_per_hour": 0.0, "r2": 0.0, "rise": 0.0, "growing": False}
+    slope, _ = statistics.linear_regression(times, values)
+    r2 = statistics.correlation(times, values) ** 2
+    rise = slope * span / mean if mean else 0.0
+    return {
+        "slope_per_hour": round(slope * 3600, 1),
+        "r2": round(r2, 3),
+        "rise": round(rise, 4),
+        "growing": slope > 0 and r2 >= min_r2 and rise > threshold,
+    }
+
+
+def analyse(
+    samples: List[Dict[str, Any]],
+    warmup: float,
+    thresholds: Dict[str, float],
+    min_r2: float,
+) -> Dict[str, Dict[str, Any]]:
+    """Trend of every thresholded series over the samples after ``warmup``."""
+    measured = [sample for sample in samples if sample["elapsed"] >= warmup]
+    times = [sample["elapsed"] for sample in measured]
+    return {
+        name: fit_trend(times, [sample[name] for sample in measured], threshold, min_r2)
+        for name, threshold in thresholds.items()
+    }
+
+
+def free_port(kind: int = socket.SOCK_STREAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_sink(udp_port: int, http_port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.tools.fake_graylog",
+            "--host",
+            "127.0.0.1",
+            "--udp",
+            str(udp_port),
+            "--http",
+            str(http_port),
+            "--keep",
+            "0",
+            "--quiet",
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def sink_stats(client: Any, url: str, timeout: float = 10.0) -> Dict:
+    """The sink's ``/stats``, waiting up to ``timeout`` for it to come up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get(f"{url}/stats")
+            return response.json()
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def configure_app(sink_port: int) -> Any:
+    """
+    Import ``src.main`` with Graylog pointed at the fake sink.
+
+    Bounded structures get small caps unless set in the environment, so the
+    churn fills them early in the run and later growth means a leak.
+    """
+    os.environ.update(
+        NB_GRAYLOG_HOST="127.0.0.1",
+        NB_GRAYLOG_PORT=str(sink_port),
+        NB_GRAYLOG_PROTOCOL="udp",
+        NB_AUTH_TYPE="none",
+    )
+    for name, value in SOAK_CAPS.items():
+        os.environ.setdefault(name, value)
+    if "src.main" in sys.modules:
+        raise RuntimeError("src.main is already imported; run the soak standalone")
+    return importlib.import_module("src.main")
+
+
+async def soak(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here so nothing reads the configuration before it is set
+    import httpx
+
+    udp_port = free_port(socket.SOCK_DGRAM)
+    sink_url = f"http://127.0.0.1:{free_port()}"
+    sink = start_sink(udp_port, int(sink_url.rsplit(":", 1)[1]))
+    source = EventSource(
+        tenant_window=args.tenant_window,
+        shape_window=args.shape_window,
+        churn_every=args.churn_every,
+        seed=args.seed,
+    )
+    samples: List[Dict[str, Any]] = []
+    outcomes: Dict[int, int] = {}
+    interval = 1 / args.rate
+    try:
+        async with httpx.AsyncClient() as sink_client:
+            await sink_stats(sink_client, sink_url)
+        main = configure_app(udp_port)
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://soak"
+            ) as client:
+
+                async def sample(elapsed: float) -> None:
+                    response = await client.get("/stats")
+                    gc_stats = gc.get_stats()
+                    samples.append(
+                        {
+                            "elapsed": round(elapsed, 2),
+                            "events": source.sequence,
+                            "rss_bytes": rss_bytes(),
+                            "gc_objects": len(gc.get_objects()),
+                            "gc_collections": [g["collections"] for g in gc_stats],
+                            "stats_bytes": len(response.content),
+                        }
+                    )
+
+                started = time.perf_counter()
+                next_sample = 0.0
+                sent = 0
+                while True:
+                    elapsed = time.perf_counter() - started
+                    if elapsed >= next_sample:
+                        await sample(elapsed)
+                        next_sample += args.sample_interval
+                        if args.progress:
+                            last = samples[-1]
+                            print(
+                                f"{last['elapsed']:>8.0f}s {last['events']:>9} events "
+                                f"rss {last['rss_bytes'] / 2**20:>7.1f} MiB "
+                                f"objects {last['gc_objects']:>8}",
+                                file=sys.stderr,
+                            )
+                    if elapsed >= args.duration:
+                        break
+                    # Open loop: hold the schedule, never burst to catch up
+                    delay = sent * interval - elapsed
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    elif -delay > args.sample_interval:
+                        sent = int(elapsed / interval)
+                    response = await client.post("/events", content=source.next())
+                    outcomes[response.status_code] = (
+                        outcomes.get(response.status_code, 0) + 1
+                    )
+                    sent += 1
+                await asyncio.sleep(0.2)  # let the last datagrams arrive
+        async with httpx.AsyncClient() as sink_client:
+            delivered = await sink_stats(sink_client, sink_url)
+    finally:
+        sink.terminate()
+        sink.wait(timeout=10)
+
+    duration = samples[-1]["elapsed"] if samples else 0.0
+    thresholds = {**DEFAULT_THRESHOLDS}
+    if args.rss_threshold is not None:
+        thresholds["rss_bytes"] = args.rss_threshold
+    warmup = args.duration * args.warmup
+    return {
+        "settings": {
+            key: getattr(args, key)
+            for key in (
+                "duration",
+                "rate",
+                "sample_interval",
+                "warmup",
+                "tenant_window",
+                "shape_window",
+                "churn_every",
+                "seed",
+                "min_r2",
+            )
+        },
+        "events_sent": source.sequence,
+        "achieved_rate": round(source.sequence / duration, 1) if duration else 0.0,
+        "distinct_tenants": source.sequence // args.churn_every + args.tenant_window,
+        "responses": {str(code): count for code, count in sorted(outcomes.items())},
+        "sink": {
+            key: delivered[key] for key in ("received", "wire_bytes", "decode_errors")
+        },
+        "gc_collections": [
+            last - first
+            for first, last in zip(
+                samples[0]["gc_collections"], samples[-1]["gc_collections"]
+            )
+        ],
+        "trends": analyse(samples, warmup, thresholds, args.min_r2),
+        "samples": samples,
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(
+        f"{report['events_sent']} events at {report['achieved_rate']}/s, "
+        f"~{report['distinct_tenants']} tenants, responses {report['responses']}, "
+        f"sink {report['sink']}"
+    )
+    print(f"GC collections per generation: {report['gc_collections']}")
+    print(f"{'series':<12} {'slope/hour':>14} {'r2':>6} {'rise':>8}  verdict")
+    for name, trend in report["trends"].items():
+        verdict = "GROWING" if trend["growing"] else "ok"
+        print(
+            f"{name:<12} {trend['slope_per_hour']:>14.1f} {trend['r2']:>6.3f} "
+            f"{trend['rise']:>+8.1%}  {verdict}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=300, help="seconds")
+    parser.add_argument("--rate", type=float, default=200, help="events per second")
+    parser.add_argument("--sample-interval", type=float, default=5, help="seconds")
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=0.2,
+        help="fraction of the run left out of the trend fit",
+    )
+    parser.add_argument("--tenant-window", type=int, default=50)
+    parser.add_argument("--shape-window", type=int, default=20)
+    parser.add_argument(
+        "--churn-every",
+        type=int,
+        default=100,
+        help="events between shifts of the tenant and field name windows",
+    )
+    parser.add_argument("--min-r2", type=float, default=0.8)
+    parser.add_argument("--rss-threshold", type=float, help="override the RSS limit")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--progress", action="store_true", help="print every sample")
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Per-event INFO logs would dominate the run; warnings still show
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)
+    report = asyncio.run(soak(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+    print_summary(report)
+    growing = [name for name, trend in report["trends"].items() if trend["growing"]]
+    if growing:
+        print(f"Linear growth detected: {', '.join(growing)}")
+        return 1
+    print("No linear growth detected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Unit tests for event-loop lag monitoring and load shedding."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.admission import (
+    ADMIT,
+    ADMIT_PRIORITY_ONLY,
+    SHED,
+    AdmissionController,
+    LoopLagMonitor,
+)
+
+client = TestClient(main.app)
+
+
+@pytest.mark.unit
+def test_lag_monitor_detects_blocked_loop() -> None:
+    """Blocking the loop shows up as probe lag."""
+
+    async def scenario() -> LoopLagMonitor:
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # block the event loop
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.max_lag >= 0.05
+
+
+@pytest.mark.unit
+def test_in_flight_limit_sheds() -> None:
+    """Requests over the in-flight limit are shed until others leave."""
+    controller = AdmissionController(LoopLagMonitor(0.1), 2, lag_threshold_ms=0)
+    assert controller.try_enter() == ADMIT
+    assert controller.try_enter() == ADMIT
+    assert controller.try_enter() == SHED
+    assert controller.shedding
+    controller.leave()
+    assert controller.try_enter() == ADMIT
+    assert controller.summary()["shed_by_reason"]["in_flight"] == 1
+
+
+@pytest.mark.unit
+def test_lag_overload_keeps_high_severity_only() -> None:
+    """With a keep level configured, lag overload filters by severity."""
+    monitor = LoopLagMonitor(0.1)
+    monitor.record(0.5)
+    controller = AdmissionController(monitor, 0, lag_threshold_ms=100, keep_level=4)
+    assert controller.try_enter() == ADMIT_PRIORITY_ONLY
+    assert controller.keep_event(3)
+    assert not controller.keep_event(6)
+
+    strict = AdmissionController(monitor, 0, lag_threshold_ms=100)
+    assert strict.try_enter() == SHED
+
+
+@pytest.mark.unit
+def test_events_endpoint_returns_503_when_shedding(monkeypatch) -> None:
+    """Shed requests get 503 and shedding counts appear in /stats."""
+    monitor = LoopLagMonitor(0.1)
+    monitor.record(1.0)
+    controller = AdmissionController(monitor, 0, lag_threshold_ms=100, keep_level=3)
+    monkeypatch.setattr(main, "admission", controller)
+
+    low = json.dumps({"NB_Tenant": "acme", "level": "info"})
+    response = client.post("/events", content=low)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    high = json.dumps({"NB_Tenant": "acme", "level": "error"})
+    assert client.post("/events", content=high).status_code == 200
+    assert controller.in_flight == 0
+
+    admission_stats = client.get("/stats").json()["statistics"]["admission"]
+    assert admission_stats["shedding"] is True
+    assert admission_stats["shed_by_reason"]["low_severity"] == 1
+    assert admission_stats["kept_high_severity"] == 1
@@ -0,0 +1,155 @@
+"""Unit tests for windowed event aggregation."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.aggregator import EventAggregator, activity_code
+
+
+def login(event_id: str, initiator: str = "alice", ts: str = "2025-08-28T10:00:00Z"):
+    return {
+        "ID": event_id,
+        "Message": "User logged in peer",
+        "InitiatorID": initiator,
+        "Timestamp": ts,
+    }
+
+
+def make_aggregator(**overrides) -> EventAggregator:
+    options = dict(
+        enabled=True,
+        window_seconds=60,
+        group_fields=["InitiatorID"],
+        match=[],
+        max_groups=100,
+        sample_ids=2,
+    )
+    options.update(overrides)
+    return EventAggregator(**options)
+
+
+class Recorder:
+    def __init__(self):
+        self.emitted = []
+
+    async def __call__(self, tenant, event, fields):
+        self.emitted.append((tenant, event, fields))
+        return True
+
+
+@pytest.mark.unit
+def test_activity_code_prefers_code_over_message() -> None:
+    assert activity_code({"ActivityCode": 7, "Message": "x"}) == "7"
+    assert activity_code({"Message": "Peer login"}) == "Peer login"
+    assert activity_code({}) == ""
+
+
+@pytest.mark.unit
+def test_events_are_grouped_and_summarised() -> None:
+    aggregator = make_aggregator()
+    recorder = Recorder()
+    aggregator.emit = recorder
+
+    async def scenario():
+        await aggregator.add("acme", login("1", ts="2025-08-28T10:00:00Z"))
+        await aggregator.add("acme", login("2", ts="2025-08-28T10:00:05Z"))
+        await aggregator.add("acme", login("3", ts="2025-08-28T10:00:09Z"))
+        await aggregator.add("acme", login("4", initiator="bob"))
+        await aggregator.add("other", login("5"))
+        return await aggregator.flush(force=True)
+
+    assert asyncio.run(scenario()) == 3
+    tenant, event, fields = recorder.emitted[0]
+    assert (tenant, event["ID"]) == ("acme", "1")
+    assert fields == {
+        "_NB_count": 3,
+        "_NB_first_timestamp": "2025-08-28T10:00:00Z",
+        "_NB_last_timestamp": "2025-08-28T10:00:09Z",
+        "_NB_sampled_ids": "1,2",
+    }
+    # Single-event groups are emitted without summary fields
+    assert recorder.emitted[1][2] == {}
+    assert aggregator.summary()["events_saved"] == 2
+
+
+@pytest.mark.unit
+def test_group_count_is_bounded() -> None:
+    aggregator = make_aggregator(max_groups=2)
+    recorder = Recorder()
+    aggregator.emit = recorder
+
+    async def scenario():
+        for initiator in ("a", "b", "c"):
+            await aggregator.add("acme", login("1", initiator=initiator))
+
+    asyncio.run(scenario())
+    assert aggregator.summary()["open_groups"] == 2
+    assert aggregator.summary()["emitted_early"] == 1
+    assert recorder.emitted[0][1]["InitiatorID"] == "a"
+
+
+@pytest.mark.unit
+def test_concurrent_adds_at_capacity_share_one_group() -> None:
+    """A second add() for the same key while the evicted group emits joins it."""
+    aggregator = make_aggregator(max_groups=1)
+    emitted = []
+
+    async def slow_emit(tenant, event, fields):
+        await asyncio.sleep(0.01)
+        emitted.append((event["InitiatorID"], fields.get("_NB_count", 1)))
+        return True
+
+    aggregator.emit = slow_emit
+
+    async def scenario():
+        await aggregator.add("acme", login("1", initiator="a"))
+        await asyncio.gather(
+            aggregator.add("acme", login("2", initiator="b")),
+            aggregator.add("acme", login("3", initiator="b")),
+        )
+        await aggregator.flush(force=True)
+
+    asyncio.run(scenario())
+    assert emitted == [("a", 1), ("b", 2)]
+    assert aggregator.summary()["emitted_early"] == 1
+
+
+@pytest.mark.unit
+def test_match_restricts_aggregated_events() -> None:
+    aggregator = make_aggregator(match=["User logged in peer"])
+    assert aggregator.matches(login("1"))
+    assert not aggregator.matches({"Message": "Route created"})
+    assert not make_aggregator(enabled=False).matches(login("1"))
+
+
+@pytest.mark.unit
+def test_partial_windows_are_flushed_on_shutdown(monkeypatch) -> None:
+    """Events still buffered when the app stops are forwarded."""
+    aggregator = make_aggregator()
+    monkeypatch.setattr(main, "aggregator", aggregator)
+    forwarded = []
+
+    async def forward(message):
+        forwarded.append(message)
+        return True
+
+    monkeypatch.setattr(main.graylog_forwarder, "forward_event", forward)
+
+    monkeypatch.setitem(main.stats, "total_events_received", 0)
+    monkeypatch.setitem(main.stats, "total_events_forwarded", 0)
+
+    with TestClient(main.app) as client:
+        for event_id in ("1", "2"):
+            body = json.dumps(dict(login(event_id), NB_Tenant="acme"))
+            assert client.post("/events", content=body).json()["status"] == "aggregated"
+        assert forwarded == []
+
+    assert len(forwarded) == 1
+    assert forwarded[0].custom_fields["_NB_count"] == 2
+    # Both events are counted, not the one summary message
+    assert main.stats["total_events_received"] == 2
+    assert main.stats["total_events_forwarded"] == 2
@@ -0,0 +1,55 @@
+"""Per-event allocation budgets for the transform and serialization path."""
+
+import pytest
+
+from tests.benchmarks.allocations import (
+    DEFAULT_SETTINGS,
+    check_budgets,
+    load_budgets,
+    profile_corpus,
+    run_profile,
+)
+from tests.benchmarks.corpus import SIZES
+
+
+@pytest.fixture(scope="module")
+def budgets():
+    return load_budgets()
+
+
+@pytest.fixture(scope="module")
+def report(budgets):
+    settings = {**DEFAULT_SETTINGS, **budgets.get("settings", {})}
+    return run_profile(events_per_size=settings["events"], seed=settings["seed"])
+
+
+@pytest.mark.unit
+def test_every_event_class_is_within_budget(report, budgets) -> None:
+    assert set(budgets["budgets"]) == set(SIZES)
+    failures = check_budgets(report, budgets)
+    assert not failures, "\n".join(failures)
+
+
+@pytest.mark.unit
+def test_report_names_the_sites_behind_the_figures(report) -> None:
+    for figures in report.values():
+        assert 0 < figures["peak_bytes"] < figures["allocated_bytes"]
+        assert figures["sites"]["allocated"][0]["site"].startswith("src/")
+        assert figures["sites"]["peak"]
+
+    over = check_budgets(report, {"budgets": {"small": {"peak_bytes": 1}}})
+    assert len(over) == 1
+    assert over[0].startswith("small: peak_bytes")
+    assert "top sites: src/" in over[0]
+
+
+@pytest.mark.unit
+def test_allocations_are_counted_per_event() -> None:
+    def copy_heavy(item):
+        return [dict(item) for _ in range(50)]
+
+    light = profile_corpus([{"a": 1}] * 2, operation=lambda item: dict(item))
+    heavy = profile_corpus([{"a": 1}] * 2, operation=copy_heavy)
+    assert heavy["allocated_bytes"] > 20 * light["allocated_bytes"]
+    assert heavy["peak_bytes"] > 20 * light["peak_bytes"]
+    assert light["retained_bytes"] == 0
@@ -0,0 +1,44 @@
+"""Smoke tests for the transform pipeline benchmark suite."""
+
+import json
+
+import pytest
+
+from src.models.gelf import parse_go_map
+from tests.benchmarks.corpus import SIZES, generate_corpus, to_go_map
+from tests.benchmarks.run import STAGES, main, run_benchmarks
+
+
+@pytest.mark.unit
+def test_corpus_is_deterministic_and_sized() -> None:
+    corpus = generate_corpus(3, seed=7)
+    assert corpus == generate_corpus(3, seed=7)
+    assert corpus != generate_corpus(3, seed=8)
+    sizes = {size: len(json.dumps(events[0])) for size, events in corpus.items()}
+    assert sizes["small"] < sizes["medium"] < sizes["huge"]
+    # Seeded from examples/test-event.json
+    assert all(event["type"] == "peer_login" for event in corpus["small"])
+    assert corpus["medium"][0]["meta"].startswith("map[")
+
+
+@pytest.mark.unit
+def test_go_map_rendering_round_trips() -> None:
+    values = {"peer_name": "laptop", "source_addr": "10.0.0.1:51820"}
+    assert parse_go_map(to_go_map(values)) == values
+
+
+@pytest.mark.unit
+def test_every_stage_and_size_is_reported(tmp_path) -> None:
+    report = run_benchmarks(events_per_size=2, min_time=0, alloc_events=1)
+    combos = {(entry["stage"], entry["size"]) for entry in report["results"]}
+    assert combos == {(stage, size) for stage in STAGES for size in SIZES}
+    for entry in report["results"]:
+        assert entry["ops_per_sec"] > 0
+        assert entry["alloc_peak_bytes_per_event"] >= 0
+
+    output = tmp_path / "benchmark.json"
+    args = ["--events", "1", "--min-time", "0", "--alloc-events", "1"]
+    args += ["--sizes", "small", "--stages", "to_json", "--output", str(output)]
+    assert main(args) == 0
+    written = json.loads(output.read_text())
+    assert [e["stage"] for e in written["results"]] == ["to_json"]
@@ -0,0 +1,107 @@
+"""Unit tests for request body capture."""
+
+import asyncio
+import io
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.capture import CaptureWriter
+from src.tools.convert import convert
+from src.utils.archive import parse_line, raw_body, read_archives
+
+
+def body(event_id: str, tenant: str = "Acme") -> bytes:
+    return json.dumps(
+        {"NB_Tenant": tenant, "ID": event_id, "Message": "Peer login"}
+    ).encode()
+
+
+def captured(directory) -> list:
+    paths = sorted(str(path) for path in directory.glob("*.ndjson.gz"))
+    return [line for _, _, line in read_archives(paths)]
+
+
+@pytest.mark.unit
+def test_captures_are_filtered_sampled_and_replayable(tmp_path) -> None:
+    writer = CaptureWriter(True, str(tmp_path), tenants=["ACME", "beta"])
+
+    async def run() -> None:
+        writer.start()
+        assert writer.capture("acme", body("1"), 1756375200.5)
+        assert not writer.capture("other", body("2", "other"), 1756375201.0)
+        assert writer.capture("beta", body("3", "beta"), 1756375202.0)
+        await writer.stop()
+
+    asyncio.run(run())
+    lines = captured(tmp_path)
+    assert [raw_body(line) for line in lines] == [body("1"), body("3", "beta")]
+    first = parse_line(lines[0])
+    assert first["tenant"] == "acme" and first["event"]["ID"] == "1"
+    assert first["received_at"].isoformat() == "2025-08-28T10:00:00.500000+00:00"
+    assert writer.summary()["skipped_tenant"] == 1
+    assert writer.summary()["written"] == 2
+
+    output = io.BytesIO()
+    assert convert([str(p) for p in tmp_path.glob("*.gz")], output)["converted"] == 2
+
+    sampled = CaptureWriter(True, str(tmp_path), sample_rate=0.25)
+    kept = sum(sampled.capture("acme", b"{}", 0.0) for _ in range(2000))
+    assert 350 < kept < 650
+    assert sampled.summary()["skipped_sample"] == 2000 - kept
+
+
+@pytest.mark.unit
+def test_full_queue_drops_instead_of_waiting(tmp_path) -> None:
+    writer = CaptureWriter(True, str(tmp_path), queue_size=2)
+    results = [writer.capture("acme", body(str(i)), 0.0) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    assert writer.summary()["dropped"] == 3
+    assert writer.summary()["queue_depth"] == 2
+    assert not CaptureWriter(False, str(tmp_path)).capture("acme", b"{}", 0.0)
+
+
+@pytest.mark.unit
+def test_files_rotate_by_size_and_stay_hidden_while_open(tmp_path) -> None:
+    writer = CaptureWriter(True, str(tmp_path), rotate_bytes=1, flush_seconds=60)
+
+    async def run() -> None:
+        writer.start()
+        for i in range(3):
+            writer.capture("acme", body(str(i)), 0.0)
+            writer._write(writer._drain())
+            assert os.path.exists(writer.file.path + ".part")
+        await writer.stop()
+
+    asyncio.run(run())
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 3
+    assert not list(tmp_path.glob("*.part"))
+    assert [json.loads(raw_body(line))["ID"] for line in captured(tmp_path)] == [
+        "0",
+        "1",
+        "2",
+    ]
+
+
+@pytest.mark.unit
+def test_events_endpoint_captures_accepted_bodies(monkeypatch, tmp_path) -> None:
+    writer = CaptureWriter(True, str(tmp_path))
+    monkeypatch.setattr(main, "capture_writer", writer)
+
+    async def forward(message):
+        return True
+
+    monkeypatch.setattr(main.graylog_forwarder, "forward_event", forward)
+
+    with TestClient(main.app) as client:
+        assert client.post("/events", content=body("1")).status_code == 200
+        assert client.post("/events", content=b"{").status_code == 400
+        stats = client.get("/stats").json()["statistics"]
+        assert stats["capture"]["queued"] == 1
+
+    lines = captured(tmp_path)
+    assert [raw_body(line) for line in lines] == [body("1")]
+    assert parse_line(lines[0])["tenant"] == "acme"
@@ -0,0 +1,48 @@
+"""Unit tests for off-loop GELF compression."""
+
+import asyncio
+import zlib
+
+import pytest
+
+from src.config import config
+from src.services.graylog import GraylogService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(config, "nb_compression_enabled", True)
+    monkeypatch.setattr(config, "nb_compression_threads", 1)
+    monkeypatch.setattr(config, "nb_compression_offload_min_bytes", 1024)
+    graylog = GraylogService()
+    yield graylog
+    graylog.shutdown()
+    graylog.close()
+
+
+@pytest.mark.unit
+def test_small_payload_compressed_inline(service) -> None:
+    payload = b'{"short_message": "small"}'
+    encoded = asyncio.run(service.encode_payload(payload))
+    assert zlib.decompress(encoded) == payload
+    summary = service.compression_summary()
+    assert summary["inline"] == 1
+    assert summary["off_loop"] == 0
+
+
+@pytest.mark.unit
+def test_large_payload_compressed_off_loop(service) -> None:
+    payload = b'{"short_message": "' + b"x" * 4096 + b'"}'
+    encoded = asyncio.run(service.encode_payload(payload))
+    assert zlib.decompress(encoded) == payload
+    summary = service.compression_summary()
+    assert summary["off_loop"] == 1
+    assert summary["off_loop_bytes"] == len(payload)
+
+
+@pytest.mark.unit
+def test_compression_disabled_passes_payload_through(service, monkeypatch) -> None:
+    monkeypatch.setattr(config, "nb_compression_enabled", False)
+    payload = b"x" * 4096
+    assert asyncio.run(service.encode_payload(payload)) is payload
+    assert service.compression_summary()["off_loop"] == 0
@@ -0,0 +1,116 @@
+"""Tests for the offline archive-to-GELF converter."""
+
+import gzip
+import io
+import json
+import struct
+import zlib
+
+import pytest
+
+from src.config import config
+from src.tools import convert as convert_module
+from src.tools.convert import convert, main, read_chunks
+
+EVENT = {
+    "NB_Tenant": "Acme",
+    "Timestamp": "2025-08-28T10:00:00Z",
+    "Message": "Peer login",
+    "InitiatorID": "user@example.com",
+}
+
+
+def write_archive(path, count, bad=()):
+    lines = [
+        "{broken" if i in bad else json.dumps({**EVENT, "ID": f"evt-{i}"})
+        for i in range(count)
+    ]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.mark.unit
+def test_chunks_never_span_files(tmp_path) -> None:
+    first = write_archive(tmp_path / "a.ndjson", 5)
+    second = write_archive(tmp_path / "b.ndjson", 2)
+    chunks = list(read_chunks([first, second], 2))
+    assert [(path[-8:], [n for n, _ in lines]) for path, lines in chunks] == [
+        ("a.ndjson", [1, 2]),
+        ("a.ndjson", [3, 4]),
+        ("a.ndjson", [5]),
+        ("b.ndjson", [1, 2]),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [0, 2])
+def test_output_keeps_input_order_and_reports_errors(tmp_path, workers) -> None:
+    archive = write_archive(tmp_path / "events.ndjson", 25, bad={3, 17})
+    output, errors = io.BytesIO(), io.BytesIO()
+    summary = convert([archive], output, workers=workers, chunk_lines=4, errors=errors)
+
+    messages = [json.loads(line) for line in output.getvalue().splitlines()]
+    expected = [f"evt-{i}" for i in range(25) if i not in (3, 17)]
+    assert [json.loads(m["full_message"])["ID"] for m in messages] == expected
+    assert messages[0]["_NB_tenant"] == "acme"
+    assert summary["lines"] == 25 and summary["converted"] == 23
+    assert summary["errors"] == {"json": 2}
+    failed = [json.loads(line) for line in errors.getvalue().splitlines()]
+    assert [(e["line"], e["reason"]) for e in failed] == [(4, "json"), (18, "json")]
+
+
+@pytest.mark.unit
+def test_workers_read_a_bounded_number_of_chunks_ahead(tmp_path, monkeypatch) -> None:
+    """A bulk conversion never reads the whole archive ahead of its output."""
+    archive = write_archive(tmp_path / "events.ndjson", 40)
+    read = []
+
+    def counting_chunks(paths, chunk_lines):
+        for chunk in read_chunks(paths, chunk_lines):
+            read.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(convert_module, "read_chunks", counting_chunks)
+    read_ahead = []
+
+    class Output(io.BytesIO):
+        def write(self, data):
+            read_ahead.append(len(read) - len(read_ahead) - 1)
+            return super().write(data)
+
+    output = Output()
+    assert convert([archive], output, workers=2, chunk_lines=1)["converted"] == 40
+    assert len(read) == 40 == len(read_ahead)
+    assert max(read_ahead) <= convert_module.READ_AHEAD_PER_WORKER * 2
+
+
+@pytest.mark.unit
+def test_wire_formats(tmp_path, monkeypatch) -> None:
+    archive = write_archive(tmp_path / "events.ndjson", 3)
+    ndjson = io.BytesIO()
+    convert([archive], ndjson)
+    payloads = ndjson.getvalue().splitlines()
+
+    tcp = io.BytesIO()
+    convert([archive], tcp, output_format="tcp")
+    assert tcp.getvalue() == b"".join(p + b"\0" for p in payloads)
+
+    monkeypatch.setattr(config, "nb_compression_enabled", True)
+    udp = io.BytesIO()
+    convert([archive], udp, output_format="udp")
+    data, datagrams = udp.getvalue(), []
+    while data:
+        (length,) = struct.unpack(">I", data[:4])
+        datagrams.append(zlib.decompress(data[4 : 4 + length]))
+        data = data[4 + length :]
+    assert datagrams == payloads
+
+
+@pytest.mark.unit
+def test_cli_writes_gzip_and_fails_on_bad_lines(tmp_path, capsys) -> None:
+    archive = write_archive(tmp_path / "events.ndjson", 4, bad={1})
+    output = tmp_path / "gelf.ndjson.gz"
+    assert main([archive, "--workers", "0", "--output", str(output)]) == 1
+    with gzip.open(output, "rt") as f:
+        assert len(f.readlines()) == 3
+    assert "converted=3" in capsys.readouterr().err
@@ -0,0 +1,116 @@
+"""Unit tests for webhook retry deduplication."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.dedup import BloomFilter, Deduplicator, TTLCache, dedup_key
+from src.services.shared_state import SharedState
+
+client = TestClient(main.app)
+
+
+def make_deduplicator(backend: str, **overrides) -> Deduplicator:
+    options = dict(ttl_seconds=60, max_entries=1000, error_rate=0.001)
+    options.update(overrides)
+    return Deduplicator(enabled=True, backend=backend, **options)
+
+
+@pytest.mark.unit
+def test_key_requires_an_event_id() -> None:
+    assert dedup_key("acme", {"Message": "no id"}) is None
+    assert dedup_key("acme", {"ID": "1"}) == dedup_key("acme", {"id": "1"})
+    assert dedup_key("acme", {"ID": "1"}) != dedup_key("other", {"ID": "1"})
+
+
+@pytest.mark.unit
+def test_ttl_cache_expires_and_bounds_entries() -> None:
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.add(b"a", now=0)
+    assert cache.contains(b"a", now=5)
+    assert not cache.contains(b"a", now=10)
+
+    cache.add(b"b", now=20)
+    cache.add(b"c", now=20)
+    cache.add(b"d", now=20)
+    assert len(cache) == 2
+    assert not cache.contains(b"b", now=21)
+
+
+@pytest.mark.unit
+def test_bloom_filter_forgets_after_two_windows() -> None:
+    bloom = BloomFilter(window_seconds=10, capacity=100, error_rate=0.01)
+    key = dedup_key("acme", {"ID": "42"})
+    bloom.add(key, now=100)
+    assert bloom.contains(key, now=105)
+    assert bloom.contains(key, now=115)  # previous window still consulted
+    assert not bloom.contains(key, now=125)
+
+
+@pytest.mark.unit
+def test_bloom_filter_false_positive_rate_is_bounded() -> None:
+    bloom = BloomFilter(window_seconds=60, capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(dedup_key("acme", {"ID": str(i)}), now=0)
+    false_positives = sum(
+        bloom.contains(dedup_key("acme", {"ID": f"x{i}"}), now=0) for i in range(5000)
+    )
+    assert false_positives / 5000 < 0.03
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", ["ttl", "bloom"])
+def test_only_remembered_events_are_duplicates(backend) -> None:
+    dedup = make_deduplicator(backend)
+    event = {"ID": "evt-1", "Message": "Peer login"}
+    assert not dedup.is_duplicate("acme", event)
+    dedup.remember("acme", event)
+    assert dedup.is_duplicate("acme", event)
+    assert not dedup.is_duplicate("acme", {"Message": "no id"})
+
+    summary = dedup.summary()
+    assert summary["checks"] == 2
+    assert summary["duplicates"] == 1
+    assert summary["hit_rate"] == 0.5
+    assert summary["without_id"] == 1
+    assert summary["memory_bytes"] > 0
+
+
+@pytest.mark.unit
+def test_shared_bloom_filter_is_seen_by_every_worker() -> None:
+    """Two workers attached to one segment deduplicate each other's events."""
+    first = make_deduplicator("bloom")
+    second = make_deduplicator("bloom")
+    shared = SharedState(tenant_slots=4, dedup_bytes=first.shared_buffer_size)
+    try:
+        first.attach(shared.dedup_buffer(), shared.lock)
+        second.attach(shared.dedup_buffer(), shared.lock)
+        first.remember("acme", {"ID": "evt-1"})
+        assert second.is_duplicate("acme", {"ID": "evt-1"})
+        assert second.summary()["shared"] is True
+    finally:
+        first.store.buf.release()
+        second.store.buf.release()
+        shared.close(unlink=True)
+
+
+@pytest.mark.unit
+def test_events_endpoint_acknowledges_duplicates(monkeypatch) -> None:
+    """A retried delivery is acknowledged without being forwarded again."""
+    monkeypatch.setattr(main, "deduplicator", make_deduplicator("ttl"))
+    forwarded = []
+
+    async def forward(event):
+        forwarded.append(event)
+        return True
+
+    monkeypatch.setattr(main.graylog_forwarder, "forward_event", forward)
+
+    body = json.dumps({"NB_Tenant": "acme", "ID": "evt-7", "Message": "peer login"})
+    assert client.post("/events", content=body).json()["status"] == "success"
+    response = client.post("/events", content=body)
+    assert response.status_code == 200
+    assert response.json()["status"] == "duplicate"
+    assert len(forwarded) == 1
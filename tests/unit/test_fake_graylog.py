@@ -0,0 +1,114 @@
+"""Unit tests for the fake Graylog GELF sink."""
+
+import asyncio
+import gzip
+import json
+import os
+import zlib
+
+import httpx
+import pytest
+
+from src.tools.fake_graylog import GELFSink, bound_ports, start_servers
+
+MESSAGE = {
+    "version": "1.1",
+    "host": "nb_streamer_acme",
+    "short_message": "Peer login",
+    "timestamp": 1756425860.987,
+    "level": 6,
+    "_NB_tenant": "acme",
+}
+PAYLOAD = json.dumps(MESSAGE).encode()
+
+
+def chunks(payload: bytes, size: int) -> list:
+    message_id = os.urandom(8)
+    parts = [payload[i : i + size] for i in range(0, len(payload), size)]
+    return [
+        b"\x1e\x0f" + message_id + bytes([i, len(parts)]) + part
+        for i, part in enumerate(parts)
+    ]
+
+
+@pytest.mark.unit
+def test_plain_and_compressed_datagrams() -> None:
+    sink = GELFSink()
+    assert sink.datagram(PAYLOAD) == MESSAGE
+    assert sink.datagram(zlib.compress(PAYLOAD)) == MESSAGE
+    assert sink.datagram(gzip.compress(PAYLOAD)) == MESSAGE
+    assert sink.summary()["received_by_transport"] == {"udp": 3}
+
+
+@pytest.mark.unit
+def test_chunks_reassemble_out_of_order() -> None:
+    sink = GELFSink()
+    parts = chunks(zlib.compress(PAYLOAD * 1), 16)
+    assert len(parts) > 2
+    for part in reversed(parts[1:]):
+        assert sink.datagram(part) is None
+    assert sink.summary()["chunks_pending"] == 1
+    assert sink.datagram(parts[0]) == MESSAGE
+    summary = sink.summary()
+    assert summary["chunked_messages"] == 1
+    assert summary["chunks_pending"] == 0
+
+    sink.datagram(chunks(PAYLOAD, 16)[0])
+    assert sink.chunks.expire(now=float("inf")) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "payload, reason",
+    [
+        (b"not json", "udp:json"),
+        (b"\x78garbage", "udp:decompress"),
+        (json.dumps({**MESSAGE, "host": ""}).encode(), "udp:invalid"),
+        (json.dumps({**MESSAGE, "version": "1.0"}).encode(), "udp:invalid"),
+        (json.dumps({**MESSAGE, "custom": 1}).encode(), "udp:invalid"),
+        (json.dumps({**MESSAGE, "_id": "x"}).encode(), "udp:invalid"),
+        (json.dumps({**MESSAGE, "level": "info"}).encode(), "udp:invalid"),
+        (b"\x1e\x0f" + bytes(8) + bytes([3, 2]) + b"{}", "udp:chunk"),
+    ],
+)
+def test_decode_errors_are_counted_by_reason(payload, reason) -> None:
+    sink = GELFSink()
+    assert sink.datagram(payload) is None
+    assert sink.summary()["decode_errors_by_reason"] == {reason: 1}
+
+
+@pytest.mark.unit
+def test_tcp_and_http_listeners() -> None:
+    async def scenario():
+        sink = GELFSink()
+        handles = await start_servers(sink, "127.0.0.1", 0, 0, 0)
+        _, (_, tcp_port), (_, http_port) = bound_ports(handles)
+
+        _, writer = await asyncio.open_connection("127.0.0.1", tcp_port)
+        writer.write(PAYLOAD + b"\0" + PAYLOAD[:10])
+        await writer.drain()
+        writer.write(PAYLOAD[10:] + b"\0" + PAYLOAD)  # last frame unterminated
+        writer.close()
+        await writer.wait_closed()
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{http_port}") as c:
+            accepted = await c.post(
+                "/gelf",
+                content=gzip.compress(PAYLOAD),
+                headers={"Content-Encoding": "gzip"},
+            )
+            rejected = await c.post("/gelf", content=b"{}")
+            await asyncio.sleep(0.1)
+            stats = (await c.get("/stats")).json()
+            recent = (await c.get("/messages")).json()
+        for handle in handles:
+            handle.close()
+        return accepted, rejected, stats, recent
+
+    accepted, rejected, stats, recent = asyncio.run(scenario())
+    assert accepted.status_code == 202
+    assert rejected.status_code == 400
+    assert stats["received_by_transport"] == {"tcp": 3, "http": 1}
+    assert stats["unterminated_tcp_frames"] == 1
+    assert stats["decode_errors_by_reason"] == {"http:invalid": 1}
+    assert recent[-1] == MESSAGE
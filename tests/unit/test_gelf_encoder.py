@@ -0,0 +1,78 @@
+"""Unit tests for the template-based GELF serializer."""
+
+import json
+
+import pytest
+
+from src.models.gelf import GELFMessage
+from src.models.gelf_encoder import GELFEncoder, encode_value
+
+MESSAGES = [
+    GELFMessage(host="nb_streamer_acme", short_message="Peer login", timestamp=1.5),
+    GELFMessage(
+        host="nb_streamer_ünïcode",
+        short_message='quote " backslash \\ tab \t newline \n nul \x00 bell \x07',
+        full_message="emoji \U0001f680 and   separator",
+        timestamp=1756425860.987,
+        level=3,
+        facility="custom",
+        custom_fields={
+            "_NB_int": 42,
+            "_NB_big": 2**70,
+            "_NB_float": 0.1,
+            "_NB_nan": float("nan"),
+            "_NB_inf": float("-inf"),
+            "_NB_bool": False,
+            "_NB_none": None,
+            "_NB_list": ["a", 1, None],
+            "_NB_nested": {"k": "ü"},
+            "NB_unprefixed": "value",
+        },
+    ),
+    GELFMessage(
+        host="h", short_message="no optionals", level=None, facility=None, timestamp=0
+    ),
+    GELFMessage.from_netbird_event(
+        {
+            "ID": "evt-1",
+            "Message": "Peer login",
+            "Timestamp": "2025-08-28T10:00:00Z",
+            "meta": {"source_addr": "10.0.0.1:51820", "peer": {"name": "laptop"}},
+        },
+        host="nb_streamer_acme",
+        tenant_id="acme",
+    ),
+]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("message", MESSAGES)
+def test_output_is_byte_identical_to_to_json(message) -> None:
+    encoder = GELFEncoder()
+    expected = message.to_json().encode("utf-8")
+    assert encoder.encode(message) == expected
+    # Second pass is served from the cached fragments
+    assert encoder.encode(message) == expected
+    assert encoder.summary()["hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "value", ["", "ü\x1f", 0, -1, True, 1e300, 1e-7, -0.0, None, {"a": [1.5]}]
+)
+def test_encode_value_matches_json_dumps(value) -> None:
+    assert encode_value(value) == json.dumps(value, separators=(",", ":"))
+
+
+@pytest.mark.unit
+def test_fragment_caches_are_bounded(monkeypatch) -> None:
+    monkeypatch.setattr("src.models.gelf_encoder.MAX_FRAGMENTS", 2)
+    encoder = GELFEncoder()
+    for i in range(5):
+        message = GELFMessage(
+            host=f"host-{i}", short_message="m", custom_fields={f"_k{i}": i}
+        )
+        assert encoder.encode(message) == message.to_json().encode("utf-8")
+    summary = encoder.summary()
+    assert summary["host_fragments"] <= 2
+    assert summary["key_fragments"] <= 2
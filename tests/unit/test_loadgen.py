@@ -0,0 +1,136 @@
+"""Tests for the load generator's histograms, payloads and open-loop timing."""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import pytest
+
+LOADGEN = Path(__file__).resolve().parents[2] / "scripts" / "loadgen.py"
+spec = importlib.util.spec_from_file_location("loadgen", LOADGEN)
+assert spec is not None and spec.loader is not None
+loadgen = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(loadgen)
+
+
+def latencies(count: int, seed: int = 3) -> list:
+    """Microsecond latencies spread from a few microseconds to seconds."""
+    rng = random.Random(seed)
+    return [int(rng.lognormvariate(8, 2.5)) for _ in range(count)]
+
+
+def histogram_of(values, bits: int = 8):
+    histogram = loadgen.LatencyHistogram(bits)
+    for value in values:
+        histogram.record(value / 1e6)
+    return histogram
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("bits", [4, 8])
+def test_percentiles_are_within_the_relative_error_bound(bits) -> None:
+    values = latencies(5000)
+    histogram = histogram_of(values, bits)
+    recorded = sorted(int(value / 1e6 * 1e6) for value in values)
+    bound = 2 ** (1 - bits)
+    for percentile in (*loadgen.PERCENTILES, 1.0, 10.0, 100.0):
+        target = max(1, round(percentile / 100 * len(recorded)))
+        exact = recorded[target - 1]
+        reported = histogram.percentile(percentile)
+        assert exact <= reported <= exact * (1 + bound)
+        if exact < 2**bits:
+            assert reported == exact
+    assert histogram.percentile(100.0) == histogram.max == recorded[-1]
+    assert histogram.min == recorded[0]
+
+
+@pytest.mark.unit
+def test_merge_and_serialization_round_trip() -> None:
+    values = latencies(2000)
+    whole = histogram_of(values)
+    merged = histogram_of(values[:700])
+    merged.merge(histogram_of(values[700:]))
+    merged.merge(loadgen.LatencyHistogram())
+    assert merged.counts == whole.counts
+    assert merged.summary() == whole.summary()
+
+    restored = loadgen.LatencyHistogram.from_dict(
+        json.loads(json.dumps(merged.to_dict()))
+    )
+    assert restored.counts == whole.counts
+    assert restored.to_dict() == merged.to_dict()
+    assert restored.summary() == whole.summary()
+    assert (
+        loadgen.LatencyHistogram.from_dict(
+            loadgen.LatencyHistogram().to_dict()
+        ).summary()
+        == loadgen.LatencyHistogram().summary()
+    )
+
+
+@pytest.mark.unit
+def test_payloads_are_valid_json_with_the_weighted_tenant_mix() -> None:
+    factory = loadgen.PayloadFactory(
+        loadgen.parse_weights("acme:3,globex"),
+        loadgen.parse_weights("small:9,medium:1"),
+        pool=4,
+        seed=7,
+    )
+    events = [json.loads(factory.next()) for _ in range(4000)]
+    tenants = Counter(event["NB_Tenant"] for event in events)
+    assert set(tenants) == {"acme", "globex"}
+    assert 0.72 < tenants["acme"] / len(events) < 0.78
+    assert len({event["ID"] for event in events}) == len(events)
+    assert all(event["ID"].startswith("loadgen-7-") for event in events)
+    # The spliced body keeps the corpus event's fields
+    assert all("Timestamp" in event and "Message" in event for event in events)
+
+
+@pytest.mark.unit
+def test_open_loop_latency_counts_queueing_from_the_intended_send_time(
+    monkeypatch,
+) -> None:
+    service_time = 0.05
+
+    async def slow_server(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(service_time)
+        return httpx.Response(200, json={"status": "success"})
+
+    class StubClient(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            kwargs.pop("limits", None)
+            super().__init__(transport=httpx.MockTransport(slow_server), **kwargs)
+
+    monkeypatch.setattr(loadgen.httpx, "AsyncClient", StubClient)
+    args = argparse.Namespace(
+        archive=None,
+        tenants="acme",
+        sizes="small",
+        pool=2,
+        seed=1,
+        url="http://stub",
+        token=None,
+        header=[],
+        concurrency=1,
+        processes=1,
+        rate=100.0,
+        warmup=0.0,
+        duration=0.2,
+        timeout=5.0,
+    )
+    result = asyncio.run(loadgen.run_client(args, 0))
+
+    histogram = loadgen.LatencyHistogram.from_dict(result["histogram"])
+    requests = result["outcomes"]["200"]
+    assert requests >= 19
+    # One request at a time, scheduled every 10ms but served in 50ms: the nth
+    # request waits behind the ones before it, which the latency must include
+    expected_max = requests * service_time - (requests - 1) / args.rate
+    assert histogram.min >= service_time * 1e6
+    assert histogram.max >= 0.9 * expected_max * 1e6
+    assert histogram.percentile(50.0) > 5 * service_time * 1e6
@@ -0,0 +1,80 @@
+"""Unit tests for the process-pool transform offload."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.models.gelf import GELFMessage, SerializedGELFMessage
+from src.services.offload import TransformDispatcher, event_complexity
+from src.services.transformer import TransformerService
+
+SMALL_EVENT = {
+    "ID": "evt-1",
+    "Timestamp": "2025-08-28T23:04:20.987Z",
+    "Message": "Peer login",
+    "InitiatorID": "user@example.com",
+    "meta": "map[peer_name:laptop-01 os:linux]",
+}
+
+
+def heavy_event(peers: int = 600) -> dict:
+    entries = " ".join(f"peer_{i}:10.0.{i // 250}.{i % 250}" for i in range(peers))
+    return dict(SMALL_EVENT, meta=f"map[{entries}]")
+
+
+def make_dispatcher(enabled: bool) -> TransformDispatcher:
+    return TransformDispatcher(
+        TransformerService(),
+        enabled=enabled,
+        workers=1,
+        min_bytes=65536,
+        min_fields=500,
+    )
+
+
+@pytest.mark.unit
+def test_event_complexity_counts_go_map_entries() -> None:
+    assert event_complexity(SMALL_EVENT) == len(SMALL_EVENT) + 2
+    assert event_complexity(heavy_event(600)) >= 600
+    assert event_complexity({"meta": {"a": 1, "b": 2}}) == 3
+
+
+@pytest.mark.unit
+def test_small_events_stay_inline() -> None:
+    dispatcher = make_dispatcher(enabled=True)
+    assert not dispatcher.is_heavy(SMALL_EVENT, 200)
+    assert dispatcher.is_heavy(SMALL_EVENT, 65536)
+    assert dispatcher.is_heavy(heavy_event(), 2000)
+
+
+@pytest.mark.unit
+def test_disabled_dispatcher_transforms_inline() -> None:
+    dispatcher = make_dispatcher(enabled=False)
+    dispatcher.start()
+    message = asyncio.run(dispatcher.transform(heavy_event(), "acme", 100000))
+    assert isinstance(message, GELFMessage)
+    assert dispatcher.summary()["inline"] == 1
+    assert dispatcher.summary()["offloaded"] == 0
+
+
+@pytest.mark.unit
+def test_offloaded_transform_matches_inline() -> None:
+    """The pool returns exactly the bytes the inline path would serialize."""
+    event = heavy_event()
+    inline = TransformerService().transform(event, "acme")
+    dispatcher = make_dispatcher(enabled=True)
+    dispatcher.start()
+    try:
+        message = asyncio.run(dispatcher.transform(event, "acme", 2000))
+    finally:
+        dispatcher.stop()
+
+    assert isinstance(message, SerializedGELFMessage)
+    assert message.level == inline.level
+    offloaded = json.loads(message.payload)
+    expected = json.loads(inline.to_json())
+    offloaded.pop("timestamp", None)
+    expected.pop("timestamp", None)
+    assert offloaded == expected
+    assert dispatcher.summary()["offloaded"] == 1
@@ -0,0 +1,54 @@
+"""Unit tests for the benchmark regression gate."""
+
+import pytest
+
+from tests.benchmarks.perf_check import compare, tolerance_for
+
+
+def results(calibration: float, **benchmarks) -> dict:
+    return {
+        "environment": {"calibration_ops_per_sec": calibration},
+        "benchmarks": {
+            name.replace("__", "/"): {"ops_per_sec": ops, "alloc_blocks_per_event": b}
+            for name, (ops, b) in benchmarks.items()
+        },
+    }
+
+
+@pytest.mark.unit
+def test_tolerance_patterns() -> None:
+    tolerances = {"default": 0.2, "compression/*": 0.4, "compression/huge": 0.5}
+    assert tolerance_for("flatten_dict/small", tolerances) == 0.2
+    assert tolerance_for("compression/small", tolerances) == 0.4
+    assert tolerance_for("compression/huge", tolerances) == 0.5
+
+
+@pytest.mark.unit
+def test_regressions_fail_and_improvements_pass() -> None:
+    baseline = results(1000, a__small=(100, 10), b__small=(100, 10), c__small=(1, 1))
+    baseline["tolerances"] = {"default": 0.2, "allocations": 0.1}
+
+    rows, failed = compare(
+        baseline, results(1000, a__small=(85, 10), b__small=(150, 11))
+    )
+    status = {row["name"]: row["status"] for row in rows}
+    assert status == {"a/small": "ok", "b/small": "faster", "c/small": "MISSING"}
+    assert failed
+
+    _, failed = compare(baseline, results(1000, a__small=(70, 10), b__small=(100, 10)))
+    assert failed  # 30% slower than a 20% tolerance allows
+    rows, failed = compare(
+        baseline,
+        results(1000, a__small=(100, 13), b__small=(100, 10), c__small=(1, 1)),
+    )
+    assert failed and rows[0]["status"] == "ALLOCS"
+
+
+@pytest.mark.unit
+def test_normalization_accounts_for_machine_speed() -> None:
+    baseline = results(1000, a__small=(100, 10))
+    slower_machine = results(500, a__small=(55, 10))
+    _, failed = compare(baseline, slower_machine)
+    assert failed
+    _, failed = compare(baseline, slower_machine, normalize=True)
+    assert not failed
@@ -0,0 +1,104 @@
+"""Unit tests for the shape-keyed transform plan cache."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src.models.gelf import GELFMessage, enhance_address_fields, flatten_dict
+from src.services.plan_cache import TransformPlanCache, event_shape
+from src.services.projection import FieldProjection, ProjectionRule
+
+EVENTS = [
+    {
+        "ID": "evt-1",
+        "Message": "Peer login",
+        "Timestamp": "2025-08-28T10:00:00Z",
+        "meta": "map[source_addr:10.0.0.1:51820 peer_name:laptop-01]",
+    },
+    {
+        "ID": "evt-2",
+        "timestamp": "not a timestamp",
+        "level": "warning",
+        "meta": {
+            "source_addr": "10.0.0.2:443",
+            "source_port": "existing",
+            "remote_addr": "no-port-here",
+            "empty": None,
+            "tags": ["a", 1, None],
+            "routes": [{"network": "10.0.0.0/8"}, {"peer_addr": "[fe80::1]:80"}],
+        },
+        "meta_source_addr": "collides with the nested key",
+        "when": datetime(2025, 8, 28, tzinfo=timezone.utc),
+        "count": 3,
+        "enabled": True,
+    },
+    {"Message": "Empty structures", "meta": {}, "list": []},
+]
+
+
+def build(event, **kwargs) -> GELFMessage:
+    return GELFMessage.from_netbird_event(event, host="h", tenant_id="acme", **kwargs)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("event", EVENTS)
+def test_planned_fields_match_flatten_and_enhance(event) -> None:
+    """Warm and cold plans reproduce the reference fields and their order."""
+    cache = TransformPlanCache(max_plans=8)
+    expected = enhance_address_fields(flatten_dict(event))
+    for _ in range(2):
+        fields, _ = cache.fields(event)
+        assert list(fields.items()) == list(expected.items())
+    assert cache.summary()["hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("event", EVENTS)
+def test_messages_are_identical_with_and_without_cache(event) -> None:
+    cache = TransformPlanCache(max_plans=8)
+    reference = build(event)
+    for _ in range(2):
+        cached = build(event, plan_cache=cache)
+        assert list(cached.custom_fields.items()) == list(
+            reference.custom_fields.items()
+        )
+        assert cached.full_message == reference.full_message
+
+
+@pytest.mark.unit
+def test_projection_is_part_of_the_plan() -> None:
+    rule = ProjectionRule(
+        allow=["ID", "meta_*"], deny=["meta_source_port"], rename={"ID": "event_id"}
+    )
+    cache = TransformPlanCache(max_plans=8)
+    reference_projection = FieldProjection(rule)
+    cached_projection = FieldProjection(rule)
+    reference = build(EVENTS[1], projection=reference_projection)
+    for _ in range(2):
+        cached = build(EVENTS[1], projection=cached_projection, plan_cache=cache)
+    assert list(cached.custom_fields.items()) == list(reference.custom_fields.items())
+    assert cached_projection.bytes_saved == 2 * reference_projection.bytes_saved
+
+
+@pytest.mark.unit
+def test_shapes_are_evicted_lru() -> None:
+    cache = TransformPlanCache(max_plans=2)
+    shapes = [{"a": 1}, {"b": 1}, {"c": 1}]
+    cache.fields(shapes[0])
+    cache.fields(shapes[1])
+    cache.fields(shapes[0])  # refresh the first shape
+    cache.fields(shapes[2])  # evicts {"b"}
+    cache.fields(shapes[0])
+    summary = cache.summary()
+    assert summary["evictions"] == 1
+    assert summary["plans"] == 2
+    assert summary["hits"] == 2
+
+
+@pytest.mark.unit
+def test_shape_depends_on_structure_not_values() -> None:
+    assert event_shape({"a": "x", "b": {"c": 1}}) == event_shape(
+        {"a": "y", "b": {"c": 2}}
+    )
+    assert event_shape({"a": "x"}) != event_shape({"a": {"x": 1}})
+    assert event_shape({"a": [1]}) != event_shape({"a": [{"x": 1}]})
@@ -0,0 +1,78 @@
+"""Unit tests for the stack sampling profiler."""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import config
+from src.main import app
+from src.services.profiler import RollingStackSampler, StackSampler
+
+client = TestClient(app)
+
+ADMIN_TOKEN = "admin-secret"
+ADMIN = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+WRONG_ADMIN = {"Authorization": "Bearer wrong"}
+
+
+def _busy_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.mark.unit
+def test_sampler_collects_collapsed_stacks() -> None:
+    """Stacks of other threads are collapsed into flamegraph lines."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,), name="busy")
+    worker.start()
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sampler.samples > 0
+    lines = sampler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert "_busy_worker" in stack
+    assert int(count) > 0
+
+
+@pytest.mark.unit
+def test_rolling_sampler_retires_windows() -> None:
+    """Completed windows are retained up to the configured count."""
+    sampler = RollingStackSampler(interval=1.0, window_seconds=0.0, windows=2)
+    for stack in ["main;a", "main;b", "main;a", "main;c"]:
+        sampler._record(stack)
+
+    # window_seconds=0 retires a window on every record; only 2 are kept.
+    assert sampler.summary()["windows_retained"] == 2
+    assert sum(sampler.aggregate().values()) == 3
+
+
+@pytest.mark.unit
+def test_profile_endpoint_returns_collapsed_stacks(monkeypatch) -> None:
+    """The admin endpoint samples the live process."""
+    monkeypatch.setattr(config, "nb_admin_token", None)
+    assert client.get("/debug/profile").status_code == 403
+    assert client.get("/debug/profile/rolling").status_code == 403
+
+    monkeypatch.setattr(config, "nb_admin_token", ADMIN_TOKEN)
+    assert client.get("/debug/profile", headers=WRONG_ADMIN).status_code == 401
+
+    response = client.get(
+        "/debug/profile", params={"seconds": 0.2, "interval_ms": 5}, headers=ADMIN
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert response.text.strip()
+
+    response = client.get("/debug/profile", params={"seconds": 10_000}, headers=ADMIN)
+    assert response.status_code == 400
@@ -0,0 +1,160 @@
+"""Unit tests for per-tenant field projection."""
+
+import json
+
+import pytest
+
+from src.models.gelf import GELFMessage, flatten_dict
+from src.models.netbird import NetbirdEvent
+from src.services.projection import (
+    FieldProjection,
+    ProjectionFile,
+    ProjectionRule,
+    Projections,
+    projections_from_config,
+)
+from src.services.transformer import TransformerService
+
+EVENT = {
+    "ID": "evt-1",
+    "Message": "Peer login",
+    "InitiatorID": "alice@example.com",
+    "Timestamp": "2025-08-28T10:00:00Z",
+    "meta": {
+        "peer_name": "laptop-01",
+        "source_addr": "10.0.0.1:51820",
+        "os": {"name": "linux", "kernel": "6.1"},
+    },
+}
+
+
+def build(rule: ProjectionRule) -> GELFMessage:
+    return GELFMessage.from_netbird_event(
+        EVENT,
+        host="nb_streamer_acme",
+        tenant_id="acme",
+        projection=FieldProjection(rule),
+    )
+
+
+@pytest.mark.unit
+def test_allowlist_with_glob_prefix() -> None:
+    message = build(ProjectionRule(allow=["ID", "meta_*"], deny=["meta_os_*"]))
+    assert set(message.custom_fields) == {
+        "_NB_tenant",
+        "_NB_ID",
+        "_NB_meta_peer_name",
+        "_NB_meta_source_addr",
+        "_NB_meta_source_port",
+    }
+
+
+@pytest.mark.unit
+def test_denylist_and_renames() -> None:
+    message = build(
+        ProjectionRule(deny=["meta_source_port"], rename={"InitiatorID": "user"})
+    )
+    fields = message.custom_fields
+    assert fields["_NB_user"] == "alice@example.com"
+    assert "_NB_InitiatorID" not in fields
+    assert fields["_NB_meta_source_addr"] == "10.0.0.1"
+    assert "_NB_meta_source_port" not in fields
+
+
+@pytest.mark.unit
+def test_excluded_subtrees_are_never_flattened() -> None:
+    projection = FieldProjection(ProjectionRule(deny=["meta_*"]))
+    assert projection.prunes("meta")
+    assert flatten_dict(EVENT, projection=projection).keys() == {
+        "ID",
+        "Message",
+        "InitiatorID",
+        "Timestamp",
+    }
+    assert projection.fields_dropped == 1
+
+    allow_only_id = FieldProjection(ProjectionRule(allow=["ID"]))
+    assert allow_only_id.prunes("meta")
+    assert not FieldProjection(ProjectionRule(allow=["meta_os_name"])).prunes("meta")
+
+
+@pytest.mark.unit
+def test_bytes_saved_are_reported() -> None:
+    projection = FieldProjection(ProjectionRule(allow=["ID"], full_message=False))
+    full = GELFMessage.from_netbird_event(EVENT, host="h", tenant_id="acme")
+    projected = GELFMessage.from_netbird_event(
+        EVENT, host="h", tenant_id="acme", projection=projection
+    )
+    assert projected.full_message is None
+    actual_saving = len(full.to_json()) - len(projected.to_json())
+    assert projection.summary()["events"] == 1
+    # The estimate is in the right ballpark of the real saving
+    assert 0.5 * actual_saving < projection.bytes_saved < 1.5 * actual_saving
+
+
+@pytest.mark.unit
+def test_without_projection_output_is_unchanged() -> None:
+    plain = GELFMessage.from_netbird_event(EVENT, host="h", tenant_id="acme")
+    everything = GELFMessage.from_netbird_event(
+        EVENT, host="h", tenant_id="acme", projection=FieldProjection(ProjectionRule())
+    )
+    assert plain.custom_fields == everything.custom_fields
+    assert plain.full_message == everything.full_message
+
+
+@pytest.mark.unit
+def test_tenant_projection_replaces_default(tmp_path) -> None:
+    path = tmp_path / "projection.json"
+    path.write_text(
+        json.dumps(
+            {"default": {"deny": ["meta_*"]}, "tenants": {"ACME": {"allow": ["ID"]}}}
+        )
+    )
+
+    class Config:
+        projection_file = str(path)
+
+    projections = projections_from_config(Config())
+    assert projections.get("acme").rule.allow == ["ID"]
+    assert projections.get("other").rule.deny == ["meta_*"]
+    assert Projections(ProjectionFile()).get("acme") is None
+
+
+@pytest.mark.unit
+def test_default_rule_counters_are_kept_per_tenant() -> None:
+    projections = Projections(
+        ProjectionFile(default=ProjectionRule(deny=["meta_*"])), max_default_tenants=2
+    )
+    for tenant in ("globex", "initech", "initech", "umbrella"):
+        GELFMessage.from_netbird_event(
+            EVENT, host="h", tenant_id=tenant, projection=projections.get(tenant)
+        )
+    assert projections.get("globex").rule is projections.default.rule
+    tenants = projections.summary()["tenants"]
+    assert tenants["globex"]["events"] == 1
+    assert tenants["initech"]["events"] == 2
+    assert (
+        tenants["initech"]["fields_dropped"]
+        == 2 * tenants["globex"]["fields_dropped"]
+        > 0
+    )
+    # Tenants beyond the bound are counted under __default__
+    assert "umbrella" not in tenants
+    assert tenants["__default__"]["events"] == 1
+
+
+@pytest.mark.unit
+def test_fallback_transform_applies_projection(monkeypatch) -> None:
+    def broken(data):
+        raise ValueError("unparseable")
+
+    monkeypatch.setattr(NetbirdEvent, "from_raw_json", broken)
+    transformer = TransformerService()
+    transformer.projections = Projections(
+        ProjectionFile(tenants={"acme": ProjectionRule(deny=["meta_*"])})
+    )
+    message = transformer.transform(EVENT, "acme")
+    assert message.custom_fields["_NB_transformation_failed"] is True
+    assert "_NB_ID" in message.custom_fields
+    assert not any(key.startswith("_NB_meta_") for key in message.custom_fields)
+    assert transformer.projections.get("acme").summary()["fields_dropped"] > 0
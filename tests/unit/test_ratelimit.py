@@ -0,0 +1,121 @@
+"""Unit tests for token bucket rate limiting."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.ratelimit import (
+    RateLimiter,
+    RateLimitPolicy,
+    RateLimitSettings,
+    TokenBucket,
+    retry_after_header,
+)
+from src.services.tenants import TenantRegistry
+
+client = TestClient(main.app)
+
+
+@pytest.mark.unit
+def test_token_bucket_refills_over_time() -> None:
+    """A drained bucket reports how long until enough tokens accrue."""
+    bucket = TokenBucket(rate=10, capacity=2, now=0.0)
+    assert bucket.wait_time(1, now=0.0) == 0.0
+    bucket.consume(1)
+    bucket.consume(1)
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(0.1)
+    assert bucket.wait_time(1, now=0.1) == 0.0
+    # Requests larger than the burst only need a full bucket.
+    assert bucket.wait_time(50, now=1.0) == 0.0
+
+
+@pytest.mark.unit
+def test_limiter_limits_per_tenant_independently() -> None:
+    """One noisy tenant does not consume another tenant's budget."""
+    registry = TenantRegistry(max_tenants=10, sketch_capacity=10)
+    limiter = RateLimiter(
+        RateLimitSettings(
+            enabled=True,
+            burst_seconds=1.0,
+            tenant=RateLimitPolicy(events_per_second=2),
+        )
+    )
+    noisy = registry.state_for("noisy")
+    quiet = registry.state_for("quiet")
+
+    assert limiter.check(noisy, 100) == 0.0
+    assert limiter.check(noisy, 100) == 0.0
+    assert limiter.check(noisy, 100) > 0
+    assert limiter.check(quiet, 100) == 0.0
+    assert noisy.limited == 1
+    assert limiter.summary()["limited_by_scope"] == {"global": 0, "tenant": 1}
+
+
+@pytest.mark.unit
+def test_limiter_hot_swap_applies_to_existing_buckets() -> None:
+    """Reconfiguring updates buckets already attached to tenant state."""
+    registry = TenantRegistry(max_tenants=10, sketch_capacity=10)
+    limiter = RateLimiter(
+        RateLimitSettings(enabled=True, tenant=RateLimitPolicy(bytes_per_second=10))
+    )
+    state = registry.state_for("acme")
+    assert limiter.check(state, 10) == 0.0
+    assert limiter.check(state, 10) > 0
+
+    limiter.configure(
+        RateLimitSettings(
+            enabled=True,
+            overrides={"acme": RateLimitPolicy(bytes_per_second=1000)},
+        )
+    )
+    limiter.check(state, 10)
+    assert state.rate_buckets[2].rate == 1000
+
+
+@pytest.mark.unit
+def test_events_endpoint_returns_429_with_retry_after(monkeypatch) -> None:
+    """Limited requests get 429 and a computed Retry-After header."""
+    limiter = RateLimiter(
+        RateLimitSettings(
+            enabled=True,
+            global_limits=RateLimitPolicy(events_per_second=0.5),
+        )
+    )
+    monkeypatch.setattr(main, "rate_limiter", limiter)
+    monkeypatch.setattr(main, "tenant_registry", TenantRegistry(10, 10))
+
+    body = json.dumps({"NB_Tenant": "acme", "Message": "peer login"})
+    assert client.post("/events", content=body).status_code == 200
+    response = client.post("/events", content=body)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert response.json()["detail"]["code"] == "RATE_LIMITED"
+
+
+@pytest.mark.unit
+def test_retry_after_header_rounds_up() -> None:
+    assert retry_after_header(0.01) == "1"
+    assert retry_after_header(2.2) == "3"
+
+
+@pytest.mark.unit
+def test_admin_rate_limits_require_admin_token(monkeypatch) -> None:
+    """Settings can only be read or replaced with NB_ADMIN_TOKEN."""
+    limiter = RateLimiter(RateLimitSettings())
+    monkeypatch.setattr(main, "rate_limiter", limiter)
+    update = {"enabled": True, "overrides": {"ACME": {"events_per_second": 5}}}
+
+    monkeypatch.setattr(main.config, "nb_admin_token", None)
+    assert client.get("/admin/rate-limits").status_code == 403
+    assert client.put("/admin/rate-limits", json=update).status_code == 403
+    assert not limiter.settings.enabled
+
+    monkeypatch.setattr(main.config, "nb_admin_token", "admin-secret")
+    headers = {"Authorization": "Bearer admin-secret"}
+    response = client.put("/admin/rate-limits", json=update, headers=headers)
+    assert response.status_code == 200
+    assert limiter.settings.enabled
+    assert limiter.settings.overrides["acme"].events_per_second == 5
+    assert client.get("/admin/rate-limits").status_code == 401
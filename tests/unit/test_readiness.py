@@ -0,0 +1,99 @@
+"""Unit tests for startup readiness and the import-time budget."""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.services.readiness import (
+    StartupReadiness,
+    check_json_codec,
+    probe_transport,
+    warm_models,
+    warm_regexes,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Cold `import src.main` takes about 0.5s on a developer machine; the budget
+# leaves room for slow CI runners while still catching heavy new imports.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("NB_IMPORT_BUDGET_SECONDS", "2.0"))
+
+
+@pytest.mark.unit
+def test_ready_only_after_every_step_passes() -> None:
+    calls = {"flaky": 0}
+
+    def flaky():
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise ConnectionRefusedError("graylog down")
+        return "connected"
+
+    async def scenario():
+        readiness = StartupReadiness(import_seconds=0.1, retry_seconds=0.01)
+        readiness.start([("models", warm_models), ("transport", flaky)])
+        assert not readiness.ready
+        assert readiness.pending_steps() == ["models", "transport"]
+        while not readiness.ready:
+            await asyncio.sleep(0.01)
+        await readiness.stop()
+        return readiness
+
+    readiness = asyncio.run(scenario())
+    summary = readiness.summary()
+    assert summary["steps"]["models"]["attempts"] == 1
+    assert summary["steps"]["transport"]["attempts"] == 3
+    assert summary["steps"]["transport"]["result"] == "connected"
+    assert "error" not in summary["steps"]["transport"]
+    assert summary["startup_seconds"] > 0
+    # Shutting down flips readiness back so traffic drains first
+    assert not readiness.ready and summary["draining"]
+
+
+@pytest.mark.unit
+def test_builtin_warm_up_steps_pass() -> None:
+    warm_models()
+    warm_regexes()
+    assert check_json_codec().startswith("json")
+
+
+@pytest.mark.unit
+def test_transport_probe_tcp() -> None:
+    async def scenario():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connected = await probe_transport("tcp", "127.0.0.1", port, timeout=1.0)
+        server.close()
+        await server.wait_closed()
+        with pytest.raises(OSError):
+            await probe_transport("tcp", "127.0.0.1", port, timeout=1.0)
+        resolved = await probe_transport("udp", "localhost", 12201, timeout=1.0)
+        return connected, resolved
+
+    connected, resolved = asyncio.run(scenario())
+    assert connected.startswith("connected")
+    assert resolved.startswith("resolved localhost:12201")
+
+
+@pytest.mark.unit
+def test_cold_import_within_budget() -> None:
+    """Fail if importing the application regresses past the startup budget."""
+    code = (
+        "import time; started = time.perf_counter(); import src.main; "
+        "print(time.perf_counter() - started, src.main.readiness.import_seconds)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    wall, reported = float(output[-2]), float(output[-1])
+    assert wall < IMPORT_BUDGET_SECONDS, f"import took {wall:.2f}s"
+    # The figure in /stats covers the same imports
+    assert 0 < reported <= wall
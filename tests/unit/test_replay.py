@@ -0,0 +1,111 @@
+"""Tests for event archives and the offline replay tool."""
+
+import gzip
+import json
+import time
+
+import pytest
+
+from src.tools.replay import Replayer, main, replay
+from src.utils.archive import ArchiveError, parse_line, parse_timestamp, read_archives
+
+EVENT = {
+    "NB_Tenant": "Acme",
+    "ID": "evt-1",
+    "Timestamp": "2025-08-28T10:00:00Z",
+    "Message": "Peer login",
+    "InitiatorID": "user@example.com",
+    "meta": {"peer_name": "laptop"},
+}
+
+
+def capture(event, tenant="acme", received_at="2025-08-28T12:00:00+00:00"):
+    return json.dumps(
+        {"received_at": received_at, "tenant": tenant, "body": json.dumps(event)}
+    )
+
+
+@pytest.mark.unit
+def test_parse_line_reads_payloads_and_capture_records() -> None:
+    plain = parse_line(json.dumps(EVENT))
+    assert plain["tenant"] == "acme"
+    assert plain["received_at"] == parse_timestamp("2025-08-28T10:00:00Z")
+    assert plain["event"]["ID"] == "evt-1"
+
+    captured = parse_line(capture({**EVENT, "NB_Tenant": "other"}, tenant="Beta"))
+    assert captured["tenant"] == "beta"
+    assert captured["received_at"].hour == 12
+    assert captured["size"] == len(json.dumps({**EVENT, "NB_Tenant": "other"}))
+
+    for line, reason in (
+        ("{not json", "json"),
+        ("[1, 2]", "json"),
+        (json.dumps({"ID": "x"}), "tenant"),
+        (capture(EVENT).replace('\\"ID', "ID"), "json"),
+    ):
+        with pytest.raises(ArchiveError) as error:
+            parse_line(line)
+        assert error.value.reason == reason
+
+
+@pytest.mark.unit
+def test_archives_are_read_with_or_without_gzip(tmp_path) -> None:
+    lines = [json.dumps({**EVENT, "ID": f"evt-{i}"}) for i in range(3)]
+    plain = tmp_path / "events.ndjson"
+    plain.write_text("\n".join(lines[:2]) + "\n\n")
+    packed = tmp_path / "more.data"  # gzip is detected from the content
+    with gzip.open(packed, "wt") as f:
+        f.write(lines[2] + "\n")
+    read = list(read_archives([str(plain), str(packed)]))
+    assert [(path.endswith("data"), number) for path, number, _ in read] == [
+        (False, 1),
+        (False, 2),
+        (True, 1),
+    ]
+
+
+@pytest.mark.unit
+def test_replayer_filters_transforms_and_sends() -> None:
+    sent = []
+    replayer = Replayer(
+        send=sent.append,
+        tenants=["ACME"],
+        since=parse_timestamp("2025-08-28T11:00:00Z"),
+        until=parse_timestamp("2025-08-29T00:00:00Z"),
+    )
+    lines = [
+        capture(EVENT),
+        capture(EVENT, tenant="other"),
+        capture(EVENT, received_at="2025-08-28T09:00:00Z"),
+        json.dumps(EVENT),  # Timestamp 10:00, before the range
+        capture(EVENT, tenant="bad tenant!"),
+        "{",
+    ]
+    summary = replay(replayer, (("a", i, line) for i, line in enumerate(lines)), 0)
+    assert summary["read"] == 6 and summary["sent"] == 1
+    assert summary["skipped"] == {"tenant": 2, "time_range": 2}
+    assert summary["errors"] == {"json": 1}
+
+    message = json.loads(sent[0])
+    assert message["host"] == "nb_streamer_acme"
+    assert message["_NB_tenant"] == "acme"
+    assert summary["sent_bytes"] == len(sent[0])
+
+
+@pytest.mark.unit
+def test_rate_paces_sending() -> None:
+    replayer = Replayer(send=lambda payload: None, rate=200)
+    started = time.perf_counter()
+    for _ in range(11):
+        replayer.process(json.dumps(EVENT))
+    assert time.perf_counter() - started >= 0.045
+    assert replayer.sent == 11
+
+
+@pytest.mark.unit
+def test_dry_run_cli(tmp_path, capsys) -> None:
+    archive = tmp_path / "capture.ndjson.gz"
+    with gzip.open(archive, "wt") as f:
+        f.write(capture(EVENT) + "\n" + capture(EVENT, tenant="beta") + "\n")
+    assert main([str(archive), "--dry-run", "--tenant", "acme,gamma"]) == 0
+    assert "read=2 sent=1" in capsys.readouterr().out
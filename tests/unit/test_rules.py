@@ -0,0 +1,96 @@
+"""Unit tests for per-tenant filtering and sampling rules."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.rules import EventRules, RulesFile, rules_from_config
+
+client = TestClient(main.app)
+
+
+def make_rules(data: dict) -> EventRules:
+    return EventRules(RulesFile.model_validate(data))
+
+
+@pytest.mark.unit
+def test_first_matching_rule_decides() -> None:
+    rules = make_rules(
+        {
+            "default": [{"action": "drop", "match": {"activity": ["Peer connected"]}}],
+            "tenants": {
+                "acme": [{"action": "keep", "match": {"initiator": ["admin@*"]}}],
+            },
+        }
+    )
+    connected = {"Message": "Peer connected", "InitiatorID": "admin@acme.com"}
+    assert rules.keep("acme", connected)  # tenant rule wins
+    assert not rules.keep("acme", dict(connected, InitiatorID="bob"))
+    assert not rules.keep("other", connected)  # defaults apply to all tenants
+    assert rules.keep("other", {"Message": "Route created"})
+
+
+@pytest.mark.unit
+def test_conditions_combine_message_target_and_level() -> None:
+    rules = make_rules(
+        {
+            "default": [
+                {
+                    "action": "drop",
+                    "match": {
+                        "message": "^Peer .* login$",
+                        "target": ["peer-*"],
+                        "min_level": 6,
+                    },
+                }
+            ]
+        }
+    )
+    event = {"Message": "Peer laptop login", "TargetID": "peer-1", "level": "info"}
+    assert not rules.keep("acme", event)
+    assert rules.keep("acme", dict(event, level="error"))
+    assert rules.keep("acme", dict(event, TargetID="route-1"))
+
+
+@pytest.mark.unit
+def test_sampling_is_deterministic_and_close_to_rate() -> None:
+    data = {"default": [{"name": "sample-logins", "action": "sample", "rate": 0.25}]}
+    first, second = make_rules(data), make_rules(data)
+    events = [{"ID": str(i), "Message": "login"} for i in range(4000)]
+    kept = [first.keep("acme", e) for e in events]
+    assert kept == [second.keep("acme", e) for e in events]
+    assert 0.2 < sum(kept) / len(kept) < 0.3
+
+    counters = first.summary()["rules"]["default:0:sample-logins"]
+    assert counters["matched"] == 4000
+    assert counters["dropped"] == 4000 - sum(kept)
+
+
+@pytest.mark.unit
+def test_rules_file_is_loaded_from_config(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"tenants": {"ACME": [{"action": "drop"}]}}))
+    monkeypatch.setattr(main.config, "nb_rules_file", str(path))
+    rules = rules_from_config(main.config)
+    assert not rules.keep("acme", {"Message": "anything"})
+
+    path.write_text(json.dumps({"default": [{"action": "explode"}]}))
+    with pytest.raises(ValueError):
+        rules_from_config(main.config)
+
+
+@pytest.mark.unit
+def test_filtered_events_are_acknowledged_without_forwarding(monkeypatch) -> None:
+    rules = make_rules({"default": [{"action": "drop", "match": {"activity": ["x"]}}]})
+    monkeypatch.setattr(main, "event_rules", rules)
+
+    async def forward(event):
+        raise AssertionError("filtered events must not be forwarded")
+
+    monkeypatch.setattr(main.graylog_forwarder, "forward_event", forward)
+    body = json.dumps({"NB_Tenant": "acme", "Message": "x"})
+    response = client.post("/events", content=body)
+    assert response.status_code == 200
+    assert response.json()["status"] == "filtered"
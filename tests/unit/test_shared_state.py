@@ -0,0 +1,102 @@
+"""Unit tests for multi-worker shared state."""
+
+import multiprocessing
+import time
+
+import pytest
+
+from src.services.ratelimit import RateLimiter, RateLimitPolicy, RateLimitSettings
+from src.services.shared_state import _SLOT_KEY, SharedState
+from src.services.tenants import TenantRegistry
+
+
+@pytest.fixture
+def shared():
+    state = SharedState(tenant_slots=16)
+    yield state
+    state.close(unlink=True)
+
+
+def _record_events(state: SharedState, count: int) -> None:
+    for _ in range(count):
+        state.record_event(level=3, success=True)
+
+
+@pytest.mark.unit
+def test_counters_are_shared_across_processes(shared) -> None:
+    """Events recorded in forked workers are visible to every process."""
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_record_events, args=(shared, 500)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    counters = shared.counters()
+    assert counters["received"] == 1500
+    assert counters["forwarded"] == 1500
+    assert counters["level_3"] == 1500
+    assert shared.last_event_time() is not None
+
+
+@pytest.mark.unit
+def test_rate_limits_hold_across_workers(shared) -> None:
+    """Two limiters attached to one segment share tenant and global buckets."""
+    settings = RateLimitSettings(
+        enabled=True, burst_seconds=1.0, tenant=RateLimitPolicy(events_per_second=3)
+    )
+    worker_a, worker_b = RateLimiter(settings), RateLimiter(settings)
+    worker_a.attach(shared)
+    worker_b.attach(shared)
+    state_a = TenantRegistry(10, 10).state_for("acme")
+    state_b = TenantRegistry(10, 10).state_for("acme")
+
+    admitted = [
+        limiter.check(state, 10) == 0.0
+        for limiter, state in [(worker_a, state_a), (worker_b, state_b)] * 3
+    ]
+    assert admitted.count(True) == 3
+
+
+@pytest.mark.unit
+def test_settings_hot_swap_propagates_to_other_workers(shared) -> None:
+    """Settings published by one worker are adopted by the others."""
+    worker_a = RateLimiter(RateLimitSettings())
+    worker_b = RateLimiter(RateLimitSettings())
+    worker_a.attach(shared)
+    worker_b.attach(shared)
+
+    worker_a.configure(
+        RateLimitSettings(
+            enabled=True, global_limits=RateLimitPolicy(bytes_per_second=5)
+        )
+    )
+    state = TenantRegistry(10, 10).state_for("acme")
+    assert worker_b.check(state, 5) == 0.0
+    assert worker_b.check(state, 5) > 0
+    assert worker_b.settings.enabled
+
+
+@pytest.mark.unit
+def test_overflowing_tenants_do_not_share_a_claimed_slot(shared) -> None:
+    """Tenants that find no free slot never drain the tenant owning slot 0."""
+    limits = (1.0, 5.0)
+    names = (f"tenant-{i}" for i in range(10000))
+    owner = next(
+        name
+        for name in names
+        if shared.tenant_buckets(name, limits, limits)[0]._offset
+        == shared._slots_offset + _SLOT_KEY.size
+    )
+    # Claim the rest of the table until a tenant has to overflow
+    while shared.summary()["tenant_slot_overflows"] == 0:
+        overflow = next(names)
+        shared.tenant_buckets(overflow, limits, limits)
+
+    now = time.monotonic()
+    overflow_bucket = shared.tenant_buckets(overflow, limits, limits)[0]
+    overflow_bucket.wait_time(5.0, now)
+    overflow_bucket.consume(5.0)
+    owner_bucket = shared.tenant_buckets(owner, limits, limits)[0]
+    assert owner_bucket.wait_time(5.0, now) == 0.0
+    assert overflow_bucket.wait_time(5.0, now) > 0
@@ -0,0 +1,340 @@
+"""Unit tests for output sinks and the sink router."""
+
+import asyncio
+import errno
+import gzip
+import json
+import socket
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.config import config
+from src.services.sinks import (
+    FileSink,
+    FileSinkConfig,
+    GraylogHTTPSink,
+    GraylogSinkConfig,
+    GraylogTCPSink,
+    GraylogUDPSink,
+    Sink,
+    SinkConfig,
+    SinkItem,
+    SinkRouter,
+    SyslogSink,
+    SyslogSinkConfig,
+    sinks_from_config,
+)
+
+PAYLOAD = b'{"version":"1.1","host":"nb_streamer_acme","short_message":"x"}'
+
+
+class RecordingSink(Sink):
+    """Fails ``failures`` times, optionally sleeps, then records batches."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0, **settings):
+        settings.setdefault("name", "recording")
+        settings.setdefault("retry_backoff_seconds", 0.0)
+        super().__init__(SinkConfig(**settings))
+        self.remaining_failures = failures
+        self.delay = delay
+        self.batches = []
+
+    async def write(self, batch):
+        await asyncio.sleep(self.delay)
+        if self.remaining_failures:
+            self.remaining_failures -= 1
+            raise OSError("sink down")
+        self.batches.append([item.payload for item in batch])
+
+
+def item(n: int = 0, level: int = 6) -> SinkItem:
+    return SinkItem("acme", level, b"%d" % n)
+
+
+@pytest.mark.unit
+def test_full_queue_drops_newest_or_oldest() -> None:
+    newest = RecordingSink(queue_size=2)
+    oldest = RecordingSink(queue_size=2, on_full="drop_oldest")
+    for n in range(4):
+        newest.offer(item(n))
+        oldest.offer(item(n))
+    assert [i.payload for i in newest._queue] == [b"0", b"1"]
+    assert [i.payload for i in oldest._queue] == [b"2", b"3"]
+    assert newest.summary()["dropped_full"] == oldest.summary()["dropped_full"] == 2
+
+
+@pytest.mark.unit
+def test_batches_are_retried_or_dropped_per_policy() -> None:
+    retrying = RecordingSink(failures=2, batch_size=2, max_retries=2)
+    dropping = RecordingSink(failures=1, batch_size=2, on_failure="drop")
+
+    async def run() -> None:
+        for sink in (retrying, dropping):
+            for n in range(3):
+                sink.offer(item(n))
+            await sink.drain()
+
+    asyncio.run(run())
+    assert retrying.batches == [[b"0", b"1"], [b"2"]]
+    assert retrying.summary()["retries"] == 2
+    assert dropping.batches == [[b"2"]]
+    summary = dropping.summary()
+    assert summary["dropped_failed"] == 2 and summary["failures"] == 1
+    assert summary["last_error"] == "sink down"
+
+
+class FlakySocket:
+    """Records datagrams; fails once on ``fail_on`` and always on ``oversized``."""
+
+    def __init__(self, fail_on: bytes, oversized: bytes):
+        self.fail_on = fail_on
+        self.oversized = oversized
+        self.sent = []
+
+    def sendto(self, data, address):
+        if data == self.oversized:
+            raise OSError(errno.EMSGSIZE, "Message too long")
+        if data == self.fail_on:
+            self.fail_on = None
+            raise OSError(errno.ECONNREFUSED, "Connection refused")
+        self.sent.append(data)
+
+
+@pytest.mark.unit
+def test_retries_resume_after_delivered_events() -> None:
+    """A failure mid-batch never resends events that already went out."""
+    syslog = SyslogSink(
+        SyslogSinkConfig(
+            name="s", type="syslog", host="h", max_retries=2, retry_backoff_seconds=0
+        )
+    )
+    batch = [item(0), item(1), SinkItem("acme", 6, b"big"), item(2)]
+    syslog.udp = FlakySocket(syslog.format(batch[1]), syslog.format(batch[2]))
+    http = GraylogHTTPSink(
+        GraylogSinkConfig(
+            name="h",
+            type="graylog",
+            protocol="http",
+            host="gl",
+            max_retries=2,
+            retry_backoff_seconds=0,
+        )
+    )
+    posted = []
+
+    def handler(request):
+        posted.append(request.content)
+        return httpx.Response(503 if posted == [b"0", b"1"] else 202)
+
+    async def run() -> None:
+        http.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        for sink in (syslog, http):
+            for event in batch:
+                sink.offer(event)
+            await sink.drain()
+
+    asyncio.run(run())
+    assert [data[-1:] for data in syslog.udp.sent] == [b"0", b"1", b"2"]
+    summary = syslog.summary()
+    assert summary["delivered"] == 3 and summary["dropped_oversized"] == 1
+    assert summary["retries"] == 1 and summary["dropped_failed"] == 0
+    assert posted == [b"0", b"1", b"1", b"big", b"2"]
+    assert http.summary()["delivered"] == 4
+
+
+@pytest.mark.unit
+def test_udp_sink_chunks_large_events_and_drops_oversized() -> None:
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    sink = GraylogUDPSink(
+        GraylogSinkConfig(
+            name="u",
+            type="graylog",
+            host="127.0.0.1",
+            port=receiver.getsockname()[1],
+            compress=False,
+        )
+    )
+    large = b"x" * 70_000
+    # 9 chunks of 8192 bytes; the second large event would need more than 128
+    oversized = b"y" * 1_100_000
+    batch = [item(0), item(1), SinkItem("acme", 6, large)]
+    batch += [SinkItem("acme", 6, oversized), item(2)]
+
+    async def run() -> None:
+        for event in batch:
+            sink.offer(event)
+        await sink.drain()
+        await sink.close()
+
+    asyncio.run(run())
+    datagrams = [receiver.recv(65535) for _ in range(3 + 9)]
+    receiver.close()
+    chunks = [d for d in datagrams if d[:2] == b"\x1e\x0f"]
+    assert [d for d in datagrams if d not in chunks] == [b"0", b"1", b"2"]
+    assert len(chunks) == 9 and {d[2:10] for d in chunks} == {chunks[0][2:10]}
+    assert all(len(d) <= 8192 and d[11] == 9 for d in chunks)
+    assert b"".join(d[12:] for d in sorted(chunks, key=lambda d: d[10])) == large
+    summary = sink.summary()
+    assert summary["delivered"] == 4 and summary["dropped_oversized"] == 1
+
+
+@pytest.mark.unit
+def test_slow_sink_does_not_hold_up_others() -> None:
+    slow = RecordingSink(name="slow", delay=0.5, batch_size=1)
+    fast = RecordingSink(name="fast")
+    router = SinkRouter([slow, fast], drain_seconds=0.1)
+
+    async def run() -> None:
+        router.start()
+        for n in range(5):
+            router.publish("acme", 6, b"%d" % n)
+        await asyncio.sleep(0.05)
+        assert sum(len(b) for b in fast.batches) == 5
+        assert router.summary()["sinks"]["slow"]["lag_seconds"] > 0
+        await router.stop()
+
+    asyncio.run(run())
+    assert slow.summary()["delivered"] == 0
+    assert slow.summary()["dropped_failed"] == 5
+
+
+@pytest.mark.unit
+def test_file_and_http_sinks_write_gelf(tmp_path) -> None:
+    file_sink = FileSink(FileSinkConfig(name="f", type="file", directory=str(tmp_path)))
+    http_sink = GraylogHTTPSink(
+        GraylogSinkConfig(name="h", type="graylog", protocol="http", host="gl")
+    )
+    posted = []
+
+    def handler(request):
+        posted.append((str(request.url), request.content))
+        return httpx.Response(202)
+
+    async def run() -> None:
+        http_sink.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        for sink in (file_sink, http_sink):
+            sink.offer(SinkItem("acme", 6, PAYLOAD))
+            await sink.drain()
+            await sink.close()
+
+    asyncio.run(run())
+    [path] = tmp_path.glob("gelf-*.ndjson.gz")
+    assert gzip.decompress(path.read_bytes()) == PAYLOAD + b"\n"
+    assert posted == [("http://gl:12201/gelf", PAYLOAD)]
+
+
+@pytest.mark.unit
+def test_tcp_framing_for_graylog_and_syslog() -> None:
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    received = []
+
+    def accept(count: int) -> None:
+        for _ in range(count):
+            conn, _ = server.accept()
+            with conn:
+                data = b""
+                while chunk := conn.recv(65536):
+                    data += chunk
+                received.append(data)
+
+    listener = threading.Thread(target=accept, args=(2,))
+    listener.start()
+    graylog = GraylogTCPSink(
+        GraylogSinkConfig(
+            name="g", type="graylog", protocol="tcp", host="127.0.0.1", port=port
+        )
+    )
+    syslog = SyslogSink(
+        SyslogSinkConfig(
+            name="s",
+            type="syslog",
+            host="127.0.0.1",
+            port=port,
+            protocol="tcp",
+            facility=16,
+        )
+    )
+
+    async def run() -> None:
+        for sink in (graylog, syslog):
+            sink.offer(SinkItem("acme", 3, PAYLOAD))
+            sink.offer(SinkItem('a"c]', 9, PAYLOAD))
+            await sink.drain()
+            await sink.close()
+
+    asyncio.run(run())
+    listener.join(timeout=5)
+    server.close()
+    assert received[0] == PAYLOAD + b"\0" + PAYLOAD + b"\0"
+
+    framed = received[1]
+    messages = []
+    while framed:
+        length, _, rest = framed.partition(b" ")
+        messages.append(rest[: int(length)])
+        framed = rest[int(length) :]
+    header = messages[0].decode().split(" ")
+    assert header[0] == "<131>1" and header[1].endswith("Z")
+    assert header[3] == "nb_streamer" and header[5] == "-"
+    assert messages[0].endswith(b'[nb@32473 tenant="acme"] ' + PAYLOAD)
+    # Severity is clamped to 7; structured data values are escaped
+    assert messages[1].startswith(b"<135>1 ")
+    assert b'tenant="a\\"c\\]"' in messages[1]
+
+
+@pytest.mark.unit
+def test_sinks_file_is_validated(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "sinks.json"
+    path.write_text(
+        json.dumps(
+            {
+                "sinks": [
+                    {"name": "a", "type": "graylog", "host": "h", "protocol": "tcp"},
+                    {"name": "b", "type": "syslog", "host": "h"},
+                    {"name": "c", "type": "file", "directory": str(tmp_path)},
+                ]
+            }
+        )
+    )
+    monkeypatch.setattr(config, "nb_sinks_file", str(path))
+    router = sinks_from_config(config)
+    assert [s.type for s in router.sinks] == ["graylog_tcp", "syslog", "file"]
+
+    path.write_text(json.dumps({"sinks": [{"name": "a", "type": "kafka"}]}))
+    with pytest.raises(ValueError, match="NB_SINKS_FILE"):
+        sinks_from_config(config)
+    path.write_text(
+        json.dumps({"sinks": [{"name": "a", "type": "file", "directory": "d"}] * 2})
+    )
+    with pytest.raises(ValueError, match="duplicate"):
+        sinks_from_config(config)
+
+
+@pytest.mark.unit
+def test_events_are_serialized_once_for_graylog_and_sinks(monkeypatch) -> None:
+    sink = RecordingSink()
+    monkeypatch.setattr(main, "sink_router", SinkRouter([sink]))
+    forwarded = []
+
+    async def forward(message):
+        forwarded.append(message.payload)
+        return False  # Sinks get the event whatever Graylog does
+
+    monkeypatch.setattr(main.graylog_forwarder, "forward_event", forward)
+
+    with TestClient(main.app) as client:
+        body = {"NB_Tenant": "acme", "ID": "1", "Message": "Peer login"}
+        assert client.post("/events", json=body).status_code == 502
+        stats = client.get("/stats").json()["statistics"]
+        assert stats["sinks"]["sinks"]["recording"]["enqueued"] == 1
+
+    assert sink.batches == [forwarded]
+    assert sink.batches[0][0] is forwarded[0]
+    assert json.loads(forwarded[0])["_NB_tenant"] == "acme"
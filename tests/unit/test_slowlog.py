@@ -0,0 +1,76 @@
+"""Unit tests for per-stage timing and the slow-event ring."""
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.services.slowlog import SlowEventRing, StageTimer
+
+client = TestClient(main.app)
+
+
+@pytest.mark.unit
+def test_stage_timer_breakdown() -> None:
+    """Stages are reported as offsets from the request start."""
+    timer = StageTimer()
+    with timer.stage("auth"):
+        pass
+    with timer.stage("transform_event"):
+        time.sleep(0.01)
+
+    breakdown = timer.breakdown()
+    assert list(breakdown) == ["auth", "transform_event"]
+    assert breakdown["transform_event"]["duration_ms"] >= 10
+    assert breakdown["transform_event"]["start_ms"] >= breakdown["auth"]["end_ms"]
+
+
+@pytest.mark.unit
+def test_ring_keeps_only_slow_events_and_truncates() -> None:
+    """Fast events are skipped; slow ones are bounded and truncated."""
+    ring = SlowEventRing(capacity=2, threshold_ms=5, payload_bytes=4)
+    assert not ring.observe(StageTimer(), "fast", b"{}", 1, 200)
+
+    for tenant in ["a", "b", "c"]:
+        timer = StageTimer()
+        timer.started -= 1  # pretend the request took a second
+        assert ring.observe(timer, tenant, b'{"x": 1}', 2, 200)
+
+    events = ring.snapshot()
+    assert [event["tenant"] for event in events] == ["c", "b"]
+    assert events[0]["payload"] == '{"x"'
+    assert events[0]["payload_truncated"] is True
+    assert events[0]["payload_size"] == 8
+    assert events[0]["chunk_count"] == 2
+    assert ring.summary()["captured"] == 3
+
+
+@pytest.mark.unit
+def test_debug_slow_endpoint(monkeypatch) -> None:
+    """Events over the threshold show up at /debug/slow with stage timings."""
+    ring = SlowEventRing(capacity=10, threshold_ms=0, payload_bytes=1024)
+    monkeypatch.setattr(main, "slow_events", ring)
+
+    body = json.dumps({"NB_Tenant": "acme", "Message": "peer login"})
+    client.post("/events", content=body)
+
+    monkeypatch.setattr(main.config, "nb_admin_token", None)
+    assert client.get("/debug/slow").status_code == 403
+    monkeypatch.setattr(main.config, "nb_admin_token", "admin-secret")
+    response = client.get(
+        "/debug/slow", headers={"Authorization": "Bearer admin-secret"}
+    )
+    assert response.status_code == 200
+    event = response.json()["events"][0]
+    assert event["tenant"] == "acme"
+    assert event["payload_size"] == len(body)
+    for stage in [
+        "auth",
+        "body_read",
+        "json_loads",
+        "transform_event",
+        "forward_event",
+    ]:
+        assert stage in event["stages"]
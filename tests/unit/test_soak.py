@@ -0,0 +1,79 @@
+"""Tests for the soak test driver and its leak detection."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.benchmarks.soak import EventSource, analyse, fit_trend
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.mark.unit
+def test_linear_growth_is_flagged_but_plateaus_and_noise_are_not() -> None:
+    times = [float(t) for t in range(0, 600, 10)]
+    leak = [100_000 + 50 * t for t in times]
+    assert fit_trend(times, leak, threshold=0.1, min_r2=0.8)["growing"]
+
+    plateau = [100_000 + 50 * min(t, 60) for t in times]
+    assert not fit_trend(times, plateau, threshold=0.1, min_r2=0.8)["growing"]
+
+    noise = [100_000 + (7919 * i % 13) * 1000 for i in range(len(times))]
+    trend = fit_trend(times, noise, threshold=0.1, min_r2=0.8)
+    assert trend["r2"] < 0.8 and not trend["growing"]
+
+    assert not fit_trend([0.0, 1.0], [1.0, 2.0], 0.1, 0.8)["growing"]
+
+
+@pytest.mark.unit
+def test_warmup_samples_are_left_out_of_the_fit() -> None:
+    # Fast growth while caches fill, flat afterwards
+    samples = [
+        {"elapsed": t, "rss_bytes": 10_000 + 1000 * min(t, 20)} for t in range(100)
+    ]
+    assert not analyse(samples, 30, {"rss_bytes": 0.05}, 0.8)["rss_bytes"]["growing"]
+    assert analyse(samples, 0, {"rss_bytes": 0.05}, 0.0)["rss_bytes"]["rise"] > 0.05
+
+
+@pytest.mark.unit
+def test_event_source_churns_tenants_and_shapes() -> None:
+    source = EventSource(tenant_window=5, shape_window=3, churn_every=10, seed=3)
+    events = [json.loads(source.next()) for _ in range(200)]
+    early = {event["NB_Tenant"] for event in events[:10]}
+    late = {event["NB_Tenant"] for event in events[-10:]}
+    assert early.isdisjoint(late)
+    extras = {key for event in events for key in event if key.startswith("extra_")}
+    assert len(extras) > 10
+    assert len({event["ID"] for event in events}) == 200
+
+    again = EventSource(tenant_window=5, shape_window=3, churn_every=10, seed=3)
+    assert json.loads(again.next()) == events[0]
+
+
+@pytest.mark.soak
+@pytest.mark.skipif(
+    not os.environ.get("NB_SOAK_SECONDS"), reason="set NB_SOAK_SECONDS to soak"
+)
+def test_soak_shows_no_linear_growth(tmp_path) -> None:
+    output = tmp_path / "soak.json"
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "tests.benchmarks.soak",
+            "--duration",
+            os.environ["NB_SOAK_SECONDS"],
+            "--output",
+            str(output),
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads(output.read_text())
+    assert report["sink"]["received"] == report["events_sent"]
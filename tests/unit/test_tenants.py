@@ -0,0 +1,76 @@
+"""Unit tests for bounded tenant statistics."""
+
+import gc
+import tracemalloc
+
+import pytest
+
+from src import main
+from src.services.tenants import SpaceSaving, TenantRegistry
+
+
+@pytest.mark.unit
+def test_space_saving_counts_heavy_hitters() -> None:
+    """Heavy hitters survive a long tail and carry valid error bounds."""
+    sketch = SpaceSaving(capacity=10)
+    true_counts = {"heavy-a": 500, "heavy-b": 300}
+    for i in range(500):
+        sketch.add("heavy-a")
+        if i < 300:
+            sketch.add("heavy-b")
+        sketch.add(f"tail-{i}")
+
+    top = sketch.top(2)
+    assert [entry["tenant"] for entry in top] == ["heavy-a", "heavy-b"]
+    for entry in top:
+        true = true_counts[entry["tenant"]]
+        assert entry["guaranteed"] <= true <= entry["count"]
+    assert len(sketch) == 10
+    assert sketch.total == 1300
+
+
+@pytest.mark.unit
+def test_registry_caps_exact_tracking() -> None:
+    """Tenants past the cap are only counted in the sketch."""
+    registry = TenantRegistry(max_tenants=2, sketch_capacity=4)
+    for tenant in ["a", "b", "c", "c", "d"]:
+        registry.record(tenant, success=True)
+
+    assert set(registry.exact_counts()) == {"a", "b"}
+    assert registry.get("c") is None
+    overflow = registry.overflow_summary()
+    assert overflow["events"] == 3
+    assert overflow["monitored_tenants"] == 2
+
+    top = registry.top_tenants(1)
+    assert top[0]["tenant"] == "c"
+    assert top[0]["count"] == 2
+
+
+@pytest.mark.unit
+def test_million_distinct_tenants_bounded_memory(monkeypatch) -> None:
+    """A million distinct tenants must not grow tenant statistics."""
+    registry = TenantRegistry(max_tenants=100, sketch_capacity=50)
+    monkeypatch.setattr(main, "tenant_registry", registry)
+    monkeypatch.setattr(main, "stats", dict(main.stats, events_by_level={}))
+
+    objects_before = len(gc.get_objects())
+    for i in range(980_000):
+        main.update_statistics(f"tenant-{i}", "6", True)
+    objects_after = len(gc.get_objects())
+
+    # Steady state: the last 20k distinct tenants allocate nothing durable.
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for i in range(980_000, 1_000_000):
+            main.update_statistics(f"tenant-{i}", "6", True)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(registry) == 100
+    assert registry.overflow_summary()["monitored_tenants"] == 50
+    assert registry.overflow_summary()["events"] == 1_000_000 - 100
+    assert objects_after - objects_before < 1000
+    assert current - baseline < 16 * 1024